@@ -11,6 +11,14 @@ tags_metadata = [
         'name': 'dishes',
         'description': 'Operations with dishes',
     },
+    {
+        'name': 'search',
+        'description': 'Search over dishes and submenus',
+    },
+    {
+        'name': 'metrics',
+        'description': 'Runtime metrics of the application',
+    },
     {
         'name': 'get',
         'description': 'Get operations',
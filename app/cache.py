@@ -1,118 +1,951 @@
-import pickle
-
+import asyncio
+import logging
+import random
+import struct
+import time
+from collections.abc import Awaitable, Callable, Iterable
+from contextvars import ContextVar
+from itertools import chain
+from typing import Any, Generic, TypeVar
+from uuid import UUID
+
+import orjson
 from fastapi import Depends
-from redis import Redis  # type: ignore
-
-from app import models
+from pydantic import BaseModel
+from redis.asyncio import Redis  # type: ignore
+from redis.exceptions import ResponseError  # type: ignore
+
+from app import schemas
+from app.codecs import cache_codec
+from app.compression import Body, pack, select, unpack
+from app.config import settings
 from app.custom_exceptions import EntityIsNotInCache
 from app.dependencies import get_cache_conn
+from app.local_cache import (
+    INVALIDATION_CHANNEL,
+    LayerStats,
+    LocalCache,
+    get_local_cache,
+)
+from app.pagination import PageBody
+from app.single_flight import single_flight
+
+logger = logging.getLogger(__name__)
+
+SchemaT = TypeVar('SchemaT', bound=BaseModel)
+T = TypeVar('T')
+
+
+class InvalidationStats:
+    """How long the invalidation of each write takes in Redis."""
+
+    def __init__(self) -> None:
+        self.invalidations = 0
+        self.unlinked_keys = 0
+        self.time_total = 0.0
+        self.time_max = 0.0
+        self.time_last = 0.0
+
+    def record(self, elapsed: float, unlinked: int) -> None:
+        self.invalidations += 1
+        self.unlinked_keys += unlinked
+        self.time_total += elapsed
+        self.time_max = max(self.time_max, elapsed)
+        self.time_last = elapsed
+
+    def as_dict(self) -> dict[str, int | float]:
+        return {
+            'invalidations': self.invalidations,
+            'unlinked_keys': self.unlinked_keys,
+            'time_total': self.time_total,
+            'time_max': self.time_max,
+            'time_last': self.time_last,
+        }
+
+
+redis_stats = LayerStats()
+invalidation_stats = InvalidationStats()
+
+# Version the last value read in the current request was stored under,
+# which is what its ETag is made from.
+served_version: ContextVar[int | None] = ContextVar(
+    'served_version', default=None
+)
+
+# Background refreshes, kept here so they are not garbage collected.
+refreshes: set[asyncio.Task] = set()
+
+# A version that does not exist yet starts from the server time in
+# microseconds rather than from zero, so a counter lost to eviction
+# never comes back to a version whose keys are still cached.
+NEW_VERSION = """
+local function new_version()
+    local now = redis.call('TIME')
+    return now[1] .. string.format('%06d', tonumber(now[2]))
+end
+"""
+
+# KEYS[1] is the version key, ARGV[1] the TTL it is kept alive for,
+# ARGV[2] is 1 when the value of the previous version may stand in for
+# a missing one, ARGV[3] the key without a version and ARGV[4] an
+# optional hash field. Returns the version, the value and, if asked
+# for, the previous value.
+READ_SCRIPT = """
+local version = redis.call('GETEX', KEYS[1], 'EX', ARGV[1])
+if not version then
+    return {}
+end
+local function read(v)
+    local key = ARGV[3] .. ':v' .. v
+    if #ARGV > 3 then
+        return redis.call('HGET', key, ARGV[4])
+    end
+    return redis.call('GET', key)
+end
+local value = read(version)
+if value or ARGV[2] == '0' then
+    return {version, value}
+end
+return {version, false, read(string.format('%d', tonumber(version) - 1))}
+"""
+
+# KEYS[1] is the version key and ARGV[1] its TTL. Returns the version
+# and 1 if this call created it.
+VERSION_SCRIPT = NEW_VERSION + """
+local version = redis.call('GETEX', KEYS[1], 'EX', ARGV[1])
+if version then
+    return {version, 0}
+end
+version = new_version()
+redis.call('SET', KEYS[1], version, 'EX', ARGV[1])
+return {version, 1}
+"""
+
+# Deletes the version key KEYS[1] if it still holds the version ARGV[1].
+FORGET_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# A tag is a hash of the keys registered under it, each with the latest
+# version it was written under, so rewriting a key does not grow it.
+TAG = """
+local function tag(tags, key, version, ttl)
+    for _, name in ipairs(tags) do
+        local known = tonumber(redis.call('HGET', name, key))
+        if not known or known < tonumber(version) then
+            redis.call('HSET', name, key, version)
+        end
+        redis.call('EXPIRE', name, ttl)
+    end
+end
+"""
+
+# KEYS are the tags, ARGV[1] is the key without a version, ARGV[2] its
+# version and ARGV[3] the TTL of the tags.
+TAG_SCRIPT = TAG + """
+tag(KEYS, ARGV[1], ARGV[2], ARGV[3])
+"""
+
+# KEYS[1] is the version key, KEYS[2] the versioned key and the rest are
+# tags. ARGV[1] is the version, ARGV[2] the key without a version,
+# ARGV[3] the TTL of the value and ARGV[4] that of the tags, followed by
+# the value or by hash fields to set where missing, each with its value.
+# Nothing is written once the version has moved on, as the value may
+# predate the write that moved it. Returns 1 if the value was written.
+PUT_SCRIPT = TAG + """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+if #ARGV == 5 then
+    redis.call('SET', KEYS[2], ARGV[5], 'EX', ARGV[3])
+else
+    for i = 5, #ARGV, 2 do
+        redis.call('HSETNX', KEYS[2], ARGV[i], ARGV[i + 1])
+    end
+    redis.call('EXPIRE', KEYS[2], ARGV[3])
+end
+tag({unpack(KEYS, 3)}, ARGV[2], ARGV[1], ARGV[4])
+return 1
+"""
+
+# KEYS holds the version keys followed by the tags, ARGV[1] is the
+# number of version keys, ARGV[2] the channel the bumped version keys
+# are published to and ARGV[3] the TTL of the version keys. Every
+# version is bumped and every key registered under a tag is unlinked in
+# one atomic call, along with its previous version that reads may fall
+# back to. UNLINK frees the memory of the values in a background
+# thread, and goes out in batches so a large tag does not exceed the
+# stack of unpack. Returns the new versions followed by the number of
+# keys unlinked.
+BUMP_SCRIPT = NEW_VERSION + """
+local versions = tonumber(ARGV[1])
+local bumped = {}
+local unlinked = 0
+redis.call('PUBLISH', ARGV[2], table.concat(KEYS, ' ', 1, versions))
+for i, key in ipairs(KEYS) do
+    if i > versions then
+        local fields = redis.call('HGETALL', key)
+        local members = {key}
+        for f = 1, #fields, 2 do
+            local version = tonumber(fields[f + 1])
+            table.insert(members, fields[f] .. ':v' .. fields[f + 1])
+            table.insert(
+                members,
+                fields[f] .. ':v' .. string.format('%d', version - 1)
+            )
+        end
+        for first = 1, #members, 1000 do
+            local last = math.min(first + 999, #members)
+            unlinked = unlinked
+                + redis.call('UNLINK', unpack(members, first, last))
+        end
+    elseif redis.call('EXISTS', key) == 1 then
+        bumped[i] = redis.call('INCR', key)
+        redis.call('EXPIRE', key, ARGV[3])
+    else
+        bumped[i] = new_version()
+        redis.call('SET', key, bumped[i], 'EX', ARGV[3])
+    end
+end
+bumped[versions + 1] = unlinked
+return bumped
+"""
+
+MENUS = 'menus'
+
+# Format and length of the cursor in front of a cached page. Bundles
+# written before pages had a header start with a zero byte.
+PAGE_HEADER = struct.Struct('>BH')
+PAGE_FORMAT = 1
+
+
+def menu_namespace(menu_id: UUID) -> str:
+    return f'menu:{menu_id}'
+
+
+def submenu_namespace(submenu_id: UUID) -> str:
+    return f'submenu:{submenu_id}'
+
+
+def menu_tag(menu_id: UUID) -> str:
+    return f'keys:menu:{menu_id}'
+
+
+def submenu_tag(submenu_id: UUID) -> str:
+    return f'keys:submenu:{submenu_id}'
+
+
+def version_key(namespace: str) -> str:
+    return f'ver:{namespace}'
+
+
+def local_key(key: str, version: bytes, page: str | None) -> str:
+    key = f'{key}:v{version.decode()}'
+    return key if page is None else f'{key}#{page}'
+
+
+def wrap(value: bytes, soft_ttl: float) -> bytes:
+    """Prefix a list or tree entry with the time it goes stale."""
+    return struct.pack('>d', time.time() + soft_ttl) + value
+
+
+def unwrap(value: bytes | None) -> tuple[float, bytes]:
+    if not value or len(value) < 8:
+        raise EntityIsNotInCache
+
+    return struct.unpack('>d', value[:8])[0], value[8:]
+
+
+def pack_page(bundle: bytes, next_cursor: str | None) -> bytes:
+    """Put the cursor of the next page in front of the bundle of a page.
+
+    Pages are cached as JSON arrays, the bodies their endpoints send, so
+    the cursor that goes out in a header is kept next to them.
+    """
+    cursor = (next_cursor or '').encode()
+    return PAGE_HEADER.pack(PAGE_FORMAT, len(cursor)) + cursor + bundle
+
+
+def unpack_page(value: bytes) -> tuple[bytes, str | None]:
+    """Split a cached page into its bundle and the next cursor."""
+    if len(value) < PAGE_HEADER.size:
+        raise EntityIsNotInCache
+
+    page_format, size = PAGE_HEADER.unpack_from(value)
+    start = PAGE_HEADER.size + size
+    if page_format != PAGE_FORMAT or start > len(value):
+        # Written in another format, e.g. before pages were arrays.
+        raise EntityIsNotInCache
 
+    return value[start:], value[PAGE_HEADER.size:start].decode() or None
 
-class MenuCache:
-    def __init__(self, cache: Redis = Depends(get_cache_conn)) -> None:
-        self.cache = cache
 
-    def get_list(self, key: str) -> list[models.Menu]:
-        value = self.cache.get(key)
+def jittered(ttl: int) -> int:
+    """Spread a TTL by the configured jitter, so keys cached together
+    do not all expire together."""
+    jitter = settings.cache_ttl_jitter
+    return max(1, round(ttl * random.uniform(1 - jitter, 1 + jitter)))
 
-        if not value:
-            raise EntityIsNotInCache
 
-        return pickle.loads(value)
+# A tag must outlive every key registered in it.
+TAG_TTL = round(
+    max(
+        settings.cache_ttl_entity,
+        settings.cache_ttl_list,
+        settings.cache_ttl_tree
+    ) * (1 + settings.cache_ttl_jitter)
+) + 1
 
-    def get(self, key: str) -> models.Menu:
-        value = self.cache.get(key)
+# A version must outlive the keys stored under it, so reads and writes
+# extend its TTL. One that expires anyway is recreated above every
+# version it had, like a version lost to eviction.
+VERSION_TTL = TAG_TTL
 
-        if not value:
-            raise EntityIsNotInCache
 
-        return pickle.loads(value)
+async def configure_memory(cache: Redis) -> None:
+    """Apply the memory budget and eviction policy to the server.
 
-    def save(
-        self,
-        key: str,
-        value: models.Menu | list[models.Menu]
-    ) -> None:
-        self.cache.set(key, pickle.dumps(value))
+    Every cached key has a TTL and lost version counters are recreated,
+    so the cache is safe to run under any allkeys-* policy.
+    """
+    if not settings.cache_max_memory:
+        return
 
-    def delete_cascade(self, pattern: str) -> None:
-        for key in self.cache.scan_iter(pattern):
-            self.cache.delete(key)
+    try:
+        await cache.config_set('maxmemory', settings.cache_max_memory)
+        await cache.config_set(
+            'maxmemory-policy',
+            settings.cache_eviction_policy
+        )
+    except ResponseError as error:
+        # Managed servers often disable CONFIG, their limits stay as is.
+        logger.warning('could not configure redis memory: %s', error)
 
-    def delete(self, key: str) -> None:
-        self.cache.delete(key)
 
+async def get_memory_stats(cache: Redis) -> dict[str, int | str]:
+    memory = await cache.info('memory')
+    stats = await cache.info('stats')
 
-class SubmenuCache:
-    def __init__(self, cache: Redis = Depends(get_cache_conn)) -> None:
-        self.cache = cache
+    return {
+        'used_memory': memory['used_memory'],
+        'used_memory_peak': memory['used_memory_peak'],
+        'max_memory': memory['maxmemory'],
+        'budget': settings.cache_max_memory,
+        'eviction_policy': memory['maxmemory_policy'],
+        'evicted_keys': stats['evicted_keys'],
+        'expired_keys': stats['expired_keys'],
+        'keys': await cache.dbsize(),
+    }
 
-    def get_list(self, key: str) -> list[models.Submenu]:
-        value = self.cache.get(key)
 
-        if not value:
-            raise EntityIsNotInCache
+async def get_cache_stats(
+        cache: Redis,
+        local: LocalCache | None
+) -> dict[str, dict[str, int | float] | None]:
+    return {
+        'local': local.stats.as_dict(len(local.entries)) if local else None,
+        'redis': redis_stats.as_dict(await cache.dbsize()),
+    }
 
-        return pickle.loads(value)
 
-    def get(self, key: str) -> models.Submenu:
-        value = self.cache.get(key)
+def refreshed(task: asyncio.Task) -> None:
+    refreshes.discard(task)
+    if not task.cancelled() and task.exception():
+        logger.warning('cache refresh failed', exc_info=task.exception())
 
-        if not value:
-            raise EntityIsNotInCache
 
-        return pickle.loads(value)
+class VersionedCache:
+    """Keeps cached keys in versioned namespaces.
+
+    Every key is stored with the version of its namespace appended, so
+    bumping the version makes all of them unreachable at once and the
+    old keys age out through their TTL. Keys are also registered in tag
+    sets, which lets deletes free their memory right away.
+
+    Reads go through the worker's local cache first when it is enabled.
+    """
 
-    def save(
-        self,
-        key: str,
-        value: models.Submenu | list[models.Submenu]
+    def __init__(
+            self,
+            cache: Redis = Depends(get_cache_conn),
+            local: LocalCache | None = Depends(get_local_cache)
     ) -> None:
-        self.cache.set(key, pickle.dumps(value))
-
-    def delete_cascade(self, pattern: str) -> None:
-        for key in self.cache.scan_iter(pattern):
-            self.cache.delete(key)
+        self.cache = cache
+        self.local = local
+        self.read_script = cache.register_script(READ_SCRIPT)
+        self.version_script = cache.register_script(VERSION_SCRIPT)
+        self.forget_script = cache.register_script(FORGET_SCRIPT)
+        self.bump_script = cache.register_script(BUMP_SCRIPT)
+        self.tag_script = cache.register_script(TAG_SCRIPT)
+        self.put_script = cache.register_script(PUT_SCRIPT)
+
+    async def version(self, namespace: str) -> int:
+        """Return the current version of a namespace.
+
+        Loaders read it before querying the database: writes bump the
+        version after their commit, so whatever is loaded is at least as
+        new as the version it is stored under.
+        """
+        version, _ = await self._version(namespace)
+        return version
+
+    async def current_version(self, namespace: str) -> int | None:
+        """Return the version of a namespace if it has one.
+
+        Unlike `version` it never creates one, and it is answered by the
+        local cache when possible, so conditional requests cost at most
+        one GET.
+        """
+        key = version_key(namespace)
+        version = self.local.get(key) if self.local is not None else None
+
+        if version is None:
+            version = await self.cache.get(key)
+
+        return None if version is None else int(version)
+
+    async def bump(
+            self,
+            *namespaces: str,
+            tags: Iterable[str] = ()
+    ) -> dict[str, int]:
+        """Invalidate the namespaces and drop the tagged keys.
+
+        Everything one write invalidates goes out in a single script
+        call, so it costs one round trip however many keys it covers.
+
+        Returns the new version of every namespace, which is what fresh
+        values written through after the bump are stored under.
+        """
+        keys = [version_key(namespace) for namespace in namespaces]
+        started = time.perf_counter()
+        *versions, unlinked = await self.bump_script(
+            keys=[*keys, *tags],
+            args=[len(keys), INVALIDATION_CHANNEL, VERSION_TTL]
+        )
+        invalidation_stats.record(time.perf_counter() - started, unlinked)
+        # Other workers learn about the bump from the channel, this one
+        # must not serve its old copy even for a moment.
+        if self.local is not None:
+            self.local.drop(keys)
+
+        return dict(zip(namespaces, map(int, versions)))
+
+    async def _read(
+            self,
+            key: str,
+            namespace: str,
+            page: str | None = None
+    ) -> bytes | None:
+        value, _ = await self._lookup(key, namespace, page, False)
+        return value
 
-    def delete(self, key: str) -> None:
-        self.cache.delete(key)
+    async def _lookup(
+            self,
+            key: str,
+            namespace: str,
+            page: str | None,
+            stale: bool
+    ) -> tuple[bytes | None, bool]:
+        """Read a value, with the previous version's one standing in for
+        it when `stale` is set. Tells which of the two was returned."""
+        local = self.local
+        versioned_key = version_key(namespace)
+
+        if local is not None:
+            version = local.get(versioned_key)
+            value = version and local.get(local_key(key, version, page))
+            if version is not None and value:
+                local.stats.hits += 1
+                served_version.set(int(version))
+                return value, False
+            local.stats.misses += 1
+            generation = local.generation
+
+        args = [VERSION_TTL, int(stale), key]
+        if page is not None:
+            args.append(page)
+        result = await self.read_script(keys=[versioned_key], args=args)
+        version, value, previous = (*result, None, None, None)[:3]
+
+        if value is None:
+            redis_stats.misses += 1
+        else:
+            redis_stats.hits += 1
+
+        if version is None:
+            return None, False
+
+        if local is not None:
+            local.set(versioned_key, version, generation)
+            if value is not None:
+                local.set(local_key(key, version, page), value, generation)
+
+        if value is None and previous is not None:
+            served_version.set(int(version) - 1)
+            return previous, True
+
+        if value is not None:
+            served_version.set(int(version))
+
+        return value, False
+
+    async def _version(self, namespace: str) -> tuple[int, bool]:
+        """Return the current version of a namespace and whether this
+        call created it."""
+        version, created = await self.version_script(
+            keys=[version_key(namespace)], args=[VERSION_TTL]
+        )
+        return int(version), bool(created)
+
+    async def _read_version(
+            self,
+            key: str,
+            version: int,
+            page: str | None = None
+    ) -> bytes | None:
+        key = f'{key}:v{version}'
 
+        if page is None:
+            return await self.cache.get(key)
 
-class DishCache:
-    def __init__(self, cache: Redis = Depends(get_cache_conn)) -> None:
-        self.cache = cache
+        return await self.cache.hget(key, page)
 
-    def get_all(
+    async def _load(
+            self,
+            key: str,
+            namespace: str,
+            page: str | None,
+            fetch: Callable[[], Awaitable[T]],
+            encode: Callable[[T], bytes],
+            decode: Callable[[bytes | None], T],
+            ttl: int,
+            tags: Iterable[str]
+    ) -> T:
+        """Fetch a missing value and cache it under the current version.
+
+        Only one caller per key and version fetches at a time, the rest
+        get its result, or the value of the previous version if it takes
+        too long.
+        """
+        version, created = await self._version(namespace)
+
+        async def fill() -> tuple[T, int]:
+            value = await fetch()
+            await self._write(key, encode(value), version, ttl, tags, page)
+            return value, version
+
+        async def cached() -> tuple[T, int]:
+            value = decode(await self._read(key, namespace, page))
+            return value, served_version.get() or version
+
+        async def stale() -> tuple[T, int]:
+            value = decode(await self._read_version(key, version - 1, page))
+            return value, version - 1
+
+        name = f'{key}:v{version}'
+        if page is not None:
+            name = f'{name}#{page}'
+
+        try:
+            value, loaded_version = await single_flight(
+                self.cache, name, fill, cached, stale
+            )
+        except Exception:
+            # Nothing was stored under the version made up for this load,
+            # e.g. of an entity that does not exist, so it goes as well.
+            if created:
+                await self.forget_script(
+                    keys=[version_key(namespace)], args=[version]
+                )
+            raise
+        # Waiters get the value from another task, so the version it was
+        # read at is passed along with it.
+        served_version.set(loaded_version)
+        return value
+
+    async def _get_or_load(
+            self,
+            key: str,
+            namespace: str,
+            page: str | None,
+            fetch: Callable[[], Awaitable[bytes]],
+            decode: Callable[[bytes], T],
+            ttl: int,
+            soft_ttl: int,
+            tags: Iterable[str]
+    ) -> T:
+        """Read a list or tree entry, loading it on a miss.
+
+        With stale-while-revalidate on, an entry past its soft expiry, or
+        the previous version's entry after a write, is served as it is
+        while a background task rebuilds it. Readers only wait for the
+        database when neither is cached.
+        """
+        swr = settings.cache_stale_while_revalidate
+
+        async def load() -> bytes:
+            return await self._load(
+                key, namespace, page,
+                fetch,
+                lambda payload: wrap(payload, soft_ttl),
+                lambda value: unwrap(value)[1],
+                ttl, tags
+            )
+
+        value, previous = await self._lookup(key, namespace, page, swr)
+        try:
+            stale_at, payload = unwrap(value)
+            data = decode(payload)
+        except EntityIsNotInCache:
+            return decode(await load())
+
+        if previous or (swr and stale_at < time.time()):
+            if self.local is not None:
+                # Read Redis next time, which has the rebuilt entry once
+                # a refresh in any worker is done.
+                version = self.local.get(version_key(namespace))
+                if version is not None:
+                    self.local.drop([local_key(key, version, page)])
+            task = asyncio.create_task(load())
+            refreshes.add(task)
+            task.add_done_callback(refreshed)
+
+        return data
+
+    async def _write(
             self,
             key: str,
-    ) -> list[models.Dish]:
-        value = self.cache.get(key)
+            value: bytes,
+            version: int,
+            ttl: int,
+            tags: Iterable[str],
+            page: str | None = None
+    ) -> None:
+        versioned_key = f'{key}:v{version}'
+        ttl = jittered(ttl)
+
+        async with self.cache.pipeline(transaction=False) as pipe:
+            if page is None:
+                pipe.set(versioned_key, value, ex=ttl)
+            else:
+                pipe.hset(versioned_key, page, value)
+                pipe.expire(versioned_key, ttl)
+            await self._tag(pipe, key, version, tags)
+            await pipe.execute()
+
+    async def _write_current(
+            self,
+            key: str,
+            namespace: str,
+            version: int,
+            ttl: int,
+            tags: Iterable[str],
+            *values: bytes | str
+    ) -> bool:
+        """Write a value, or hash fields where missing, unless the
+        namespace has moved on from `version`."""
+        written = await self.put_script(
+            keys=[version_key(namespace), f'{key}:v{version}', *tags],
+            args=[version, key, jittered(ttl), TAG_TTL, *values]
+        )
+        return bool(written)
+
+    async def _tag(
+            self,
+            pipe: Any,
+            key: str,
+            version: int,
+            tags: Iterable[str]
+    ) -> None:
+        tags = list(tags)
+        if tags:
+            await self.tag_script(
+                keys=tags, args=[key, version, TAG_TTL], client=pipe
+            )
 
-        if not value:
-            raise EntityIsNotInCache
 
-        return pickle.loads(value)
+class BaseCache(VersionedCache, Generic[SchemaT]):
+    """Stores schema-shaped values encoded with the configured codec."""
+
+    schema: type[SchemaT]
 
-    def get(
+    def __init__(
+            self,
+            cache: Redis = Depends(get_cache_conn),
+            local: LocalCache | None = Depends(get_local_cache)
+    ) -> None:
+        super().__init__(cache, local)
+        self.codec = cache_codec
+
+    async def get(self, key: str, namespace: str) -> SchemaT:
+        return self._parse(await self._read(key, namespace))
+
+    async def get_json(self, key: str, namespace: str) -> bytes:
+        """Return a cached value as a ready JSON body."""
+        return self._to_json(await self._read(key, namespace))
+
+    async def get_page(
+            self,
+            key: str,
+            namespace: str,
+            page: str,
+            fetch: Callable[[], Awaitable[schemas.Page[SchemaT]]],
+            tags: Iterable[str] = ()
+    ) -> schemas.Page[SchemaT]:
+        """Return one page of a list, loading it with `fetch` on a miss.
+
+        All pages of a list live in one hash, so a new version of the
+        list starts without any of the old pages.
+        """
+        return await self._get_page(
+            key, namespace, page, fetch, self._parse_page, tags
+        )
+
+    async def get_page_json(
             self,
             key: str,
-    ) -> models.Dish:
-        value = self.cache.get(key)
+            namespace: str,
+            page: str,
+            fetch: Callable[[], Awaitable[schemas.Page[SchemaT]]],
+            tags: Iterable[str] = (),
+            accept_encoding: str | None = None
+    ) -> PageBody:
+        """Return a page as a JSON array, compressed if the client takes
+        one of the variants cached with it."""
+        def decode(value: bytes) -> PageBody:
+            bundle, next_cursor = unpack_page(value)
+            return PageBody(
+                select(bundle, accept_encoding, self._to_json), next_cursor
+            )
+
+        return await self._get_page(
+            key, namespace, page, fetch, decode, tags
+        )
+
+    async def load(
+            self,
+            key: str,
+            namespace: str,
+            fetch: Callable[[], Awaitable[Any]],
+            tags: Iterable[str] = ()
+    ) -> SchemaT:
+        """Cache whatever `fetch` returns, validated against the schema."""
+        async def fetch_one() -> SchemaT:
+            return self.schema.model_validate(await fetch())
+
+        return await self._load(
+            key, namespace, None, fetch_one, self._encode, self._parse,
+            settings.cache_ttl_entity, tags
+        )
+
+    async def put(
+            self,
+            key: str,
+            namespace: str,
+            fetch: Callable[[], Awaitable[Any]],
+            version: int | None = None,
+            tags: Iterable[str] = ()
+    ) -> SchemaT | None:
+        """Write a value fresh from the database through to the cache.
+
+        `version` is the one the write bumped the namespace to, and
+        defaults to the current one for keys in untouched namespaces.
+        A write that committed after this one may have bumped first, so
+        like a loader `fetch` reads the value only once the version is
+        known, and nothing is written if the version has moved on since.
+
+        Returns the value fetched, or None when there is nothing to
+        write through.
+        """
+        if not settings.cache_write_through:
+            return None
+
+        if version is None:
+            version = await self.version(namespace)
+
+        value = await fetch()
+        if value is None:
+            return None
+
+        item = self.schema.model_validate(value)
+        await self._write_current(
+            key, namespace, version, settings.cache_ttl_entity, tags,
+            self._encode(item)
+        )
+        return item
+
+    async def patch_pages(
+            self,
+            key: str,
+            namespace: str,
+            version: int,
+            item: SchemaT,
+            tags: Iterable[str] = ()
+    ) -> None:
+        """Carry the cached pages of a list over to a new version.
+
+        The page holding the updated item gets its fresh copy, the rest
+        are taken as they are, so the list does not have to be reloaded
+        after an update that changes one item in place. Pages keep the
+        soft expiry they had, and a page a reader has already loaded
+        under the new version is left alone. As with `put`, the item
+        has to be read after the bump, and nothing is carried over once
+        the version has moved on.
+        """
+        if not settings.cache_write_through:
+            return
+
+        pages = await self.cache.hgetall(f'{key}:v{version - 1}')
+        patched = {}
+
+        for page, cached in pages.items():
+            try:
+                _, value = unwrap(cached)
+                data = self._parse_page(value)
+            except EntityIsNotInCache:
+                continue
+            data.items = [
+                item if old.id == item.id else old  # type: ignore
+                for old in data.items
+            ]
+            patched[page] = cached[:8] + self._pack_page(data)
+
+        if patched:
+            await self._write_current(
+                key, namespace, version, settings.cache_ttl_list, tags,
+                *chain.from_iterable(patched.items())
+            )
+
+    def dump_json(self, value: BaseModel) -> bytes:
+        return orjson.dumps(value.model_dump(mode='json'))
+
+    def dump_page_json(self, page: schemas.Page[SchemaT]) -> PageBody:
+        items = page.model_dump(mode='json')['items']
+        return PageBody(Body(orjson.dumps(items)), page.next_cursor)
+
+    async def _get_page(
+            self,
+            key: str,
+            namespace: str,
+            page: str,
+            fetch: Callable[[], Awaitable[schemas.Page[SchemaT]]],
+            decode: Callable[[bytes], T],
+            tags: Iterable[str]
+    ) -> T:
+        async def fetch_encoded() -> bytes:
+            return self._pack_page(await fetch())
+
+        ttl, soft_ttl = self._page_ttls()
+        return await self._get_or_load(
+            key, namespace, page, fetch_encoded, decode, ttl, soft_ttl, tags
+        )
+
+    def _page_ttls(self) -> tuple[int, int]:
+        return settings.cache_ttl_list, settings.cache_soft_ttl_list
+
+    def _parse(self, value: bytes | None) -> SchemaT:
+        return self.schema.model_validate(self._decode(value))
+
+    def _parse_page(self, value: bytes) -> schemas.Page[SchemaT]:
+        bundle, next_cursor = unpack_page(value)
+        return schemas.Page[self.schema].model_validate(  # type: ignore
+            {
+                'items': self._decode(unpack(bundle)[0]),
+                'next_cursor': next_cursor
+            }
+        )
+
+    def _pack_page(self, page: schemas.Page[SchemaT]) -> bytes:
+        payload = self.codec.dumps(page.model_dump(mode='json')['items'])
+        return pack_page(
+            pack(payload, self._to_json(payload)), page.next_cursor
+        )
+
+    def _encode(self, value: BaseModel) -> bytes:
+        return self.codec.dumps(value.model_dump(mode='json'))
+
+    def _decode(self, value: bytes | None) -> Any:
+        if not value:
+            raise EntityIsNotInCache
+
+        try:
+            return self.codec.loads(value)
+        except ValueError:
+            raise EntityIsNotInCache
 
+    def _to_json(self, value: bytes | None) -> bytes:
         if not value:
             raise EntityIsNotInCache
 
-        return pickle.loads(value)
+        try:
+            return self.codec.to_json(value)
+        except ValueError:
+            raise EntityIsNotInCache
+
 
-    def save(
-        self,
-        key: str,
-        value: models.Dish | list[models.Dish]
-    ) -> None:
-        self.cache.set(key, pickle.dumps(value))
+class MenuCache(BaseCache[schemas.MenuWithCounts]):
+    schema = schemas.MenuWithCounts
+
+
+class SubmenuCache(BaseCache[schemas.SubmenuWithCounts]):
+    schema = schemas.SubmenuWithCounts
+
+
+class DishCache(BaseCache[schemas.Dish]):
+    schema = schemas.Dish
+
+
+class SearchCache(BaseCache[schemas.SearchHit]):
+    """Stores pages of search results of queries made often enough.
+
+    A query is counted for as long as its results would be kept, so the
+    many queries made only once do not take up memory.
+    """
+
+    schema = schemas.SearchHit
 
-    def delete(
+    async def popular(self, query: str) -> bool:
+        """Count a search for the query, tell if it is worth caching."""
+        key = f'search_hits:{query}'
+        async with self.cache.pipeline(transaction=False) as pipe:
+            pipe.set(key, 0, ex=settings.cache_ttl_search, nx=True)
+            pipe.incr(key)
+            _, hits = await pipe.execute()
+
+        return hits >= settings.cache_search_min_hits
+
+    def _page_ttls(self) -> tuple[int, int]:
+        return settings.cache_ttl_search, settings.cache_soft_ttl_search
+
+
+class MenuTreeCache(VersionedCache):
+    """Stores rendered JSON bodies of the menu tree endpoints."""
+
+    async def get(
             self,
             key: str,
-    ) -> None:
-        self.cache.delete(key)
+            namespace: str,
+            fetch: Callable[[], Awaitable[bytes]],
+            tags: Iterable[str] = (),
+            accept_encoding: str | None = None
+    ) -> Body:
+        """Return a rendered body, rendering it with `fetch` on a miss."""
+        async def fetch_bundle() -> bytes:
+            body = await fetch()
+            return pack(body, body)
+
+        return await self._get_or_load(
+            key, namespace, None, fetch_bundle,
+            lambda bundle: select(bundle, accept_encoding, self._check),
+            settings.cache_ttl_tree, settings.cache_soft_ttl_tree, tags
+        )
+
+    def _check(self, value: bytes | None) -> bytes:
+        if not value:
+            raise EntityIsNotInCache
+
+        return value
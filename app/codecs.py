@@ -0,0 +1,104 @@
+import zlib
+from typing import Any, Protocol
+
+import msgpack  # type: ignore
+import orjson
+
+from .config import settings
+
+RAW = b'\x00'
+ZLIB = b'\x01'
+
+
+class Codec(Protocol):
+    def dumps(self, value: Any) -> bytes:
+        ...
+
+    def loads(self, data: bytes) -> Any:
+        ...
+
+    def to_json(self, data: bytes) -> bytes:
+        ...
+
+
+class OrjsonCodec:
+    def dumps(self, value: Any) -> bytes:
+        return orjson.dumps(value)
+
+    def loads(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+    def to_json(self, data: bytes) -> bytes:
+        return data
+
+
+class MsgpackCodec:
+    def dumps(self, value: Any) -> bytes:
+        return msgpack.packb(value, use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False)
+
+    def to_json(self, data: bytes) -> bytes:
+        return orjson.dumps(self.loads(data))
+
+
+class CompressedCodec:
+    """Wraps a codec and compresses payloads larger than the threshold.
+
+    Every payload is prefixed with a one byte header telling whether
+    the rest of it is compressed, so the threshold can be changed
+    without invalidating values that are already cached.
+    """
+
+    def __init__(self, codec: Codec, threshold: int, level: int = 1) -> None:
+        self.codec = codec
+        self.threshold = threshold
+        self.level = level
+
+    def dumps(self, value: Any) -> bytes:
+        data = self.codec.dumps(value)
+
+        if 0 < self.threshold <= len(data):
+            return ZLIB + zlib.compress(data, self.level)
+
+        return RAW + data
+
+    def loads(self, data: bytes) -> Any:
+        return self.codec.loads(self._payload(data))
+
+    def to_json(self, data: bytes) -> bytes:
+        """Return an encoded value as JSON, skipping Python objects
+        whenever the wrapped codec already stores JSON."""
+        return self.codec.to_json(self._payload(data))
+
+    def _payload(self, data: bytes) -> bytes:
+        header, payload = data[:1], data[1:]
+
+        if header == ZLIB:
+            return zlib.decompress(payload)
+        elif header != RAW:
+            raise ValueError('value was not written by CompressedCodec')
+
+        return payload
+
+
+CODECS: dict[str, type[OrjsonCodec] | type[MsgpackCodec]] = {
+    'orjson': OrjsonCodec,
+    'msgpack': MsgpackCodec,
+}
+
+
+def create_codec(name: str, compress_threshold: int) -> CompressedCodec:
+    try:
+        codec = CODECS[name]()
+    except KeyError:
+        raise ValueError(f'unknown cache codec: {name}')
+
+    return CompressedCodec(codec, compress_threshold)
+
+
+cache_codec = create_codec(
+    settings.cache_codec,
+    settings.cache_compress_threshold
+)
@@ -0,0 +1,56 @@
+"""Maintenance commands.
+
+Usage:
+    python -m app.commands check-counters [--repair]
+"""
+import argparse
+import asyncio
+
+from .database import SessionLocal, engine
+from .repositories import CountersRepository
+
+
+async def check_counters(repair: bool) -> int:
+    async with SessionLocal() as session:
+        repository = CountersRepository(session)
+        mismatches = await repository.find_mismatches()
+
+        for mismatch in mismatches:
+            print(
+                f'{mismatch.table} {mismatch.id}: '
+                f'stored {mismatch.stored}, actual {mismatch.actual}'
+            )
+
+        if mismatches and repair:
+            await repository.repair()
+            print(f'repaired {len(mismatches)} row(s)')
+        elif not mismatches:
+            print('all counters are consistent')
+
+    await engine.dispose()
+
+    return 1 if mismatches and not repair else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog='python -m app.commands')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    counters = subparsers.add_parser(
+        'check-counters',
+        help='compare maintained submenu/dish counters with real counts'
+    )
+    counters.add_argument(
+        '--repair',
+        action='store_true',
+        help='overwrite wrong counters with real counts'
+    )
+
+    args = parser.parse_args()
+
+    if args.command == 'check-counters':
+        raise SystemExit(asyncio.run(check_counters(args.repair)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+import gzip
+import struct
+from collections.abc import Callable
+from typing import NamedTuple
+
+import brotli  # type: ignore
+
+from .config import settings
+from .custom_exceptions import EntityIsNotInCache
+
+# In the order they are preferred when a client accepts several.
+ENCODINGS = ('br', 'gzip')
+
+# Lengths of the brotli and gzip variants in front of a bundle.
+HEADER = struct.Struct('>II')
+
+# Variants are compressed once per cached entry, so they can afford a
+# higher level than compression done for every response would.
+BROTLI_QUALITY = 9
+GZIP_LEVEL = 9
+
+
+class Body(NamedTuple):
+    """A JSON body in the content coding it is sent with."""
+
+    content: bytes
+    encoding: str | None = None
+
+
+def compress(body: bytes) -> dict[str, bytes]:
+    if len(body) < settings.response_compress_threshold:
+        return {}
+
+    return {
+        'br': brotli.compress(body, quality=BROTLI_QUALITY),
+        'gzip': gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0),
+    }
+
+
+def pack(payload: bytes, body: bytes) -> bytes:
+    """Bundle a cached payload with compressed variants of its JSON body.
+
+    Bodies below the threshold are not worth compressing and are bundled
+    without variants.
+    """
+    variants = compress(body)
+    br, gz = variants.get('br', b''), variants.get('gzip', b'')
+
+    return HEADER.pack(len(br), len(gz)) + br + gz + payload
+
+
+def unpack(bundle: bytes) -> tuple[bytes, dict[str, bytes]]:
+    """Split a bundle into its payload and the variants it has."""
+    if len(bundle) < HEADER.size:
+        raise EntityIsNotInCache
+
+    br_size, gz_size = HEADER.unpack_from(bundle)
+    start = HEADER.size + br_size + gz_size
+    if start > len(bundle):
+        # Written in another format, e.g. before variants were added.
+        raise EntityIsNotInCache
+
+    br = bundle[HEADER.size:HEADER.size + br_size]
+    gz = bundle[HEADER.size + br_size:start]
+    variants = {name: value for name, value in (('br', br), ('gzip', gz))
+                if value}
+
+    return bundle[start:], variants
+
+
+def accepted(accept_encoding: str | None) -> dict[str, float]:
+    """Parse Accept-Encoding into the quality of every coding named."""
+    qualities = {}
+
+    for item in (accept_encoding or '').split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        name, _, value = params.partition('=')
+        if name.strip().lower() == 'q':
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        qualities[coding] = quality
+
+    return qualities
+
+
+def choose(
+        accept_encoding: str | None,
+        variants: dict[str, bytes]
+) -> str | None:
+    """Pick the variant to send, or None for the identity body."""
+    qualities = accepted(accept_encoding)
+    default = qualities.get('*', 0.0)
+    best, best_quality = None, 0.0
+
+    for encoding in ENCODINGS:
+        quality = qualities.get(encoding, default)
+        if encoding in variants and quality > best_quality:
+            best, best_quality = encoding, quality
+
+    return best
+
+
+def select(
+        bundle: bytes,
+        accept_encoding: str | None,
+        to_json: Callable[[bytes], bytes]
+) -> Body:
+    """Pick the body to send from a bundle.
+
+    The identity body is only produced from the payload when no variant
+    is acceptable.
+    """
+    payload, variants = unpack(bundle)
+    encoding = choose(accept_encoding, variants)
+
+    if encoding is None:
+        return Body(to_json(payload))
+
+    return Body(variants[encoding], encoding)
@@ -0,0 +1,63 @@
+from typing import Literal
+
+from pydantic_settings import BaseSettings
+
+
+class Settings(BaseSettings):
+    """Application settings read from environment variables."""
+
+    db_url: str
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_statement_timeout: int = 30000
+
+    redis_host: str = 'redis'
+    redis_port: int = 6379
+    redis_max_connections: int = 100
+    redis_pool_timeout: float = 5.0
+    redis_socket_timeout: float = 5.0
+    redis_socket_connect_timeout: float = 2.0
+    redis_health_check_interval: int = 30
+
+    page_size: int = 100
+    page_size_max: int = 1000
+
+    response_compress_threshold: int = 1024
+
+    cache_codec: Literal['orjson', 'msgpack'] = 'orjson'
+    cache_compress_threshold: int = 4096
+    cache_ttl_entity: int = 3600
+    cache_ttl_list: int = 600
+    cache_ttl_tree: int = 300
+    cache_ttl_jitter: float = 0.1
+    cache_max_memory: int = 0
+    cache_eviction_policy: str = 'allkeys-lru'
+    cache_stale_while_revalidate: bool = False
+    cache_soft_ttl_list: int = 60
+    cache_soft_ttl_tree: int = 30
+    cache_write_through: bool = True
+    cache_lock_timeout: int = 5000
+    cache_lock_wait: int = 500
+    cache_local_enabled: bool = False
+    cache_local_max_size: int = 10000
+    cache_local_ttl: float = 30.0
+    cache_outbox_inline: bool = True
+    cache_outbox_grace: float = 5.0
+    cache_outbox_batch: int = 500
+    cache_outbox_poll_interval: float = 1.0
+    cache_notify_enabled: bool = True
+    cache_notify_retry_interval: float = 5.0
+    cache_warm_enabled: bool = True
+    cache_warm_limit: int = 1000
+    cache_warm_concurrency: int = 2
+    cache_warm_timeout: float = 30.0
+    cache_warm_stats_interval: float = 10.0
+    cache_ttl_search: int = 60
+    cache_soft_ttl_search: int = 15
+    cache_search_min_hits: int = 2
+
+
+settings = Settings()
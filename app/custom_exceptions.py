@@ -4,3 +4,7 @@ class EntityDoesNotExist(Exception):
 
 class EntityIsNotInCache(Exception):
     """Raised when entity was not found in cache."""
+
+
+class LoadAbandoned(Exception):
+    """Raised to callers sharing a load whose runner was cancelled."""
@@ -1,14 +1,105 @@
-import os
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection
 
-SQLALCHEMY_DATABASE_URL = os.environ.get('DB_URL')
+from .config import settings
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long checkouts wait for a connection."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def connect(self) -> PoolProxiedConnection:
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.checkouts += 1
+            self.wait_time_total += waited
+            self.wait_time_max = max(self.wait_time_max, waited)
+
+
+def get_engine_connect_args() -> dict:
+    if not settings.db_statement_timeout:
+        return {}
+
+    return {
+        'server_settings': {
+            'statement_timeout': str(settings.db_statement_timeout)
+        }
+    }
+
+
+engine = create_async_engine(
+    settings.db_url,
+    poolclass=InstrumentedQueuePool,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_recycle=settings.db_pool_recycle,
+    pool_pre_ping=settings.db_pool_pre_ping,
+    connect_args=get_engine_connect_args()
 )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = async_sessionmaker(
+    bind=engine,
+    autoflush=False,
+    expire_on_commit=False
+)
 
 Base = declarative_base()
+
+
+def get_pool_stats() -> dict[str, int | float]:
+    pool: InstrumentedQueuePool = engine.sync_engine.pool  # type: ignore
+
+    return {
+        'size': pool.size(),
+        'checked_in': pool.checkedin(),
+        'checked_out': pool.checkedout(),
+        'overflow': max(pool.overflow(), 0),
+        'max_overflow': settings.db_max_overflow,
+        'checkouts': pool.checkouts,
+        'timeouts': pool.timeouts,
+        'wait_time_total': pool.wait_time_total,
+        'wait_time_max': pool.wait_time_max,
+    }
+
+
+@contextmanager
+def count_statements(prefix: str = '') -> Iterator[list[str]]:
+    """Collect the statements starting with `prefix` that the engine runs
+    within the block.
+
+    The outbox dispatcher may claim and delete events meanwhile in the
+    background, so statements on the outbox other than the inserts of
+    new events are left out.
+    """
+    statements: list[str] = []
+
+    def count(conn, cursor, statement, *args) -> None:
+        if 'cache_outbox' in statement and not statement.startswith('INSERT'):
+            return
+        if statement.startswith(prefix):
+            statements.append(statement)
+
+    event.listen(engine.sync_engine, 'before_cursor_execute', count)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, 'before_cursor_execute', count)
@@ -1,22 +1,29 @@
-import os
-from collections.abc import Generator
+from collections.abc import AsyncGenerator
 
-import redis  # type: ignore
-from sqlalchemy.orm import Session
+from fastapi import Request
+from redis.asyncio import BlockingConnectionPool, Redis  # type: ignore
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from .config import settings
 from .database import SessionLocal
 
 
-def get_db() -> Generator[Session, None, None]:
-    db: Session = SessionLocal()
-    try:
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
-def get_cache_conn() -> redis.Redis:
-    return redis.Redis(
-        host=os.environ.get('REDIS_HOST', 'redis'),
-        port=int(os.environ.get('REDIS_PORT', 6379))
+def create_cache_pool() -> BlockingConnectionPool:
+    return BlockingConnectionPool(
+        host=settings.redis_host,
+        port=settings.redis_port,
+        max_connections=settings.redis_max_connections,
+        timeout=settings.redis_pool_timeout,
+        socket_timeout=settings.redis_socket_timeout,
+        socket_connect_timeout=settings.redis_socket_connect_timeout,
+        health_check_interval=settings.redis_health_check_interval
     )
+
+
+async def get_cache_conn(request: Request) -> Redis:
+    return Redis(connection_pool=request.app.state.cache_pool)
@@ -0,0 +1,55 @@
+from decimal import ROUND_CEILING, ROUND_FLOOR, Decimal
+from typing import Annotated, Literal
+
+from fastapi import HTTPException, Query
+
+CENT = Decimal('0.01')
+
+# Prices are numeric(10, 2).
+PriceBound = Annotated[Decimal | None, Query(ge=0, lt=10 ** 8)]
+
+
+class DishFilter:
+    """Price range and order of dish lists.
+
+    Prices are whole cents, so the bounds are rounded to cents inward,
+    which matches the same dishes and gives every range one spelling.
+    """
+
+    def __init__(
+            self,
+            min_price: PriceBound = None,
+            max_price: PriceBound = None,
+            sort: Literal['id', 'price'] = 'id'
+    ) -> None:
+        self.min_price = (
+            None if min_price is None
+            else min_price.quantize(CENT, rounding=ROUND_CEILING)
+        )
+        self.max_price = (
+            None if max_price is None
+            else max_price.quantize(CENT, rounding=ROUND_FLOOR)
+        )
+        self.sort = sort
+
+        if self.min_price is not None and self.max_price is not None:
+            if self.min_price > self.max_price:
+                raise HTTPException(
+                    status_code=400,
+                    detail='min_price is greater than max_price'
+                )
+
+    @property
+    def active(self) -> bool:
+        """Whether the list differs from the plain list ordered by id."""
+        if self.sort != 'id':
+            return True
+        return self.min_price is not None or self.max_price is not None
+
+    @property
+    def key(self) -> str:
+        """Normalized identity of the filter, part of the cache field."""
+        return ':'.join(
+            '' if value is None else str(value)
+            for value in (self.min_price, self.max_price, self.sort)
+        )
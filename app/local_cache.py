@@ -0,0 +1,107 @@
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+
+from fastapi import Request
+from redis.asyncio import Redis  # type: ignore
+from redis.exceptions import ConnectionError, TimeoutError  # type: ignore
+
+INVALIDATION_CHANNEL = 'cache:invalidate'
+
+
+class LayerStats:
+    """Hit and miss counters of one cache layer."""
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+    def as_dict(self, size: int) -> dict[str, int | float]:
+        total = self.hits + self.misses
+
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'size': size,
+        }
+
+
+class LocalCache:
+    """Per-worker LRU cache in front of Redis.
+
+    It holds namespace versions and the values stored under them, both
+    as read from Redis. Dropping a version makes its values unreachable,
+    they are then pushed out by newer entries or by the TTL.
+    """
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self.stats = LayerStats()
+        # Bumped on every drop, so a read that raced with one does not
+        # put back what was just dropped.
+        self.generation = 0
+
+    def get(self, key: str) -> bytes | None:
+        entry = self.entries.get(key)
+
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self.entries[key]
+            return None
+
+        self.entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: bytes, generation: int) -> None:
+        if generation != self.generation:
+            return
+
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def drop(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            self.entries.pop(key, None)
+        self.generation += 1
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.generation += 1
+
+
+async def listen_invalidations(cache: Redis, local: LocalCache) -> None:
+    """Drop versions bumped by any worker as soon as they are published.
+
+    Messages sent while the subscription is down are lost, so the whole
+    cache is cleared every time it is (re)established.
+    """
+    while True:
+        try:
+            async with cache.pubsub() as pubsub:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                local.clear()
+
+                while True:
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True,
+                        timeout=1.0
+                    )
+                    if message:
+                        local.drop(message['data'].decode().split())
+        except (ConnectionError, TimeoutError):
+            local.clear()
+            await asyncio.sleep(1)
+
+
+async def get_local_cache(request: Request) -> LocalCache | None:
+    return request.app.state.local_cache
@@ -1,14 +1,67 @@
+import asyncio
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from redis.asyncio import Redis  # type: ignore
 
-from . import api_description, models
+from . import api_description
+from .cache import VersionedCache, configure_memory
+from .config import settings
 from .database import engine
+from .dependencies import create_cache_pool
+from .local_cache import LocalCache, listen_invalidations
+from .notifications import listen_notifications
+from .outbox import run_dispatcher, try_dispatch
 from .routers import api
+from .warmer import CacheWarmer, access_stats, flush_access_stats
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
+    app.state.cache_pool = create_cache_pool()
+    cache = Redis(connection_pool=app.state.cache_pool)
+    await configure_memory(cache)
+
+    app.state.local_cache = None
+    if settings.cache_local_enabled:
+        app.state.local_cache = LocalCache(
+            settings.cache_local_max_size,
+            settings.cache_local_ttl
+        )
+        listener = asyncio.create_task(
+            listen_invalidations(cache, app.state.local_cache)
+        )
+
+    versioned_cache = VersionedCache(cache, app.state.local_cache)
+    dispatcher = asyncio.create_task(run_dispatcher(versioned_cache))
+    if settings.cache_notify_enabled:
+        notification_listener = asyncio.create_task(
+            listen_notifications(versioned_cache)
+        )
+    stats_flusher = asyncio.create_task(flush_access_stats(cache))
+    # Runs in the background, traffic is served while it fills the cache.
+    CacheWarmer(cache, app.state.local_cache).schedule()
+
+    yield
+
+    stats_flusher.cancel()
+    await access_stats.flush(cache)
+    if settings.cache_notify_enabled:
+        notification_listener.cancel()
+    dispatcher.cancel()
+    # Whatever this worker committed is applied before it goes away.
+    await try_dispatch(versioned_cache)
+    if settings.cache_local_enabled:
+        listener.cancel()
+    await app.state.cache_pool.disconnect()
+    await engine.dispose()
 
-models.Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title='MenuApp',
-    openapi_tags=api_description.tags_metadata
+    openapi_tags=api_description.tags_metadata,
+    lifespan=lifespan
 )
 
 app.include_router(
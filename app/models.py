@@ -1,47 +1,264 @@
 import uuid
+from collections.abc import Callable
+from decimal import Decimal
 
-from sqlalchemy import Column, ForeignKey, String, Text, Uuid
-from sqlalchemy.orm import relationship
+from sqlalchemy import (
+    JSON,
+    Column,
+    Computed,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    Numeric,
+    String,
+    Text,
+    Uuid,
+    event,
+    func,
+    text,
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import deferred, relationship
+from sqlalchemy.schema import DDL
+from sqlalchemy.types import TypeDecorator
 
 from .database import Base
 
 
+class Price(TypeDecorator):
+    """Numeric price read back as the string with two decimal places
+    that it has always been served as."""
+
+    impl = Numeric(10, 2)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect) -> Decimal | None:
+        return None if value is None else Decimal(str(value))
+
+    def process_result_value(self, value, dialect) -> str | None:
+        return None if value is None else f'{value:.2f}'
+
+
+# Stems Russian words, and English ones written in Latin letters.
+SEARCH_CONFIG = 'russian'
+
+# Extension behind the trigram indexes. Databases without it are
+# searched by full text alone.
+TRIGRAM = 'pg_trgm'
+
+TRIGRAM_AVAILABLE = text(
+    'SELECT EXISTS (SELECT FROM pg_available_extensions '
+    f"WHERE name = '{TRIGRAM}')"
+)
+
+TRIGRAM_INSTALLED = text(
+    f"SELECT EXISTS (SELECT FROM pg_extension WHERE extname = '{TRIGRAM}')"
+)
+
+
+def trigram_installed(connection: Connection | None) -> bool:
+    # Without a connection, e.g. for offline DDL, the extension is assumed.
+    return connection is None or bool(connection.scalar(TRIGRAM_INSTALLED))
+
+
+def search_vector_column() -> Column:
+    """Title and description as lexemes, the title weighing more.
+
+    The database keeps the column up to date, and it is only read when
+    asked for.
+    """
+    return deferred(Column(TSVECTOR, Computed(
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A')"
+        f" || setweight(to_tsvector('{SEARCH_CONFIG}', "
+        "coalesce(description, '')), 'B')",
+        persisted=True
+    )))
+
+
+def search_indexes(table: str) -> tuple[Index, Index]:
+    """Full-text index, and trigram index matching partial or mistyped
+    titles where the extension is installed."""
+    trigram = Index(
+        f'ix_{table}_title_trgm', 'title',
+        postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'},
+        info={'extension': TRIGRAM}
+    ).ddl_if(
+        callable_=lambda ddl, target, bind, **kw: trigram_installed(bind)
+    )
+    return (
+        Index(f'ix_{table}_search_vector', 'search_vector',
+              postgresql_using='gin'),
+        trigram,
+    )
+
+
+def include_object(connection: Connection) -> Callable[..., bool]:
+    """Return the Alembic hook that leaves the indexes of an extension
+    the database does not have out of schema comparisons."""
+    installed = trigram_installed(connection)
+
+    def include(object, name, type_, reflected, compare_to) -> bool:
+        return type_ != 'index' or installed or (
+            object.info.get('extension') != TRIGRAM
+        )
+
+    return include
+
+
 class Dish(Base):
     __tablename__ = 'dishes'
+    __table_args__ = (
+        Index('ix_dishes_submenu_id_id', 'submenu_id', 'id'),
+        # Price ranges and the price order of one submenu and of all.
+        Index('ix_dishes_submenu_id_price_id', 'submenu_id', 'price', 'id'),
+        Index('ix_dishes_price_id', 'price', 'id'),
+        *search_indexes('dishes'),
+    )
 
-    id = Column(Uuid, primary_key=True, unique=True,
-                default=uuid.uuid4)
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
     title = Column(String, unique=True)
     description = Column(Text)
-    price = Column(String)
+    price = Column(Price)
+    search_vector = search_vector_column()
 
-    submenu_id = Column(Uuid, ForeignKey('submenus.id'))
+    submenu_id = Column(Uuid, ForeignKey('submenus.id', ondelete='CASCADE'))
 
     submenu = relationship('Submenu', back_populates='dishes')
 
 
 class Submenu(Base):
     __tablename__ = 'submenus'
+    __table_args__ = (
+        Index('ix_submenus_menu_id_id', 'menu_id', 'id'),
+        *search_indexes('submenus'),
+    )
 
-    id = Column(Uuid, primary_key=True, unique=True,
-                default=uuid.uuid4)
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
     title = Column(String, unique=True)
     description = Column(Text)
+    dishes_count = Column(Integer, nullable=False, default=0,
+                          server_default='0')
+    search_vector = search_vector_column()
 
-    menu_id = Column(Uuid, ForeignKey('menus.id'))
+    menu_id = Column(Uuid, ForeignKey('menus.id', ondelete='CASCADE'))
 
     menu = relationship('Menu', back_populates='submenus')
     dishes = relationship('Dish', back_populates='submenu',
-                          cascade='all, delete-orphan')
+                          cascade='all, delete-orphan', passive_deletes=True)
 
 
 class Menu(Base):
     __tablename__ = 'menus'
 
-    id = Column(Uuid, primary_key=True, unique=True,
-                default=uuid.uuid4)
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
     title = Column(String, unique=True)
     description = Column(Text)
+    submenus_count = Column(Integer, nullable=False, default=0,
+                            server_default='0')
+    dishes_count = Column(Integer, nullable=False, default=0,
+                          server_default='0')
 
     submenus = relationship(
-        'Submenu', back_populates='menu', cascade='all, delete-orphan')
+        'Submenu', back_populates='menu', cascade='all, delete-orphan',
+        passive_deletes=True)
+
+
+class CacheOutbox(Base):
+    """Cache invalidation committed along with the write it belongs to."""
+
+    __tablename__ = 'cache_outbox'
+
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+    namespaces = Column(JSON, nullable=False)
+    tags = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False,
+                        server_default=func.now(), index=True)
+
+
+# Channel the rows changed in menus, submenus and dishes are announced on.
+NOTIFY_CHANNEL = 'cache_invalidation'
+
+# The triggers are deferred to the commit, by which time a transaction
+# of the app has added its outbox event. Those are skipped, the outbox
+# invalidates them already; anything else, e.g. a fix made in SQL, is
+# announced with the ids of the row and of its parents, before and after
+# an update. Identical payloads of one transaction are sent only once.
+MARK_FUNCTION = DDL("""
+CREATE OR REPLACE FUNCTION mark_cache_outbox() RETURNS trigger AS $$
+BEGIN
+    PERFORM set_config('menu_app.outbox', 'on', true);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+""")
+
+NOTIFY_FUNCTION = DDL(f"""
+CREATE OR REPLACE FUNCTION notify_cache_invalidation() RETURNS trigger AS $$
+DECLARE
+    image jsonb;
+    images jsonb[] := '{{}}';
+    menu_id uuid;
+BEGIN
+    IF current_setting('menu_app.outbox', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP <> 'INSERT' THEN
+        images := array_append(images, to_jsonb(OLD));
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        images := array_append(images, to_jsonb(NEW));
+    END IF;
+
+    FOREACH image IN ARRAY images LOOP
+        IF TG_TABLE_NAME = 'dishes' THEN
+            EXECUTE format(
+                'SELECT menu_id FROM %%I.submenus WHERE id = $1',
+                TG_TABLE_SCHEMA
+            ) INTO menu_id USING (image ->> 'submenu_id')::uuid;
+            image := image || jsonb_build_object('menu_id', menu_id);
+        END IF;
+        PERFORM pg_notify('{NOTIFY_CHANNEL}', jsonb_build_object(
+            'table', TG_TABLE_NAME,
+            'op', TG_OP,
+            'id', image -> 'id',
+            'menu_id', image -> 'menu_id',
+            'submenu_id', image -> 'submenu_id',
+            'at', extract(epoch FROM now())
+        )::text);
+    END LOOP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+""")
+
+MARK_TRIGGER = DDL("""
+CREATE TRIGGER cache_outbox_mark
+AFTER INSERT ON %(fullname)s
+FOR EACH STATEMENT EXECUTE FUNCTION mark_cache_outbox();
+""")
+
+
+def notify_trigger(table: str) -> DDL:
+    return DDL(f"""
+CREATE CONSTRAINT TRIGGER {table}_cache_invalidation
+AFTER INSERT OR UPDATE OR DELETE ON %(fullname)s
+DEFERRABLE INITIALLY DEFERRED
+FOR EACH ROW EXECUTE FUNCTION notify_cache_invalidation();
+""")
+
+
+event.listen(
+    Base.metadata, 'before_create',
+    DDL(f'CREATE EXTENSION IF NOT EXISTS {TRIGRAM}').execute_if(
+        callable_=lambda ddl, target, bind, **kw: bool(
+            bind.scalar(TRIGRAM_AVAILABLE)
+        )
+    )
+)
+event.listen(Base.metadata, 'before_create', MARK_FUNCTION)
+event.listen(Base.metadata, 'before_create', NOTIFY_FUNCTION)
+event.listen(CacheOutbox.__table__, 'after_create', MARK_TRIGGER)
+for table in (Menu.__table__, Submenu.__table__, Dish.__table__):
+    event.listen(table, 'after_create', notify_trigger(table.name))
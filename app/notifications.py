@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import time
+from uuid import UUID
+
+import asyncpg  # type: ignore
+import orjson
+from redis.exceptions import RedisError  # type: ignore
+from sqlalchemy.engine import make_url
+
+from app.cache import (
+    MENUS,
+    VersionedCache,
+    menu_namespace,
+    menu_tag,
+    submenu_namespace,
+    submenu_tag,
+)
+from app.config import settings
+from app.models import NOTIFY_CHANNEL
+
+logger = logging.getLogger(__name__)
+
+# Session advisory lock held by the one worker that listens, so every
+# notification is applied once however many instances run.
+LISTENER_LOCK = 0x6d656e75
+
+
+class ListenerStats:
+    """Notifications applied by this worker and how late they were."""
+
+    def __init__(self) -> None:
+        self.listening = False
+        self.notifications = 0
+        self.invalidations = 0
+        self.lag_total = 0.0
+        self.lag_max = 0.0
+        self.lag_last = 0.0
+
+    def record(self, lags: list[float]) -> None:
+        self.notifications += len(lags)
+        self.invalidations += 1
+        self.lag_total += sum(lags)
+        self.lag_max = max(self.lag_max, *lags)
+        self.lag_last = lags[-1]
+
+    def as_dict(self) -> dict[str, bool | int | float]:
+        return {
+            'listening': self.listening,
+            'notifications': self.notifications,
+            'invalidations': self.invalidations,
+            'lag_total': self.lag_total,
+            'lag_max': self.lag_max,
+            'lag_last': self.lag_last,
+        }
+
+
+listener_stats = ListenerStats()
+
+
+def invalidation(notification: dict) -> tuple[set[str], set[str]]:
+    """Map a changed row to the namespaces and tags a service write of it
+    would invalidate."""
+    namespaces, tags = {MENUS}, set()
+    table, deleted = notification['table'], notification['op'] == 'DELETE'
+    ids = {
+        name: UUID(notification[name])
+        for name in ('id', 'menu_id', 'submenu_id')
+        if notification.get(name)
+    }
+
+    if table == 'menus':
+        namespaces.add(menu_namespace(ids['id']))
+        if deleted:
+            tags.add(menu_tag(ids['id']))
+    elif table == 'submenus':
+        namespaces.add(submenu_namespace(ids['id']))
+        if deleted:
+            tags.add(submenu_tag(ids['id']))
+    elif table == 'dishes' and 'submenu_id' in ids:
+        namespaces.add(submenu_namespace(ids['submenu_id']))
+
+    # Gone along with a deleted parent otherwise, which invalidates it.
+    if 'menu_id' in ids:
+        namespaces.add(menu_namespace(ids['menu_id']))
+
+    return namespaces, tags
+
+
+async def apply(
+        cache: VersionedCache,
+        notifications: list[dict]
+) -> None:
+    """Apply the notifications received so far in a single bump."""
+    namespaces, tags = set(), set()
+    for notification in notifications:
+        changed_namespaces, changed_tags = invalidation(notification)
+        namespaces |= changed_namespaces
+        tags |= changed_tags
+
+    await cache.bump(*namespaces, tags=tags)
+
+    now = time.time()
+    listener_stats.record(
+        [now - notification['at'] for notification in notifications]
+    )
+
+
+async def connect() -> asyncpg.Connection:
+    url = make_url(settings.db_url).set(drivername='postgresql')
+    return await asyncpg.connect(url.render_as_string(hide_password=False))
+
+
+async def listen(cache: VersionedCache) -> None:
+    """Listen and apply notifications until the connection is lost.
+
+    Returns right away when another worker holds the listener lock.
+    """
+    queue: asyncio.Queue[dict] = asyncio.Queue()
+
+    def received(connection, pid, channel, payload: str) -> None:
+        queue.put_nowait(orjson.loads(payload))
+
+    connection = await connect()
+    try:
+        if not await connection.fetchval(
+            'SELECT pg_try_advisory_lock($1)', LISTENER_LOCK
+        ):
+            return
+
+        await connection.add_listener(NOTIFY_CHANNEL, received)
+        listener_stats.listening = True
+        while not connection.is_closed():
+            try:
+                notification = await asyncio.wait_for(queue.get(), 1.0)
+            except asyncio.TimeoutError:
+                continue
+            notifications = [notification]
+            while not queue.empty():
+                notifications.append(queue.get_nowait())
+            try:
+                await apply(cache, notifications)
+            except RedisError as error:
+                logger.warning('could not apply notifications: %s', error)
+    finally:
+        listener_stats.listening = False
+        await connection.close()
+
+
+async def listen_notifications(cache: VersionedCache) -> None:
+    """Keep one worker listening to the changes announced by the database.
+
+    Notifications sent while nobody listens are lost, as are those whose
+    bump failed; the TTLs of the keys bound how long they serve stale.
+    """
+    while True:
+        try:
+            await listen(cache)
+        except (
+                OSError,
+                asyncpg.PostgresError,
+                asyncpg.InterfaceError
+        ) as error:
+            logger.warning('cache notification listener failed: %s', error)
+        await asyncio.sleep(settings.cache_notify_retry_interval)
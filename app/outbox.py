@@ -0,0 +1,113 @@
+import asyncio
+import logging
+from uuid import UUID
+
+from redis.exceptions import RedisError  # type: ignore
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import models
+from app.cache import VersionedCache
+from app.config import settings
+from app.database import SessionLocal
+from app.repositories import OutboxRepository
+
+logger = logging.getLogger(__name__)
+
+# Events committed in this worker that are still in the outbox, and
+# whether the request already applied them, so the dispatcher only has
+# to delete them.
+pending: dict[UUID, bool] = {}
+
+wakeup = asyncio.Event()
+
+# One dispatch at a time per worker, so once it returns everything this
+# worker committed before has been applied.
+dispatching = asyncio.Lock()
+
+
+def enqueue(event: models.CacheOutbox, applied: bool) -> None:
+    pending[event.id] = applied  # type: ignore
+    wakeup.set()
+
+
+async def apply_after_commit(
+        cache: VersionedCache,
+        event: models.CacheOutbox
+) -> dict[str, int] | None:
+    """Apply a committed invalidation, or leave it to the dispatcher.
+
+    With CACHE_OUTBOX_INLINE the request bumps the versions itself right
+    after its commit and gets them back for writing fresh values through.
+    Otherwise, or when Redis fails, the dispatcher applies the event and
+    None is returned. Either way the event stays in the outbox until it
+    is applied, so a write is never left with stale cache behind it.
+    """
+    if not settings.cache_outbox_inline:
+        enqueue(event, applied=False)
+        return None
+
+    try:
+        versions = await cache.bump(*event.namespaces, tags=event.tags)
+    except RedisError as error:
+        logger.warning('cache invalidation left to the outbox: %s', error)
+        enqueue(event, applied=False)
+        return None
+
+    enqueue(event, applied=True)
+    return versions
+
+
+async def dispatch(cache: VersionedCache) -> int:
+    """Apply and delete one batch of outbox events.
+
+    Events of this worker are taken right away, those of others only
+    after the grace period, which is what saves the invalidations of a
+    worker that died between its commit and its bump. All events of a
+    batch are applied in a single bump.
+    """
+    async with dispatching:
+        return await dispatch_batch(cache)
+
+
+async def dispatch_batch(cache: VersionedCache) -> int:
+    own = dict(pending)
+
+    async with SessionLocal() as session:
+        repository = OutboxRepository(session)
+        events = await repository.claim(
+            own, settings.cache_outbox_grace, settings.cache_outbox_batch
+        )
+        namespaces: set[str] = set()
+        tags: set[str] = set()
+        for event in events:
+            if not own.get(event.id):  # type: ignore
+                namespaces.update(event.namespaces)
+                tags.update(event.tags)
+        if namespaces or tags:
+            await cache.bump(*namespaces, tags=tags)
+        await repository.delete(events)
+
+    for id in own:
+        pending.pop(id, None)
+
+    return len(events)
+
+
+async def try_dispatch(cache: VersionedCache) -> None:
+    try:
+        await dispatch(cache)
+    except (RedisError, SQLAlchemyError) as error:
+        # The events stay in the outbox for the next attempt.
+        logger.warning('could not dispatch cache invalidations: %s', error)
+
+
+async def run_dispatcher(cache: VersionedCache) -> None:
+    while True:
+        try:
+            await asyncio.wait_for(
+                wakeup.wait(), settings.cache_outbox_poll_interval
+            )
+        except asyncio.TimeoutError:
+            pass
+        wakeup.clear()
+        await try_dispatch(cache)
@@ -0,0 +1,108 @@
+import base64
+import binascii
+from collections.abc import Callable
+from decimal import Decimal
+from typing import Annotated, NamedTuple, TypeVar
+from uuid import UUID
+
+from fastapi import HTTPException, Query
+
+from . import schemas
+from .compression import Body
+from .config import settings
+
+ItemT = TypeVar('ItemT', schemas.MenuWithCounts,
+                schemas.SubmenuWithCounts, schemas.Dish, schemas.SearchHit)
+
+
+def encode_cursor(id: UUID, value: str | None = None) -> str:
+    data = id.bytes + (value.encode() if value is not None else b'')
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+def decode_cursor(cursor: str) -> tuple[UUID, str | None]:
+    """Return the id of a cursor and the number it carries when a list is
+    ordered by something else first, e.g. price."""
+    try:
+        data = base64.urlsafe_b64decode(cursor + '==')
+        value = data[16:].decode() or None
+        if value is not None:
+            Decimal(value)
+        return UUID(bytes=data[:16]), value
+    except (binascii.Error, ValueError, ArithmeticError):
+        raise HTTPException(status_code=400, detail='invalid cursor')
+
+
+class PageBody(NamedTuple):
+    """The JSON array of a page with the cursor of the next one."""
+
+    body: Body
+    next_cursor: str | None = None
+
+
+class PageParams:
+    """Keyset pagination parameters of list endpoints.
+
+    Paging is opt-in: without a limit the whole list is returned, as it
+    was before lists had pages. The cursor is the opaque id of the last
+    row of the previous page, along with its price in lists ordered by
+    price, or its rank in search results; rows are ordered by these so
+    every page starts right after the previous one.
+    """
+
+    def __init__(
+            self,
+            limit: Annotated[
+                int | None, Query(ge=1, le=settings.page_size_max)
+            ] = None,
+            cursor: str | None = None
+    ) -> None:
+        self.limit = limit
+        self.after, self.after_value = (
+            decode_cursor(cursor) if cursor else (None, None)
+        )
+
+    @property
+    def key(self) -> str:
+        """Normalized identity of the page, used as its cache field."""
+        key = f'{self.limit or "all"}:{self.after or ""}'
+        return key if self.after_value is None else f'{key}:{self.after_value}'
+
+    @property
+    def fetch_limit(self) -> int | None:
+        """Rows to read, one more than the page tells if there is a next
+        one."""
+        return None if self.limit is None else self.limit + 1
+
+
+class BoundedPageParams(PageParams):
+    """Pagination of lists too large to return whole, which are cut at
+    PAGE_SIZE unless a limit is given."""
+
+    def __init__(
+            self,
+            limit: Annotated[
+                int, Query(ge=1, le=settings.page_size_max)
+            ] = settings.page_size,
+            cursor: str | None = None
+    ) -> None:
+        super().__init__(limit, cursor)
+
+
+def build_page(
+        items: list[ItemT],
+        limit: int | None,
+        cursor: Callable[[ItemT], str] = lambda item: encode_cursor(item.id)
+) -> schemas.Page[ItemT]:
+    """Make a page out of up to `limit + 1` rows.
+
+    The extra row only tells that there is a next page.
+    """
+    if limit is not None and len(items) > limit:
+        items = items[:limit]
+        return schemas.Page(
+            items=items,
+            next_cursor=cursor(items[-1])
+        )
+
+    return schemas.Page(items=items)
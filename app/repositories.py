@@ -1,279 +1,781 @@
+import uuid
+from collections.abc import Iterable
+from datetime import timedelta
 from uuid import UUID
 
 from fastapi import Depends, HTTPException
-from sqlalchemy import func
-from sqlalchemy.orm import Session
+from sqlalchemy import (
+    REAL,
+    ColumnElement,
+    Select,
+    Subquery,
+    and_,
+    delete,
+    func,
+    insert,
+    literal,
+    literal_column,
+    null,
+    or_,
+    select,
+    true,
+    tuple_,
+    union_all,
+    update,
+)
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from app.custom_exceptions import EntityDoesNotExist
 from app.dependencies import get_db
+from app.filters import DishFilter
 
 from . import models, schemas
 
 
 class MenuRepository:
-    def __init__(self, session: Session = Depends(get_db)) -> None:
+    def __init__(self, session: AsyncSession = Depends(get_db)) -> None:
         self.session = session
 
-    def get_all(self) -> list[models.Menu]:
-        db_results = (
-            self.session.query(
-                models.Menu,
-                func.count(func.distinct(models.Submenu.id)
-                           ).label('submenus_count'),
-                func.count(func.distinct(models.Dish.id)).label('dishes_count')
-            )
-            .outerjoin(
-                models.Submenu,
-                models.Submenu.menu_id == models.Menu.id
-            )
-            .outerjoin(
-                models.Dish,
-                models.Submenu.id == models.Dish.submenu_id
-            )
-            .group_by(models.Menu.id)
-            .all()
-        )
+    async def get_all(
+            self,
+            limit: int | None,
+            after: UUID | None = None
+    ) -> list[models.Menu]:
+        query = select(models.Menu).order_by(models.Menu.id).limit(limit)
+        if after:
+            query = query.filter(models.Menu.id > after)
+        db_menus = await self.session.scalars(query)
 
-        db_menus = []
+        return list(db_menus.all())
 
-        for res in db_results:
-            db_menu, submenus_count, dishes_count = res
-            db_menu.submenus_count = submenus_count
-            db_menu.dishes_count = dishes_count
-            db_menus.append(db_menu)
+    async def get(self, id: UUID) -> models.Menu:
+        db_menu = await self.__get_by_id(id)
 
-        return db_menus
+        if not db_menu:
+            raise EntityDoesNotExist
 
-    def get(self, id: UUID) -> models.Menu:
-        db_result = (
-            self.session.query(
-                models.Menu,
-                func.count(func.distinct(models.Submenu.id)
-                           ).label('submenus_count'),
-                func.count(func.distinct(models.Dish.id)).label('dishes_count')
-            )
-            .outerjoin(
-                models.Submenu,
-                models.Submenu.menu_id == models.Menu.id
-            )
-            .outerjoin(
-                models.Dish,
-                models.Submenu.id == models.Dish.submenu_id
-            )
+        return db_menu
+
+    async def reload(self, id: UUID) -> models.Menu | None:
+        """Read a row again with whatever was committed since this
+        session last read it."""
+        return await self.session.scalar(
+            select(models.Menu)
             .filter(models.Menu.id == id)
-            .group_by(models.Menu.id)
-            .first()
+            .execution_options(populate_existing=True)
         )
 
-        if db_result:
-            db_menu, submenus_count, dishes_count = db_result
-            db_menu.submenus_count = submenus_count
-            db_menu.dishes_count = dishes_count
-
-            return db_menu
-        else:
-            raise EntityDoesNotExist
-
-    def save(self, menu: schemas.MenuCreate) -> models.Menu:
+    async def save(self, menu: schemas.MenuCreate) -> models.Menu:
         db_menu = models.Menu(**menu.model_dump())
         self.session.add(db_menu)
-        self.session.commit()
-        self.session.refresh(db_menu)
+        await self.session.commit()
+        await self.session.refresh(db_menu)
         return db_menu
 
-    def delete(self, id: UUID) -> models.Menu:
-        db_menu = self.__get_by_id(id)
+    async def save_bulk(
+            self,
+            menus: list[schemas.MenuBulkCreate]
+    ) -> list[schemas.MenuTree]:
+        """Insert menus with their submenus and dishes in one transaction.
+
+        Ids and counters are computed up front, so every table is filled
+        with a single multi-row INSERT instead of one statement per row.
+        """
+        menu_rows, submenu_rows, dish_rows = [], [], []
+        trees = []
+
+        for menu in menus:
+            menu_id = uuid.uuid4()
+            submenu_trees = []
+
+            for submenu in menu.submenus:
+                submenu_id = uuid.uuid4()
+                dishes = [
+                    {'id': uuid.uuid4(), 'submenu_id': submenu_id,
+                     **dish.model_dump()}
+                    for dish in submenu.dishes
+                ]
+                dish_rows.extend(dishes)
+                submenu_row = {
+                    'id': submenu_id,
+                    'menu_id': menu_id,
+                    'dishes_count': len(dishes),
+                    **submenu.model_dump(exclude={'dishes'}),
+                }
+                submenu_rows.append(submenu_row)
+                submenu_trees.append(
+                    schemas.SubmenuTree(**submenu_row, dishes=dishes)
+                )
+
+            menu_row = {
+                'id': menu_id,
+                'submenus_count': len(submenu_trees),
+                'dishes_count': sum(
+                    len(submenu.dishes) for submenu in submenu_trees
+                ),
+                **menu.model_dump(exclude={'submenus'}),
+            }
+            menu_rows.append(menu_row)
+            trees.append(schemas.MenuTree(**menu_row, submenus=submenu_trees))
+
+        try:
+            for model, rows in (
+                (models.Menu, menu_rows),
+                (models.Submenu, submenu_rows),
+                (models.Dish, dish_rows),
+            ):
+                if rows:
+                    await self.session.execute(insert(model), rows)
+            await self.session.commit()
+        except IntegrityError:
+            await self.session.rollback()
+            raise HTTPException(status_code=409, detail='title already exists')
+
+        return trees
+
+    async def delete(self, id: UUID) -> models.Menu:
+        db_menu = await self.__get_by_id(id)
         if not db_menu:
             raise EntityDoesNotExist
-        self.session.delete(db_menu)
-        self.session.commit()
+        await self.session.delete(db_menu)
+        await self.session.commit()
         return db_menu
 
-    def update(
+    async def get_submenu_ids(self, id: UUID) -> list[UUID]:
+        db_ids = await self.session.scalars(
+            select(models.Submenu.id).filter(models.Submenu.menu_id == id)
+        )
+
+        return list(db_ids.all())
+
+    async def update(
             self,
             id: UUID,
             element: schemas.MenuUpdate
     ) -> models.Menu:
-        db_menu = self.__get_by_id(id)
+        db_menu = await self.__get_by_id(id)
         if not db_menu:
             raise EntityDoesNotExist
         menu_data = element.model_dump(exclude_unset=True)
         for key, value in menu_data.items():
             setattr(db_menu, key, value)
         self.session.add(db_menu)
-        self.session.commit()
-        self.session.refresh(db_menu)
+        await self.session.commit()
+        await self.session.refresh(db_menu)
         return db_menu
 
-    def __get_by_id(self, id: UUID) -> models.Menu | None:
-        return self.session.query(models.Menu).filter(
-            models.Menu.id == id).first()
+    async def __get_by_id(self, id: UUID) -> models.Menu | None:
+        return await self.session.scalar(
+            select(models.Menu).filter(models.Menu.id == id)
+        )
 
 
 class SubmenuRepository:
-    def __init__(self, session: Session = Depends(get_db)) -> None:
+    def __init__(self, session: AsyncSession = Depends(get_db)) -> None:
         self.session = session
 
-    def get_all(self, menu_id: UUID) -> list[models.Submenu]:
-        db_results = (
-            self.session.query(
-                models.Submenu,
-                func.count(models.Dish.id).label('dish_count')
-            )
-            .outerjoin(models.Dish, models.Submenu.dishes)
-            .outerjoin(models.Menu, models.Submenu.menu)
-            .group_by(models.Submenu.id)
-            .filter(models.Menu.id == menu_id)
-            .all()
+    async def get_all(
+            self,
+            menu_id: UUID,
+            limit: int | None,
+            after: UUID | None = None
+    ) -> list[models.Submenu]:
+        query = (
+            select(models.Submenu)
+            .filter(models.Submenu.menu_id == menu_id)
+            .order_by(models.Submenu.id)
+            .limit(limit)
         )
+        if after:
+            query = query.filter(models.Submenu.id > after)
+        db_submenus = await self.session.scalars(query)
 
-        db_submenus = []
+        return list(db_submenus.all())
 
-        for res in db_results:
-            db_submenu, dishes_count = res
-            db_submenu.dishes_count = dishes_count
-            db_submenus.append(db_submenu)
+    async def get(self, submenu_id: UUID) -> models.Submenu:
+        db_submenu = await self.__get_by_id(submenu_id)
 
-        return db_submenus
+        if not db_submenu:
+            raise EntityDoesNotExist
 
-    def get(self, submenu_id: UUID) -> models.Submenu:
-        db_result = (
-            self.session.query(
-                models.Submenu,
-                func.count(models.Dish.id).label('dish_count')
-            )
-            .outerjoin(models.Dish, models.Submenu.dishes)
-            .group_by(models.Submenu.id)
-            .filter(models.Submenu.id == submenu_id)
-            .first()
-        )
+        return db_submenu
 
-        if db_result:
-            db_submenu, dishes_count = db_result
-            db_submenu.dishes_count = dishes_count
-            return db_submenu
-        else:
-            raise EntityDoesNotExist
+    async def reload(self, id: UUID) -> models.Submenu | None:
+        """Read a row again with whatever was committed since this
+        session last read it."""
+        return await self.session.scalar(
+            select(models.Submenu)
+            .filter(models.Submenu.id == id)
+            .execution_options(populate_existing=True)
+        )
 
-    def save(
+    async def save(
             self,
             menu_id: UUID,
             submenu: schemas.SubmenuCreate
     ) -> models.Submenu:
-        db_menu = (
-            self.session.query(models.Menu)
-            .filter(models.Menu.id == menu_id)
-            .first()
-        )
+        db_menu = await self.session.get(models.Menu, menu_id)
         if not db_menu:
             raise HTTPException(status_code=404, detail='menu not found')
-        db_submenu = models.Submenu(**submenu.model_dump())
-        db_menu.submenus.append(db_submenu)
-        self.session.commit()
+        db_submenu = models.Submenu(**submenu.model_dump(), menu_id=menu_id)
+        self.session.add(db_submenu)
+        await self.session.execute(
+            update(models.Menu)
+            .filter(models.Menu.id == menu_id)
+            .values(submenus_count=models.Menu.submenus_count + 1)
+        )
+        await self.session.commit()
+        await self.session.refresh(db_submenu)
         return db_submenu
 
-    def delete(
+    async def delete(
             self,
             id: UUID
     ) -> models.Submenu:
-        db_submenu = self.__get_by_id(id)
+        db_submenu = await self.__get_by_id(id, for_update=True)
         if not db_submenu:
             raise EntityDoesNotExist
-        self.session.delete(db_submenu)
-        self.session.commit()
+        await self.session.delete(db_submenu)
+        await self.session.execute(
+            update(models.Menu)
+            .filter(models.Menu.id == db_submenu.menu_id)
+            .values(
+                submenus_count=models.Menu.submenus_count - 1,
+                dishes_count=(
+                    models.Menu.dishes_count - db_submenu.dishes_count
+                )
+            )
+        )
+        await self.session.commit()
         return db_submenu
 
-    def update(
+    async def update(
             self,
             id: UUID,
             submenu: schemas.SubmenuUpdate
     ) -> models.Submenu:
-        db_submenu = self.__get_by_id(id)
+        db_submenu = await self.__get_by_id(id)
         if not db_submenu:
             raise EntityDoesNotExist
         submenu_data = submenu.model_dump(exclude_unset=True)
         for key, value in submenu_data.items():
             setattr(db_submenu, key, value)
         self.session.add(db_submenu)
-        self.session.commit()
-        self.session.refresh(db_submenu)
+        await self.session.commit()
+        await self.session.refresh(db_submenu)
         return db_submenu
 
-    def __get_by_id(self, id: UUID) -> models.Submenu | None:
-        return (
-            self.session.query(models.Submenu)
-            .filter(models.Submenu.id == id)
-            .first()
-        )
+    async def __get_by_id(
+            self,
+            id: UUID,
+            for_update: bool = False
+    ) -> models.Submenu | None:
+        query = select(models.Submenu).filter(models.Submenu.id == id)
+        if for_update:
+            query = query.with_for_update()
+        return await self.session.scalar(query)
 
 
 class DishRepository:
-    def __init__(self, session: Session = Depends(get_db)):
+    def __init__(self, session: AsyncSession = Depends(get_db)):
         self.session = session
 
-    def get_all(self, submenu_id: UUID) -> list[models.Dish]:
-        db_dishes = (
-            self.session.query(models.Dish)
-            .filter(models.Dish.submenu_id == submenu_id)
-            .all()
-        )
+    async def get_all(
+            self,
+            submenu_id: UUID | None,
+            limit: int | None,
+            after: UUID | None = None,
+            filters: DishFilter | None = None,
+            after_price: str | None = None
+    ) -> list[models.Dish]:
+        """List the dishes of a submenu, or of all menus without one.
+
+        Lists ordered by price page by (price, id) and leave out dishes
+        that have no price.
+        """
+        query = select(models.Dish).limit(limit)
+        if submenu_id is not None:
+            query = query.filter(models.Dish.submenu_id == submenu_id)
+        if filters is not None and filters.min_price is not None:
+            query = query.filter(models.Dish.price >= filters.min_price)
+        if filters is not None and filters.max_price is not None:
+            query = query.filter(models.Dish.price <= filters.max_price)
+
+        if filters is not None and filters.sort == 'price':
+            query = query.filter(models.Dish.price.is_not(None)).order_by(
+                models.Dish.price, models.Dish.id
+            )
+            if after:
+                if after_price is None:
+                    raise HTTPException(
+                        status_code=400, detail='invalid cursor'
+                    )
+                last = tuple_(
+                    literal(after_price, models.Dish.price.type),
+                    literal(after, models.Dish.id.type)
+                )
+                query = query.filter(
+                    tuple_(models.Dish.price, models.Dish.id) > last
+                )
+        else:
+            query = query.order_by(models.Dish.id)
+            if after:
+                query = query.filter(models.Dish.id > after)
+        db_dishes = await self.session.scalars(query)
 
-        return db_dishes
+        return list(db_dishes.all())
 
-    def get(self, id: UUID) -> models.Dish:
-        db_dish = self.__get_by_id(id)
+    async def get(self, id: UUID) -> models.Dish:
+        db_dish = await self.__get_by_id(id)
 
         if not db_dish:
             raise EntityDoesNotExist
 
         return db_dish
 
-    def save(
+    async def reload(self, id: UUID) -> models.Dish | None:
+        """Read a row again with whatever was committed since this
+        session last read it."""
+        return await self.session.scalar(
+            select(models.Dish)
+            .filter(models.Dish.id == id)
+            .execution_options(populate_existing=True)
+        )
+
+    async def save(
             self,
             submenu_id: UUID,
             dish: schemas.DishCreate
     ) -> models.Dish:
-        db_submenu = (
-            self.session.query(models.Submenu)
-            .filter(models.Submenu.id == submenu_id)
-            .first()
-        )
+        db_submenu = await self.session.get(models.Submenu, submenu_id)
         if not db_submenu:
             raise HTTPException(status_code=404, detail='submenu not found')
-        db_dish = models.Dish(**dish.model_dump())
-        db_submenu.dishes.append(db_dish)
+        db_dish = models.Dish(**dish.model_dump(), submenu_id=submenu_id)
         self.session.add(db_dish)
-        self.session.commit()
-        self.session.refresh(db_dish)
+        await self.__change_counts(submenu_id, 1)
+        await self.session.commit()
+        await self.session.refresh(db_dish)
         return db_dish
 
-    def delete(self, id: UUID) -> models.Dish:
-        db_dish = self.__get_by_id(id)
+    async def delete(self, id: UUID) -> models.Dish:
+        db_dish = await self.__get_by_id(id)
         if not db_dish:
             raise EntityDoesNotExist
-        self.session.delete(db_dish)
-        self.session.commit()
+        await self.session.delete(db_dish)
+        await self.__change_counts(db_dish.submenu_id, -1)
+        await self.session.commit()
         return db_dish
 
-    def update(
+    async def update(
             self,
             id: UUID,
             dish: schemas.DishUpdate
     ) -> models.Dish:
-        db_dish = self.__get_by_id(id)
+        db_dish = await self.__get_by_id(id)
         if not db_dish:
             raise EntityDoesNotExist
         dish_data = dish.model_dump(exclude_unset=True)
+        if dish_data.get('price') is not None:
+            dish_data['price'] = str(dish_data['price'])
         for key, value in dish_data.items():
             setattr(db_dish, key, value)
         self.session.add(db_dish)
-        self.session.commit()
-        self.session.refresh(db_dish)
+        await self.session.commit()
+        await self.session.refresh(db_dish)
         return db_dish
 
-    def __get_by_id(self, id: UUID) -> models.Dish | None:
+    async def __get_by_id(self, id: UUID) -> models.Dish | None:
+        return await self.session.scalar(
+            select(models.Dish).filter(models.Dish.id == id)
+        )
+
+    async def __change_counts(self, submenu_id: UUID, delta: int) -> None:
+        await self.session.execute(
+            update(models.Submenu)
+            .filter(models.Submenu.id == submenu_id)
+            .values(dishes_count=models.Submenu.dishes_count + delta)
+        )
+        await self.session.execute(
+            update(models.Menu)
+            .filter(
+                models.Menu.id == select(models.Submenu.menu_id)
+                .filter(models.Submenu.id == submenu_id)
+                .scalar_subquery()
+            )
+            .values(dishes_count=models.Menu.dishes_count + delta)
+        )
+
+
+class MenuTreeRepository:
+    """Loads menus together with their submenus and dishes.
+
+    Children are fetched with one SELECT ... IN query per level,
+    so a tree of any size costs three queries.
+    """
+
+    def __init__(self, session: AsyncSession = Depends(get_db)) -> None:
+        self.session = session
+
+    async def get_all(self) -> list[models.Menu]:
+        db_menus = await self.session.scalars(self.__tree_query())
+
+        return list(db_menus.all())
+
+    async def get(self, menu_id: UUID) -> models.Menu:
+        db_menu = await self.session.scalar(
+            self.__tree_query().filter(models.Menu.id == menu_id)
+        )
+
+        if not db_menu:
+            raise EntityDoesNotExist
+
+        return db_menu
+
+    def __tree_query(self) -> Select:
+        return select(models.Menu).options(
+            selectinload(models.Menu.submenus)
+            .selectinload(models.Submenu.dishes)
+        )
+
+
+class SearchRepository:
+    """Finds dishes and submenus by their title and description.
+
+    Full-text matches are ranked by ts_rank. Where pg_trgm is installed,
+    titles similar to the query match as well, and the similarity adds
+    to the rank.
+    """
+
+    # Whether pg_trgm is installed, looked up once per process.
+    trigram: bool | None = None
+
+    def __init__(self, session: AsyncSession = Depends(get_db)) -> None:
+        self.session = session
+
+    async def search(
+            self,
+            query: str,
+            limit: int | None,
+            after: UUID | None = None,
+            after_rank: str | None = None
+    ) -> list[schemas.SearchHit]:
+        if SearchRepository.trigram is None:
+            SearchRepository.trigram = bool(
+                await self.session.scalar(models.TRIGRAM_INSTALLED)
+            )
+        rows = await self.session.execute(
+            self.statement(query, limit, after, after_rank)
+        )
+
+        return [
+            schemas.SearchHit(
+                type=row.type, id=row.id, title=row.title,
+                description=row.description, price=row.price, rank=row.rank,
+                menu=schemas.SearchPath(id=row.menu_id, title=row.menu_title),
+                submenu=None if row.submenu_id is None else schemas.SearchPath(
+                    id=row.submenu_id, title=row.submenu_title
+                )
+            )
+            for row in rows
+        ]
+
+    def statement(
+            self,
+            query: str,
+            limit: int | None,
+            after: UUID | None = None,
+            after_rank: str | None = None
+    ) -> Select:
+        """Return the query of a page of hits, best ranked first.
+
+        The path of a hit is only looked up for the hits on the page.
+        """
+        hits = union_all(
+            self.__hits('dish', models.Dish, models.Dish.price,
+                        models.Dish.submenu_id, query),
+            self.__hits('submenu', models.Submenu, null(),
+                        models.Submenu.menu_id, query)
+        ).subquery()
+        page = (
+            select(hits)
+            .order_by(hits.c.rank.desc(), hits.c.id)
+            .limit(limit)
+        )
+        if after:
+            if after_rank is None:
+                raise HTTPException(status_code=400, detail='invalid cursor')
+            rank = literal(float(after_rank), REAL)
+            page = page.filter(or_(
+                hits.c.rank < rank,
+                and_(hits.c.rank == rank, hits.c.id > after)
+            ))
+        page = page.subquery()
+
+        # The parent of a dish is its submenu, that of a submenu its menu.
+        # LIMIT keeps the lookups from being merged into joins, which
+        # could read the whole table for a page of hits.
+        submenu = (
+            select(models.Submenu.id, models.Submenu.title,
+                   models.Submenu.menu_id)
+            .filter(page.c.type == 'dish',
+                    models.Submenu.id == page.c.parent_id)
+            .limit(1)
+            .lateral()
+        )
+        menu = (
+            select(models.Menu.id, models.Menu.title)
+            .filter(models.Menu.id == func.coalesce(
+                submenu.c.menu_id, page.c.parent_id
+            ))
+            .limit(1)
+            .lateral()
+        )
+
         return (
-            self.session.query(models.Dish)
-            .filter(models.Dish.id == id)
-            .first()
+            select(
+                page.c.type,
+                page.c.id,
+                page.c.title,
+                page.c.description,
+                page.c.price,
+                page.c.rank,
+                menu.c.id.label('menu_id'),
+                menu.c.title.label('menu_title'),
+                submenu.c.id.label('submenu_id'),
+                submenu.c.title.label('submenu_title'),
+            )
+            .select_from(page)
+            .outerjoin(submenu, true())
+            .join(menu, true())
+            .order_by(page.c.rank.desc(), page.c.id)
+        )
+
+    def __hits(
+            self,
+            type: str,
+            model: type[models.Dish] | type[models.Submenu],
+            price: ColumnElement,
+            parent_id: ColumnElement,
+            query: str
+    ) -> Select:
+        rank, match = self.__match(model, query)
+        return select(
+            literal(type).label('type'),
+            model.id,
+            model.title,
+            model.description,
+            price.label('price'),
+            rank.label('rank'),
+            parent_id.label('parent_id'),
+        ).filter(match)
+
+    def __match(
+            self,
+            model: type[models.Dish] | type[models.Submenu],
+            query: str
+    ) -> tuple[ColumnElement, ColumnElement]:
+        """Return the rank of a row for the query and whether it matches.
+
+        Both are served by the GIN indexes of the table.
+        """
+        config = literal_column(f"'{models.SEARCH_CONFIG}'", REGCONFIG)
+        tsquery = func.websearch_to_tsquery(config, query)
+        rank = func.ts_rank(model.search_vector, tsquery, type_=REAL)
+        match = model.search_vector.op('@@')(tsquery)
+
+        if self.trigram:
+            rank = rank + func.word_similarity(query, model.title, type_=REAL)
+            match = or_(match, literal(query).op('<%')(model.title))
+
+        return rank, match
+
+
+class CountersRepository:
+    """Checks and repairs the maintained submenu and dish counters."""
+
+    def __init__(self, session: AsyncSession = Depends(get_db)) -> None:
+        self.session = session
+
+    async def find_mismatches(self) -> list[schemas.CounterMismatch]:
+        submenus = self.__actual_submenu_counts()
+        menus = self.__actual_menu_counts()
+
+        db_submenus = await self.session.execute(
+            select(
+                models.Submenu.id,
+                models.Submenu.dishes_count,
+                submenus.c.dishes_count
+            )
+            .join(submenus, submenus.c.id == models.Submenu.id)
+            .filter(models.Submenu.dishes_count != submenus.c.dishes_count)
+        )
+        db_menus = await self.session.execute(
+            select(
+                models.Menu.id,
+                models.Menu.submenus_count,
+                models.Menu.dishes_count,
+                menus.c.submenus_count,
+                menus.c.dishes_count
+            )
+            .join(menus, menus.c.id == models.Menu.id)
+            .filter(
+                or_(
+                    models.Menu.submenus_count != menus.c.submenus_count,
+                    models.Menu.dishes_count != menus.c.dishes_count
+                )
+            )
+        )
+
+        mismatches = [
+            schemas.CounterMismatch(
+                table='submenus',
+                id=id,
+                stored={'dishes_count': stored},
+                actual={'dishes_count': actual}
+            )
+            for id, stored, actual in db_submenus.all()
+        ]
+        mismatches.extend(
+            schemas.CounterMismatch(
+                table='menus',
+                id=id,
+                stored={
+                    'submenus_count': stored_submenus,
+                    'dishes_count': stored_dishes
+                },
+                actual={
+                    'submenus_count': actual_submenus,
+                    'dishes_count': actual_dishes
+                }
+            )
+            for (id, stored_submenus, stored_dishes,
+                 actual_submenus, actual_dishes) in db_menus.all()
         )
+
+        return mismatches
+
+    async def repair(self) -> None:
+        submenus = self.__actual_submenu_counts()
+        await self.session.execute(
+            update(models.Submenu)
+            .filter(
+                models.Submenu.id == submenus.c.id,
+                models.Submenu.dishes_count != submenus.c.dishes_count
+            )
+            .values(dishes_count=submenus.c.dishes_count)
+            .execution_options(synchronize_session=False)
+        )
+
+        menus = self.__actual_menu_counts()
+        await self.session.execute(
+            update(models.Menu)
+            .filter(
+                models.Menu.id == menus.c.id,
+                or_(
+                    models.Menu.submenus_count != menus.c.submenus_count,
+                    models.Menu.dishes_count != menus.c.dishes_count
+                )
+            )
+            .values(
+                submenus_count=menus.c.submenus_count,
+                dishes_count=menus.c.dishes_count
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await self.session.commit()
+
+    def __actual_submenu_counts(self) -> Subquery:
+        return (
+            select(
+                models.Submenu.id,
+                func.count(models.Dish.id).label('dishes_count')
+            )
+            .outerjoin(models.Dish, models.Submenu.dishes)
+            .group_by(models.Submenu.id)
+            .subquery()
+        )
+
+    def __actual_menu_counts(self) -> Subquery:
+        return (
+            select(
+                models.Menu.id,
+                func.count(func.distinct(models.Submenu.id)
+                           ).label('submenus_count'),
+                func.count(models.Dish.id).label('dishes_count')
+            )
+            .outerjoin(models.Submenu, models.Menu.submenus)
+            .outerjoin(models.Dish, models.Submenu.dishes)
+            .group_by(models.Menu.id)
+            .subquery()
+        )
+
+
+class OutboxRepository:
+    """Keeps cache invalidations in the transaction of their write."""
+
+    def __init__(self, session: AsyncSession = Depends(get_db)) -> None:
+        self.session = session
+
+    def add(
+            self,
+            namespaces: Iterable[str],
+            tags: Iterable[str] = ()
+    ) -> models.CacheOutbox:
+        """Add an invalidation to the session without flushing it.
+
+        It is committed by the repository call that makes the write.
+        """
+        event = models.CacheOutbox(
+            id=uuid.uuid4(),
+            namespaces=list(namespaces),
+            tags=list(tags)
+        )
+        self.session.add(event)
+        return event
+
+    async def claim(
+            self,
+            ids: Iterable[UUID],
+            older_than: float,
+            limit: int
+    ) -> list[models.CacheOutbox]:
+        """Lock the events with the given ids, along with up to `limit`
+        events left over by others for longer than `older_than` seconds.
+
+        Rows locked by another dispatcher are skipped.
+        """
+        ids = list(ids)
+        cutoff = func.now() - timedelta(seconds=older_than)
+        left_over = (
+            select(models.CacheOutbox)
+            .filter(models.CacheOutbox.created_at < cutoff)
+            .order_by(models.CacheOutbox.created_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        events = {
+            event.id: event for event in await self.session.scalars(left_over)
+        }
+
+        if ids:
+            own = (
+                select(models.CacheOutbox)
+                .filter(models.CacheOutbox.id.in_(ids))
+                .with_for_update(skip_locked=True)
+            )
+            for event in await self.session.scalars(own):
+                events[event.id] = event
+
+        return list(events.values())
+
+    async def delete(self, events: Iterable[models.CacheOutbox]) -> None:
+        ids = [event.id for event in events]
+        if ids:
+            await self.session.execute(
+                delete(models.CacheOutbox)
+                .filter(models.CacheOutbox.id.in_(ids))
+            )
+        await self.session.commit()
@@ -0,0 +1,77 @@
+from fastapi import Response
+
+from app.cache import served_version
+from app.compression import ENCODINGS, Body
+from app.pagination import PageBody
+
+
+class RawJSONResponse(Response):
+    """Response for bodies that are already serialized to JSON."""
+
+    media_type = 'application/json'
+
+
+def make_etag(version: int, encoding: str | None = None) -> str:
+    # Each content coding of a body is a representation of its own.
+    if encoding is None:
+        return f'"{version}"'
+
+    return f'"{version}-{encoding}"'
+
+
+def not_modified(
+        if_none_match: str | None,
+        version: int | None
+) -> Response | None:
+    """Return a 304 response if the client already has this version.
+
+    A resource's ETag is the version of the cache namespace it is read
+    from, so the check needs neither the database nor the body.
+    """
+    if not if_none_match or version is None:
+        return None
+
+    tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+    if '*' in tags:
+        return Response(status_code=304, headers={'ETag': make_etag(version)})
+
+    # Any coding of the current version is as fresh as the others.
+    for encoding in (None, *ENCODINGS):
+        etag = make_etag(version, encoding)
+        if etag in tags:
+            return Response(status_code=304, headers={'ETag': etag})
+
+    return None
+
+
+def versioned_json(body: bytes | Body) -> RawJSONResponse:
+    """Send a body read from the cache with the ETag of its version.
+
+    Bodies chosen by content negotiation come as `Body` and are sent in
+    their coding, varying on Accept-Encoding.
+    """
+    headers = {}
+
+    if isinstance(body, Body):
+        content, encoding = body
+        headers['Vary'] = 'Accept-Encoding'
+        if encoding is not None:
+            headers['Content-Encoding'] = encoding
+    else:
+        content, encoding = body, None
+
+    version = served_version.get()
+    if version is not None:
+        headers['ETag'] = make_etag(version, encoding)
+
+    return RawJSONResponse(content, headers=headers)
+
+
+def paged_json(page: PageBody) -> RawJSONResponse:
+    """Send a page of a list, with the cursor of the next page in the
+    X-Next-Cursor header when there is one."""
+    response = versioned_json(page.body)
+    if page.next_cursor is not None:
+        response.headers['X-Next-Cursor'] = page.next_cursor
+
+    return response
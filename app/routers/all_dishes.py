@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, Header, Response
+
+from app import schemas, services
+from app.filters import DishFilter
+from app.pagination import BoundedPageParams
+from app.responses import not_modified, paged_json
+
+router = APIRouter(
+    prefix='/dishes',
+    tags=['dishes']
+)
+
+
+@router.get(
+    '/',
+    response_model=list[schemas.Dish],
+    tags=['get']
+)
+async def read_all_dishes(
+        page: BoundedPageParams = Depends(),
+        filters: DishFilter = Depends(),
+        if_none_match: str | None = Header(None),
+        accept_encoding: str | None = Header(None),
+        service: services.DishService = Depends(services.DishService)
+) -> Response:
+    """Получить список блюд всех меню"""
+    response = not_modified(
+        if_none_match, await service.get_all_in_menus_version()
+    )
+    if response is not None:
+        return response
+
+    return paged_json(
+        await service.get_all_in_menus_json(page, filters, accept_encoding)
+    )
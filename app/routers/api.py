@@ -1,9 +1,15 @@
 from fastapi import APIRouter
 
-from app.routers import dishes, menus, submenus
+from app.routers import all_dishes, dishes, menus, metrics, search, submenus, tree
 
 router = APIRouter()
 
+# The tree router goes first so that /menus/tree is not taken
+# for /menus/{menu_id}.
+router.include_router(tree.router)
 router.include_router(menus.router)
 router.include_router(submenus.router)
 router.include_router(dishes.router)
+router.include_router(all_dishes.router)
+router.include_router(search.router)
+router.include_router(metrics.router)
@@ -1,9 +1,13 @@
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 
 from app import models, schemas, services
 from app.custom_exceptions import EntityDoesNotExist
+from app.filters import DishFilter
+from app.pagination import PageParams
+from app.responses import not_modified, paged_json, versioned_json
+from app.warmer import record_access
 
 router: APIRouter = APIRouter(
     prefix='/menus/{menu_id}/submenus/{submenu_id}/dishes',
@@ -14,14 +18,30 @@ router: APIRouter = APIRouter(
 @router.get(
     '/',
     response_model=list[schemas.Dish],
-    tags=['get']
+    tags=['get'],
+    dependencies=[Depends(record_access)]
 )
-def read_dishes(
+async def read_dishes(
+        menu_id: UUID,
         submenu_id: UUID,
+        page: PageParams = Depends(),
+        filters: DishFilter = Depends(),
+        if_none_match: str | None = Header(None),
+        accept_encoding: str | None = Header(None),
         service: services.DishService = Depends(services.DishService)
-) -> list[models.Dish]:
+) -> Response:
     """Получить список блюд для указанного подменю"""
-    return service.get_all(submenu_id)
+    response = not_modified(
+        if_none_match, await service.get_version(submenu_id)
+    )
+    if response is not None:
+        return response
+
+    return paged_json(
+        await service.get_all_json(
+            menu_id, submenu_id, page, filters, accept_encoding
+        )
+    )
 
 
 @router.post(
@@ -33,14 +53,14 @@ def read_dishes(
         404: {'description': 'Submenu not found'}
     }
 )
-def create_dish(
+async def create_dish(
         menu_id: UUID,
         submenu_id: UUID,
         dish: schemas.DishCreate,
         service: services.DishService = Depends(services.DishService)
 ) -> models.Dish:
     """Создать новое блюдо для указанного подменю"""
-    return service.create(menu_id, submenu_id, dish)
+    return await service.create(menu_id, submenu_id, dish)
 
 
 @router.get(
@@ -51,19 +71,26 @@ def create_dish(
         404: {'description': 'Dish not found'}
     }
 )
-def read_dish(
+async def read_dish(
         menu_id: UUID,
         submenu_id: UUID,
         dish_id: UUID,
+        if_none_match: str | None = Header(None),
         service: services.DishService = Depends(services.DishService)
-) -> models.Dish:
+) -> Response:
     """Получить информацию о конкретном блюде для указанного подменю"""
+    response = not_modified(
+        if_none_match, await service.get_version(submenu_id)
+    )
+    if response is not None:
+        return response
+
     try:
-        db_dish = service.get(menu_id, submenu_id, dish_id)
+        body = await service.get_json(menu_id, submenu_id, dish_id)
     except EntityDoesNotExist:
         raise HTTPException(status_code=404, detail='dish not found')
 
-    return db_dish
+    return versioned_json(body)
 
 
 @router.delete(
@@ -75,7 +102,7 @@ def read_dish(
     }
 
 )
-def delete_dish(
+async def delete_dish(
         menu_id: UUID,
         submenu_id: UUID,
         dish_id: UUID,
@@ -83,7 +110,7 @@ def delete_dish(
 ) -> models.Dish:
     """Удалить блюдо для указанного подменю"""
     try:
-        db_dish = service.delete(menu_id, submenu_id, dish_id)
+        db_dish = await service.delete(menu_id, submenu_id, dish_id)
     except EntityDoesNotExist:
         raise HTTPException(status_code=404, detail='dish not found')
 
@@ -98,7 +125,7 @@ def delete_dish(
         404: {'description': 'Dish not found'}
     }
 )
-def update_dish(
+async def update_dish(
         menu_id: UUID,
         submenu_id: UUID,
         dish_id: UUID,
@@ -107,7 +134,7 @@ def update_dish(
 ) -> models.Dish:
     """Обновить информацию о блюде для указанного подменю"""
     try:
-        db_dish = service.update(
+        db_dish = await service.update(
             menu_id, submenu_id, dish_id, dish)
     except EntityDoesNotExist:
         raise HTTPException(status_code=404, detail='dish not found')
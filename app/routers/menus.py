@@ -1,9 +1,12 @@
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 
 from app import models, schemas, services
 from app.custom_exceptions import EntityDoesNotExist
+from app.pagination import PageParams
+from app.responses import not_modified, paged_json, versioned_json
+from app.warmer import CacheWarmer, record_access
 
 router = APIRouter(
     prefix='/menus',
@@ -15,12 +18,20 @@ router = APIRouter(
     '/',
     response_model=list[schemas.MenuWithCounts],
     tags=['get'],
+    dependencies=[Depends(record_access)]
 )
-def read_menus(
+async def read_menus(
+        page: PageParams = Depends(),
+        if_none_match: str | None = Header(None),
+        accept_encoding: str | None = Header(None),
         service: services.MenuService = Depends(services.MenuService)
-) -> list[models.Menu]:
+) -> Response:
     """Получить список меню"""
-    return service.get_all()
+    response = not_modified(if_none_match, await service.get_all_version())
+    if response is not None:
+        return response
+
+    return paged_json(await service.get_all_json(page, accept_encoding))
 
 
 @router.post(
@@ -29,12 +40,32 @@ def read_menus(
     status_code=status.HTTP_201_CREATED,
     tags=['post']
 )
-def create_menu(
+async def create_menu(
     menu: schemas.MenuCreate,
     service: services.MenuService = Depends(services.MenuService)
 ) -> models.Menu:
     """Создать новое меню"""
-    return service.create(menu)
+    return await service.create(menu)
+
+
+@router.post(
+    '/bulk',
+    response_model=list[schemas.MenuTree],
+    status_code=status.HTTP_201_CREATED,
+    tags=['post'],
+    responses={
+        409: {'description': 'Title already exists'}
+    }
+)
+async def create_menus_bulk(
+    menus: list[schemas.MenuBulkCreate],
+    service: services.MenuService = Depends(services.MenuService),
+    warmer: CacheWarmer = Depends(CacheWarmer)
+) -> list[schemas.MenuTree]:
+    """Создать несколько меню вместе с подменю и блюдами"""
+    trees = await service.create_bulk(menus)
+    warmer.schedule()
+    return trees
 
 
 @router.get(
@@ -43,19 +74,25 @@ def create_menu(
     tags=['get'],
     responses={
         404: {'description': 'Menu not found'}
-    }
+    },
+    dependencies=[Depends(record_access)]
 )
-def read_menu(
+async def read_menu(
     menu_id: UUID,
+    if_none_match: str | None = Header(None),
     service: services.MenuService = Depends(services.MenuService)
-) -> models.Menu:
+) -> Response:
     """Получить информацию о конкретном меню"""
+    response = not_modified(if_none_match, await service.get_version(menu_id))
+    if response is not None:
+        return response
+
     try:
-        db_menu = service.get(menu_id)
+        body = await service.get_json(menu_id)
     except EntityDoesNotExist:
         raise HTTPException(status_code=404, detail='menu not found')
 
-    return db_menu
+    return versioned_json(body)
 
 
 @router.delete(
@@ -66,16 +103,19 @@ def read_menu(
         404: {'description': 'Menu not found'}
     }
 )
-def delete_menu(
+async def delete_menu(
     menu_id: UUID,
-    service: services.MenuService = Depends(services.MenuService)
+    service: services.MenuService = Depends(services.MenuService),
+    warmer: CacheWarmer = Depends(CacheWarmer)
 ) -> models.Menu:
     """Удалить меню"""
     try:
-        db_menu = service.delete(menu_id)
+        db_menu = await service.delete(menu_id)
     except EntityDoesNotExist:
         raise HTTPException(status_code=404, detail='menu not found')
 
+    # The lists and everything under the menu were invalidated at once.
+    warmer.schedule()
     return db_menu
 
 
@@ -87,14 +127,14 @@ def delete_menu(
         404: {'description': 'Menu not found'}
     }
 )
-def update_menu(
+async def update_menu(
     menu_id: UUID,
     menu: schemas.MenuUpdate,
     service: services.MenuService = Depends(services.MenuService)
 ) -> models.Menu:
     """Обновить информацию о меню"""
     try:
-        db_menu = service.update(menu_id, menu)
+        db_menu = await service.update(menu_id, menu)
     except EntityDoesNotExist:
         raise HTTPException(status_code=404, detail='menu not found')
 
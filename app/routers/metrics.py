@@ -0,0 +1,69 @@
+from fastapi import APIRouter, Depends
+from redis.asyncio import Redis  # type: ignore
+
+from app import schemas
+from app.cache import get_cache_stats, get_memory_stats, invalidation_stats
+from app.database import get_pool_stats
+from app.dependencies import get_cache_conn
+from app.local_cache import LocalCache, get_local_cache
+from app.notifications import listener_stats
+
+router = APIRouter(
+    prefix='/metrics',
+    tags=['metrics']
+)
+
+
+@router.get(
+    '/db-pool',
+    response_model=schemas.DBPoolStats,
+    tags=['get']
+)
+async def read_db_pool_stats() -> dict[str, int | float]:
+    """Получить статистику пула соединений с базой данных"""
+    return get_pool_stats()
+
+
+@router.get(
+    '/cache',
+    response_model=schemas.CacheStats,
+    tags=['get']
+)
+async def read_cache_stats(
+    cache: Redis = Depends(get_cache_conn),
+    local: LocalCache | None = Depends(get_local_cache)
+) -> dict[str, dict[str, int | float] | None]:
+    """Получить число попаданий и размер каждого уровня кэша"""
+    return await get_cache_stats(cache, local)
+
+
+@router.get(
+    '/cache-memory',
+    response_model=schemas.CacheMemoryStats,
+    tags=['get']
+)
+async def read_cache_memory_stats(
+    cache: Redis = Depends(get_cache_conn)
+) -> dict[str, int | str]:
+    """Получить статистику памяти кэша"""
+    return await get_memory_stats(cache)
+
+
+@router.get(
+    '/cache-invalidation',
+    response_model=schemas.CacheInvalidationStats,
+    tags=['get']
+)
+async def read_cache_invalidation_stats() -> dict[str, int | float]:
+    """Получить число и длительность инвалидаций кэша"""
+    return invalidation_stats.as_dict()
+
+
+@router.get(
+    '/cache-notifications',
+    response_model=schemas.CacheNotificationStats,
+    tags=['get']
+)
+async def read_cache_notification_stats() -> dict[str, bool | int | float]:
+    """Получить число изменений из базы данных и задержку их применения"""
+    return listener_stats.as_dict()
@@ -0,0 +1,34 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Header, Query, Response
+
+from app import schemas, services
+from app.pagination import BoundedPageParams
+from app.responses import not_modified, paged_json
+
+router = APIRouter(
+    prefix='/search',
+    tags=['search']
+)
+
+
+@router.get(
+    '/',
+    response_model=list[schemas.SearchHit],
+    tags=['get']
+)
+async def search(
+        q: Annotated[str, Query(min_length=1, max_length=100)],
+        page: BoundedPageParams = Depends(),
+        if_none_match: str | None = Header(None),
+        accept_encoding: str | None = Header(None),
+        service: services.SearchService = Depends(services.SearchService)
+) -> Response:
+    """Найти блюда и подменю по названию и описанию"""
+    response = not_modified(if_none_match, await service.get_version())
+    if response is not None:
+        return response
+
+    return paged_json(
+        await service.search_json(q, page, accept_encoding)
+    )
@@ -1,9 +1,12 @@
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 
 from app import models, schemas, services
 from app.custom_exceptions import EntityDoesNotExist
+from app.pagination import PageParams
+from app.responses import not_modified, paged_json, versioned_json
+from app.warmer import record_access
 
 router = APIRouter(
     prefix='/menus/{menu_id}/submenus',
@@ -14,14 +17,26 @@ router = APIRouter(
 @router.get(
     '/',
     response_model=list[schemas.SubmenuWithCounts],
-    tags=['get']
+    tags=['get'],
+    dependencies=[Depends(record_access)]
 )
-def read_submenus(
+async def read_submenus(
         menu_id: UUID,
+        page: PageParams = Depends(),
+        if_none_match: str | None = Header(None),
+        accept_encoding: str | None = Header(None),
         service: services.SubmenuService = Depends(services.SubmenuService)
-) -> list[models.Submenu]:
+) -> Response:
     """Получить список подменю для указанного меню"""
-    return service.get_all(menu_id)
+    response = not_modified(
+        if_none_match, await service.get_all_version(menu_id)
+    )
+    if response is not None:
+        return response
+
+    return paged_json(
+        await service.get_all_json(menu_id, page, accept_encoding)
+    )
 
 
 @router.post(
@@ -33,13 +48,13 @@ def read_submenus(
         404: {'description': 'Menu not found'}
     }
 )
-def create_submenu(
+async def create_submenu(
         menu_id: UUID,
         submenu: schemas.SubmenuCreate,
         service: services.SubmenuService = Depends(services.SubmenuService)
 ) -> models.Submenu:
     """Создать новое подменю для указанного меню"""
-    return service.create(menu_id, submenu)
+    return await service.create(menu_id, submenu)
 
 
 @router.get(
@@ -50,18 +65,25 @@ def create_submenu(
         404: {'description': 'Submenu not found'}
     }
 )
-def read_submenu(
+async def read_submenu(
         menu_id: UUID,
         submenu_id: UUID,
+        if_none_match: str | None = Header(None),
         service: services.SubmenuService = Depends(services.SubmenuService)
-) -> models.Submenu:
+) -> Response:
     """Получить информацию о конкретном подменю для указанного меню."""
+    response = not_modified(
+        if_none_match, await service.get_version(menu_id, submenu_id)
+    )
+    if response is not None:
+        return response
+
     try:
-        db_submenu = service.get(menu_id, submenu_id)
+        body = await service.get_json(menu_id, submenu_id)
     except EntityDoesNotExist:
         raise HTTPException(status_code=404, detail='submenu not found')
 
-    return db_submenu
+    return versioned_json(body)
 
 
 @router.delete(
@@ -72,14 +94,14 @@ def read_submenu(
         404: {'description': 'Submenu not found'}
     }
 )
-def delete_submenu(
+async def delete_submenu(
         menu_id: UUID,
         submenu_id: UUID,
         service: services.SubmenuService = Depends(services.SubmenuService)
 ) -> models.Submenu:
     """Удалить подменю для указанного меню"""
     try:
-        db_submenu = service.delete(menu_id, submenu_id)
+        db_submenu = await service.delete(menu_id, submenu_id)
     except EntityDoesNotExist:
         raise HTTPException(status_code=404, detail='submenu not found')
 
@@ -94,7 +116,7 @@ def delete_submenu(
         404: {'description': 'Submenu not found'}
     }
 )
-def update_submenu(
+async def update_submenu(
         menu_id: UUID,
         submenu_id: UUID,
         submenu: schemas.SubmenuUpdate,
@@ -102,7 +124,7 @@ def update_submenu(
 ) -> models.Submenu:
     """Обновить информацию о подменю для указанного меню"""
     try:
-        db_submenu = service.update(menu_id, submenu_id, submenu)
+        db_submenu = await service.update(menu_id, submenu_id, submenu)
     except EntityDoesNotExist:
         raise HTTPException(status_code=404, detail='submenu not found')
 
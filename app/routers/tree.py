@@ -0,0 +1,57 @@
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+
+from app import schemas, services
+from app.custom_exceptions import EntityDoesNotExist
+from app.responses import not_modified, versioned_json
+
+router = APIRouter(
+    prefix='/menus',
+    tags=['menus']
+)
+
+
+@router.get(
+    '/tree',
+    response_model=list[schemas.MenuTree],
+    tags=['get']
+)
+async def read_menus_tree(
+        if_none_match: str | None = Header(None),
+        accept_encoding: str | None = Header(None),
+        service: services.MenuTreeService = Depends(services.MenuTreeService)
+) -> Response:
+    """Получить все меню вместе с подменю и блюдами"""
+    response = not_modified(if_none_match, await service.get_all_version())
+    if response is not None:
+        return response
+
+    return versioned_json(await service.get_all(accept_encoding))
+
+
+@router.get(
+    '/{menu_id}/tree',
+    response_model=schemas.MenuTree,
+    tags=['get'],
+    responses={
+        404: {'description': 'Menu not found'}
+    }
+)
+async def read_menu_tree(
+        menu_id: UUID,
+        if_none_match: str | None = Header(None),
+        accept_encoding: str | None = Header(None),
+        service: services.MenuTreeService = Depends(services.MenuTreeService)
+) -> Response:
+    """Получить меню вместе с его подменю и блюдами"""
+    response = not_modified(if_none_match, await service.get_version(menu_id))
+    if response is not None:
+        return response
+
+    try:
+        body = await service.get(menu_id, accept_encoding)
+    except EntityDoesNotExist:
+        raise HTTPException(status_code=404, detail='menu not found')
+
+    return versioned_json(body)
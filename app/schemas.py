@@ -1,4 +1,9 @@
-from pydantic import UUID4, BaseModel, ConfigDict
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Generic, Literal, TypeVar
+
+from pydantic import UUID4, BaseModel, ConfigDict, Field, field_validator
+
+ItemT = TypeVar('ItemT')
 
 
 class DishBase(BaseModel):
@@ -6,6 +11,23 @@ class DishBase(BaseModel):
     description: str
     price: str
 
+    @field_validator('price')
+    @classmethod
+    def normalize_price(cls, price: str) -> str:
+        """Spell the price the way the numeric column gives it back."""
+        try:
+            value = Decimal(price)
+        except InvalidOperation:
+            raise ValueError('price must be a number')
+        if not value.is_finite():
+            raise ValueError('price must be a number')
+
+        value = value.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        if not 0 <= value < 10 ** 8:
+            raise ValueError('price must be between 0 and 99999999.99')
+
+        return f'{value:.2f}'
+
 
 class DishCreate(DishBase):
     pass
@@ -14,7 +36,7 @@ class DishCreate(DishBase):
 class DishUpdate(BaseModel):
     title: str | None = None
     description: str | None = None
-    price: float | None = None
+    price: float | None = Field(None, ge=0, lt=10 ** 8)
 
 
 class Dish(DishBase):
@@ -72,3 +94,104 @@ class Menu(MenuBase):
 class MenuWithCounts(Menu):
     submenus_count: int
     dishes_count: int
+
+
+class Page(BaseModel, Generic[ItemT]):
+    items: list[ItemT]
+    next_cursor: str | None = None
+
+
+class SubmenuTree(Submenu):
+    dishes: list[Dish]
+
+
+class MenuTree(Menu):
+    submenus: list[SubmenuTree]
+
+
+class SearchPath(BaseModel):
+    id: UUID4
+    title: str
+
+
+class SearchHit(BaseModel):
+    """A dish or submenu found by a search, with the menu, and the
+    submenu of a dish, it is in."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    type: Literal['dish', 'submenu']
+    id: UUID4
+    title: str
+    description: str
+    price: str | None = None
+    rank: float
+    menu: SearchPath
+    submenu: SearchPath | None = None
+
+
+class SubmenuBulkCreate(SubmenuCreate):
+    dishes: list[DishCreate] = []
+
+
+class MenuBulkCreate(MenuCreate):
+    submenus: list[SubmenuBulkCreate] = []
+
+
+class CounterMismatch(BaseModel):
+    table: str
+    id: UUID4
+    stored: dict[str, int]
+    actual: dict[str, int]
+
+
+class CacheLayerStats(BaseModel):
+    hits: int
+    misses: int
+    hit_rate: float
+    size: int
+
+
+class CacheStats(BaseModel):
+    local: CacheLayerStats | None
+    redis: CacheLayerStats
+
+
+class CacheMemoryStats(BaseModel):
+    used_memory: int
+    used_memory_peak: int
+    max_memory: int
+    budget: int
+    eviction_policy: str
+    evicted_keys: int
+    expired_keys: int
+    keys: int
+
+
+class CacheInvalidationStats(BaseModel):
+    invalidations: int
+    unlinked_keys: int
+    time_total: float
+    time_max: float
+    time_last: float
+
+
+class CacheNotificationStats(BaseModel):
+    listening: bool
+    notifications: int
+    invalidations: int
+    lag_total: float
+    lag_max: float
+    lag_last: float
+
+
+class DBPoolStats(BaseModel):
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    max_overflow: int
+    checkouts: int
+    timeouts: int
+    wait_time_total: float
+    wait_time_max: float
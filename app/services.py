@@ -1,13 +1,60 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import TypeVar
 from uuid import UUID
 
 from fastapi import Depends
-
-from app.cache import DishCache, MenuCache, SubmenuCache
+from pydantic import TypeAdapter
+
+from app.cache import (
+    MENUS,
+    DishCache,
+    MenuCache,
+    MenuTreeCache,
+    SearchCache,
+    SubmenuCache,
+    menu_namespace,
+    menu_tag,
+    submenu_namespace,
+    submenu_tag,
+)
+from app.compression import Body
 from app.custom_exceptions import EntityIsNotInCache
-from app.repositories import DishRepository, MenuRepository, SubmenuRepository
+from app.database import SessionLocal
+from app.filters import DishFilter
+from app.outbox import apply_after_commit
+from app.pagination import PageBody, PageParams, build_page, encode_cursor
+from app.repositories import (
+    DishRepository,
+    MenuRepository,
+    MenuTreeRepository,
+    OutboxRepository,
+    SearchRepository,
+    SubmenuRepository,
+)
 
 from . import models, schemas
 
+RepositoryT = TypeVar(
+    'RepositoryT',
+    MenuRepository,
+    SubmenuRepository,
+    DishRepository,
+    MenuTreeRepository,
+    SearchRepository
+)
+
+
+@asynccontextmanager
+async def detached(repository: RepositoryT) -> AsyncIterator[RepositoryT]:
+    """Give a copy of the repository its own session.
+
+    Lists and trees may be rebuilt in the background after the request
+    that asked for them, and with it its session, is gone.
+    """
+    async with SessionLocal() as session:
+        yield type(repository)(session)
+
 
 class MenuService:
     def __init__(
@@ -17,44 +64,125 @@ class MenuService:
     ) -> None:
         self.cache = cache
         self.repository = repository
+        # Shares the session, so invalidations commit with the writes.
+        self.outbox = OutboxRepository(repository.session)
 
-    def get_all(self) -> list[models.Menu]:
+    async def get_all(
+            self,
+            page: PageParams
+    ) -> schemas.Page[schemas.MenuWithCounts]:
+        return await self.cache.get_page(
+            'menus_list', MENUS, page.key,
+            lambda: self.__fetch_all(page)
+        )
+
+    async def get_all_json(
+            self,
+            page: PageParams,
+            accept_encoding: str | None = None
+    ) -> PageBody:
+        return await self.cache.get_page_json(
+            'menus_list', MENUS, page.key,
+            lambda: self.__fetch_all(page),
+            accept_encoding=accept_encoding
+        )
+
+    async def get_all_version(self) -> int | None:
+        return await self.cache.current_version(MENUS)
+
+    async def get_version(self, menu_id: UUID) -> int | None:
+        return await self.cache.current_version(menu_namespace(menu_id))
+
+    async def get(self, menu_id: UUID) -> schemas.MenuWithCounts:
         try:
-            db_menus = self.cache.get_list('menus_list')
+            return await self.cache.get(
+                str(menu_id), menu_namespace(menu_id)
+            )
         except EntityIsNotInCache:
-            db_menus = self.repository.get_all()
-            if db_menus:
-                self.cache.save('menus_list', db_menus)
-
-        return db_menus
+            return await self.__load(menu_id)
 
-    def get(self, menu_id: UUID) -> models.Menu:
+    async def get_json(self, menu_id: UUID) -> bytes:
         try:
-            db_menu = self.cache.get(str(menu_id))
+            return await self.cache.get_json(
+                str(menu_id), menu_namespace(menu_id)
+            )
         except EntityIsNotInCache:
-            db_menu = self.repository.get(menu_id)
-            if db_menu:
-                self.cache.save(str(menu_id), db_menu)
-
+            return self.cache.dump_json(await self.__load(menu_id))
+
+    async def create(self, menu: schemas.MenuCreate) -> models.Menu:
+        event = self.outbox.add([MENUS])
+        db_menu = await self.repository.save(menu)
+        if await apply_after_commit(self.cache, event) is not None:
+            await self.cache.put(
+                str(db_menu.id), menu_namespace(db_menu.id),
+                lambda: self.repository.reload(db_menu.id),
+                tags=[menu_tag(db_menu.id)]
+            )
         return db_menu
 
-    def create(self, menu: schemas.MenuCreate) -> models.Menu:
-        self.cache.delete('menus_list')
-        return self.repository.save(menu)
-
-    def delete(self, menu_id: UUID) -> models.Menu:
-        self.cache.delete_cascade(f'{menu_id}*')
-        self.cache.delete('menus_list')
-        return self.repository.delete(menu_id)
+    async def create_bulk(
+            self,
+            menus: list[schemas.MenuBulkCreate]
+    ) -> list[schemas.MenuTree]:
+        # Only new menus are created, so the lists are all that go stale.
+        event = self.outbox.add([MENUS])
+        trees = await self.repository.save_bulk(menus)
+        await apply_after_commit(self.cache, event)
+        return trees
+
+    async def delete(self, menu_id: UUID) -> models.Menu:
+        submenu_ids = await self.repository.get_submenu_ids(menu_id)
+        event = self.outbox.add(
+            [
+                MENUS,
+                menu_namespace(menu_id),
+                *map(submenu_namespace, submenu_ids)
+            ],
+            tags=[menu_tag(menu_id)]
+        )
+        db_menu = await self.repository.delete(menu_id)
+        await apply_after_commit(self.cache, event)
+        return db_menu
 
-    def update(
+    async def update(
             self,
             menu_id: UUID,
             menu: schemas.MenuUpdate
     ) -> models.Menu:
-        self.cache.delete(str(menu_id))
-        self.cache.delete('menus_list')
-        return self.repository.update(menu_id, menu)
+        event = self.outbox.add([MENUS, menu_namespace(menu_id)])
+        db_menu = await self.repository.update(menu_id, menu)
+        versions = await apply_after_commit(self.cache, event)
+        if versions is not None:
+            item = await self.cache.put(
+                str(menu_id), menu_namespace(menu_id),
+                lambda: self.repository.reload(menu_id),
+                versions[menu_namespace(menu_id)],
+                tags=[menu_tag(menu_id)]
+            )
+            if item is not None:
+                await self.cache.patch_pages(
+                    'menus_list', MENUS, versions[MENUS], item
+                )
+        return db_menu
+
+    async def __load(self, menu_id: UUID) -> schemas.MenuWithCounts:
+        return await self.cache.load(
+            str(menu_id), menu_namespace(menu_id),
+            lambda: self.repository.get(menu_id),
+            tags=[menu_tag(menu_id)]
+        )
+
+    async def __fetch_all(
+            self,
+            page: PageParams
+    ) -> schemas.Page[schemas.MenuWithCounts]:
+        async with detached(self.repository) as repository:
+            db_menus = await repository.get_all(page.fetch_limit, page.after)
+        return build_page(
+            [schemas.MenuWithCounts.model_validate(db_menu)
+             for db_menu in db_menus],
+            page.limit
+        )
 
 
 class SubmenuService:
@@ -65,61 +193,145 @@ class SubmenuService:
     ) -> None:
         self.cache = cache
         self.repository = repository
+        # Shares the session, so invalidations commit with the writes.
+        self.outbox = OutboxRepository(repository.session)
+
+    async def get_all(
+            self,
+            menu_id: UUID,
+            page: PageParams
+    ) -> schemas.Page[schemas.SubmenuWithCounts]:
+        return await self.cache.get_page(
+            f'{menu_id}_submenus', menu_namespace(menu_id), page.key,
+            lambda: self.__fetch_all(menu_id, page),
+            tags=[menu_tag(menu_id)]
+        )
+
+    async def get_all_json(
+            self,
+            menu_id: UUID,
+            page: PageParams,
+            accept_encoding: str | None = None
+    ) -> PageBody:
+        return await self.cache.get_page_json(
+            f'{menu_id}_submenus', menu_namespace(menu_id), page.key,
+            lambda: self.__fetch_all(menu_id, page),
+            tags=[menu_tag(menu_id)],
+            accept_encoding=accept_encoding
+        )
+
+    async def get_all_version(self, menu_id: UUID) -> int | None:
+        return await self.cache.current_version(menu_namespace(menu_id))
+
+    async def get_version(
+            self,
+            menu_id: UUID,
+            submenu_id: UUID
+    ) -> int | None:
+        return await self.cache.current_version(submenu_namespace(submenu_id))
 
-    def get_all(self, menu_id: UUID) -> list[models.Submenu]:
+    async def get(
+            self,
+            menu_id: UUID,
+            submenu_id: UUID
+    ) -> schemas.SubmenuWithCounts:
         try:
-            db_submenus = self.cache.get_list(
-                f'{menu_id}_submenus'
+            return await self.cache.get(
+                f'{menu_id}_{submenu_id}', submenu_namespace(submenu_id)
             )
         except EntityIsNotInCache:
-            db_submenus = self.repository.get_all(menu_id)
-            if db_submenus:
-                self.cache.save(f'{menu_id}_submenus', db_submenus)
-
-        return db_submenus
+            return await self.__load(menu_id, submenu_id)
 
-    def get(self, menu_id: UUID, submenu_id: UUID) -> models.Submenu:
+    async def get_json(self, menu_id: UUID, submenu_id: UUID) -> bytes:
         try:
-            db_submenu = self.cache.get(
-                f'{menu_id}_{submenu_id}'
+            return await self.cache.get_json(
+                f'{menu_id}_{submenu_id}', submenu_namespace(submenu_id)
             )
         except EntityIsNotInCache:
-            db_submenu = self.repository.get(submenu_id)
-            if db_submenu:
-                self.cache.save(f'{menu_id}_{submenu_id}', db_submenu)
-
-        return db_submenu
+            return self.cache.dump_json(
+                await self.__load(menu_id, submenu_id)
+            )
 
-    def create(
+    async def create(
             self,
             menu_id: UUID,
             submenu: schemas.SubmenuCreate
     ) -> models.Submenu:
-        self.cache.delete(str(menu_id))
-        self.cache.delete(f'{menu_id}_submenus')
-        self.cache.delete('menus_list')
-        return self.repository.save(menu_id, submenu)
+        event = self.outbox.add([MENUS, menu_namespace(menu_id)])
+        db_submenu = await self.repository.save(menu_id, submenu)
+        if await apply_after_commit(self.cache, event) is not None:
+            await self.cache.put(
+                f'{menu_id}_{db_submenu.id}',
+                submenu_namespace(db_submenu.id),
+                lambda: self.repository.reload(db_submenu.id),
+                tags=[menu_tag(menu_id), submenu_tag(db_submenu.id)]
+            )
+        return db_submenu
 
-    def delete(
+    async def delete(
             self,
             menu_id: UUID,
             submenu_id: UUID
     ) -> models.Submenu:
-        self.cache.delete_cascade(f'{menu_id}_{submenu_id}*')
-        self.cache.delete(f'{menu_id}_submenus')
-        self.cache.delete(str(menu_id))
-        return self.repository.delete(submenu_id)
+        event = self.outbox.add(
+            [MENUS, menu_namespace(menu_id), submenu_namespace(submenu_id)],
+            tags=[submenu_tag(submenu_id)]
+        )
+        db_submenu = await self.repository.delete(submenu_id)
+        await apply_after_commit(self.cache, event)
+        return db_submenu
 
-    def update(
+    async def update(
             self,
             menu_id: UUID,
             submenu_id: UUID,
             submenu: schemas.SubmenuUpdate
     ) -> models.Submenu:
-        self.cache.delete(f'{menu_id}_{submenu_id}')
-        self.cache.delete(f'{menu_id}_submenus')
-        self.cache.delete('menus_list')
-        return self.repository.update(submenu_id, submenu)
+        event = self.outbox.add(
+            [MENUS, menu_namespace(menu_id), submenu_namespace(submenu_id)]
+        )
+        db_submenu = await self.repository.update(submenu_id, submenu)
+        versions = await apply_after_commit(self.cache, event)
+        if versions is not None:
+            item = await self.cache.put(
+                f'{menu_id}_{submenu_id}', submenu_namespace(submenu_id),
+                lambda: self.repository.reload(submenu_id),
+                versions[submenu_namespace(submenu_id)],
+                tags=[menu_tag(menu_id), submenu_tag(submenu_id)]
+            )
+            if item is not None:
+                await self.cache.patch_pages(
+                    f'{menu_id}_submenus', menu_namespace(menu_id),
+                    versions[menu_namespace(menu_id)], item,
+                    tags=[menu_tag(menu_id)]
+                )
+        return db_submenu
+
+    async def __load(
+            self,
+            menu_id: UUID,
+            submenu_id: UUID
+    ) -> schemas.SubmenuWithCounts:
+        return await self.cache.load(
+            f'{menu_id}_{submenu_id}', submenu_namespace(submenu_id),
+            lambda: self.repository.get(submenu_id),
+            tags=[menu_tag(menu_id), submenu_tag(submenu_id)]
+        )
+
+    async def __fetch_all(
+            self,
+            menu_id: UUID,
+            page: PageParams
+    ) -> schemas.Page[schemas.SubmenuWithCounts]:
+        async with detached(self.repository) as repository:
+            db_submenus = await repository.get_all(
+                menu_id, page.fetch_limit, page.after
+            )
+        return build_page(
+            [schemas.SubmenuWithCounts.model_validate(db_submenu)
+             for db_submenu in db_submenus],
+            page.limit
+        )
 
 
 class DishService:
@@ -130,66 +342,305 @@ class DishService:
     ) -> None:
         self.cache = cache
         self.repository = repository
+        # Shares the session, so invalidations commit with the writes.
+        self.outbox = OutboxRepository(repository.session)
 
-    def get_all(self, submenu_id: UUID) -> list[models.Dish]:
+    async def get_all(
+            self,
+            menu_id: UUID,
+            submenu_id: UUID,
+            page: PageParams,
+            filters: DishFilter | None = None
+    ) -> schemas.Page[schemas.Dish]:
+        key, field = self.__list_key(f'{submenu_id}_dishes', page, filters)
+        return await self.cache.get_page(
+            key, submenu_namespace(submenu_id), field,
+            lambda: self.__fetch_all(submenu_id, page, filters),
+            tags=[menu_tag(menu_id), submenu_tag(submenu_id)]
+        )
+
+    async def get_all_json(
+            self,
+            menu_id: UUID,
+            submenu_id: UUID,
+            page: PageParams,
+            filters: DishFilter | None = None,
+            accept_encoding: str | None = None
+    ) -> PageBody:
+        key, field = self.__list_key(f'{submenu_id}_dishes', page, filters)
+        return await self.cache.get_page_json(
+            key, submenu_namespace(submenu_id), field,
+            lambda: self.__fetch_all(submenu_id, page, filters),
+            tags=[menu_tag(menu_id), submenu_tag(submenu_id)],
+            accept_encoding=accept_encoding
+        )
+
+    async def get_version(self, submenu_id: UUID) -> int | None:
+        """Return the version of the dishes of a submenu and their list."""
+        return await self.cache.current_version(submenu_namespace(submenu_id))
+
+    async def get_all_in_menus_json(
+            self,
+            page: PageParams,
+            filters: DishFilter,
+            accept_encoding: str | None = None
+    ) -> PageBody:
+        """Return a page of the dishes of all menus.
+
+        Every dish write bumps the menus namespace, so the list lives
+        there.
+        """
+        _, field = self.__list_key('dishes', page, filters)
+        return await self.cache.get_page_json(
+            'dishes', MENUS, field,
+            lambda: self.__fetch_all(None, page, filters),
+            accept_encoding=accept_encoding
+        )
+
+    async def get_all_in_menus_version(self) -> int | None:
+        return await self.cache.current_version(MENUS)
+
+    async def get(self, menu_id, submenu_id, dish_id: UUID,) -> schemas.Dish:
         try:
-            db_dishes = self.cache.get_all(
-                f'{submenu_id}_dishes'
+            return await self.cache.get(
+                f'{menu_id}_{submenu_id}_{dish_id}',
+                submenu_namespace(submenu_id)
             )
         except EntityIsNotInCache:
-            db_dishes = self.repository.get_all(submenu_id)
-            if db_dishes:
-                self.cache.save(f'{submenu_id}_dishes', db_dishes)
-
-        return db_dishes
+            return await self.__load(menu_id, submenu_id, dish_id)
 
-    def get(self, menu_id, submenu_id, dish_id: UUID,) -> models.Dish:
+    async def get_json(
+            self,
+            menu_id: UUID,
+            submenu_id: UUID,
+            dish_id: UUID
+    ) -> bytes:
         try:
-            db_dish = self.cache.get(
-                f'{menu_id}_{submenu_id}_{dish_id}'
+            return await self.cache.get_json(
+                f'{menu_id}_{submenu_id}_{dish_id}',
+                submenu_namespace(submenu_id)
             )
         except EntityIsNotInCache:
-            db_dish = self.repository.get(dish_id)
-            if db_dish:
-                self.cache.save(f'{menu_id}_{submenu_id}_{dish_id}', db_dish)
-
-        return db_dish
+            return self.cache.dump_json(
+                await self.__load(menu_id, submenu_id, dish_id)
+            )
 
-    def create(
+    async def create(
             self,
             menu_id: UUID,
             submenu_id: UUID,
             dish: schemas.DishCreate
     ) -> models.Dish:
-        self.cache.delete(f'{menu_id}_{submenu_id}')
-        self.cache.delete(f'{menu_id}')
-        self.cache.delete('menus_list')
-        self.cache.delete(f'{menu_id}_submenus')
-        self.cache.delete(f'{submenu_id}_dishes')
-
-        return self.repository.save(submenu_id, dish)
+        event = self.__invalidation(menu_id, submenu_id)
+        db_dish = await self.repository.save(submenu_id, dish)
+        versions = await apply_after_commit(self.cache, event)
+        if versions is not None:
+            await self.cache.put(
+                f'{menu_id}_{submenu_id}_{db_dish.id}',
+                submenu_namespace(submenu_id),
+                lambda: self.repository.reload(db_dish.id),
+                versions[submenu_namespace(submenu_id)],
+                tags=[menu_tag(menu_id), submenu_tag(submenu_id)]
+            )
+        return db_dish
 
-    def delete(
+    async def delete(
             self,
             menu_id: UUID,
             submenu_id: UUID,
             dish_id: UUID
     ) -> models.Dish:
-        self.cache.delete(f'{menu_id}_{submenu_id}_{dish_id}')
-        self.cache.delete(f'{menu_id}_{submenu_id}')
-        self.cache.delete(f'{menu_id}')
-        self.cache.delete('menus_list')
-        self.cache.delete(f'{menu_id}_submenus')
-        self.cache.delete(f'{submenu_id}_dishes')
-
-        return self.repository.delete(dish_id)
+        event = self.__invalidation(menu_id, submenu_id)
+        db_dish = await self.repository.delete(dish_id)
+        await apply_after_commit(self.cache, event)
+        return db_dish
 
-    def update(
+    async def update(
             self,
             menu_id: UUID,
             submenu_id: UUID,
             dish_id: UUID,
             dish: schemas.DishUpdate
     ) -> models.Dish:
-        self.cache.delete(f'{menu_id}_{submenu_id}_{dish_id}')
-        return self.repository.update(dish_id, dish)
+        event = self.__invalidation(menu_id, submenu_id)
+        db_dish = await self.repository.update(dish_id, dish)
+        versions = await apply_after_commit(self.cache, event)
+        if versions is not None:
+            # The dishes and their list share the submenu namespace.
+            namespace = submenu_namespace(submenu_id)
+            version = versions[namespace]
+            tags = [menu_tag(menu_id), submenu_tag(submenu_id)]
+            item = await self.cache.put(
+                f'{menu_id}_{submenu_id}_{dish_id}', namespace,
+                lambda: self.repository.reload(dish_id), version,
+                tags=tags
+            )
+            if item is not None:
+                await self.cache.patch_pages(
+                    f'{submenu_id}_dishes', namespace, version, item,
+                    tags=tags
+                )
+        return db_dish
+
+    def __invalidation(
+            self,
+            menu_id: UUID,
+            submenu_id: UUID
+    ) -> models.CacheOutbox:
+        # Counters and trees above the dish change too, so the menu
+        # level has to go along with the submenu.
+        return self.outbox.add(
+            [MENUS, menu_namespace(menu_id), submenu_namespace(submenu_id)]
+        )
+
+    async def __load(
+            self,
+            menu_id: UUID,
+            submenu_id: UUID,
+            dish_id: UUID
+    ) -> schemas.Dish:
+        return await self.cache.load(
+            f'{menu_id}_{submenu_id}_{dish_id}',
+            submenu_namespace(submenu_id),
+            lambda: self.repository.get(dish_id),
+            tags=[menu_tag(menu_id), submenu_tag(submenu_id)]
+        )
+
+    @staticmethod
+    def __list_key(
+            key: str,
+            page: PageParams,
+            filters: DishFilter | None
+    ) -> tuple[str, str]:
+        """Return the hash and the field of a page of dishes.
+
+        Filtered pages get a hash of their own: an update can move a
+        dish into or out of them, so they are not patched in place.
+        """
+        if filters is None or not filters.active:
+            return key, page.key
+        return f'{key}_filtered', f'{page.key}|{filters.key}'
+
+    async def __fetch_all(
+            self,
+            submenu_id: UUID | None,
+            page: PageParams,
+            filters: DishFilter | None = None
+    ) -> schemas.Page[schemas.Dish]:
+        async with detached(self.repository) as repository:
+            db_dishes = await repository.get_all(
+                submenu_id, page.fetch_limit, page.after, filters,
+                page.after_value
+            )
+        dishes = [schemas.Dish.model_validate(db_dish) for db_dish in db_dishes]
+        if filters is not None and filters.sort == 'price':
+            return build_page(
+                dishes, page.limit,
+                lambda dish: encode_cursor(dish.id, dish.price)
+            )
+        return build_page(dishes, page.limit)
+
+
+class SearchService:
+    def __init__(
+            self,
+            cache: SearchCache = Depends(SearchCache),
+            repository: SearchRepository = Depends(SearchRepository)
+    ) -> None:
+        self.cache = cache
+        self.repository = repository
+
+    async def get_version(self) -> int | None:
+        """Return the version of the search results.
+
+        Every write of a menu, submenu or dish bumps the menus namespace,
+        so the results are kept there.
+        """
+        return await self.cache.current_version(MENUS)
+
+    async def search_json(
+            self,
+            query: str,
+            page: PageParams,
+            accept_encoding: str | None = None
+    ) -> PageBody:
+        """Return a page of the dishes and submenus matching the query.
+
+        Only popular queries are cached; the rest are looked up every
+        time. Case and spacing make no difference to either.
+        """
+        query = ' '.join(query.lower().split())
+        if not await self.cache.popular(query):
+            return self.cache.dump_page_json(await self.__fetch(query, page))
+
+        return await self.cache.get_page_json(
+            f'search:{query}', MENUS, page.key,
+            lambda: self.__fetch(query, page),
+            accept_encoding=accept_encoding
+        )
+
+    async def __fetch(
+            self,
+            query: str,
+            page: PageParams
+    ) -> schemas.Page[schemas.SearchHit]:
+        async with detached(self.repository) as repository:
+            hits = await repository.search(
+                query, page.fetch_limit, page.after, page.after_value
+            )
+        return build_page(
+            hits, page.limit, lambda hit: encode_cursor(hit.id, str(hit.rank))
+        )
+
+
+class MenuTreeService:
+    list_adapter = TypeAdapter(list[schemas.MenuTree])
+    adapter = TypeAdapter(schemas.MenuTree)
+
+    def __init__(
+            self,
+            cache: MenuTreeCache = Depends(MenuTreeCache),
+            repository: MenuTreeRepository = Depends(MenuTreeRepository)
+    ) -> None:
+        self.cache = cache
+        self.repository = repository
+
+    async def get_all_version(self) -> int | None:
+        return await self.cache.current_version(MENUS)
+
+    async def get_version(self, menu_id: UUID) -> int | None:
+        return await self.cache.current_version(menu_namespace(menu_id))
+
+    async def get_all(self, accept_encoding: str | None = None) -> Body:
+        return await self.cache.get(
+            'menus_tree', MENUS, self.__render_all,
+            accept_encoding=accept_encoding
+        )
+
+    async def get(
+            self,
+            menu_id: UUID,
+            accept_encoding: str | None = None
+    ) -> Body:
+        return await self.cache.get(
+            f'{menu_id}_tree', menu_namespace(menu_id),
+            lambda: self.__render(menu_id),
+            tags=[menu_tag(menu_id)],
+            accept_encoding=accept_encoding
+        )
+
+    async def __render_all(self) -> bytes:
+        async with detached(self.repository) as repository:
+            menus = self.list_adapter.validate_python(
+                await repository.get_all(),
+                from_attributes=True
+            )
+        return self.list_adapter.dump_json(menus)
+
+    async def __render(self, menu_id: UUID) -> bytes:
+        async with detached(self.repository) as repository:
+            menu = self.adapter.validate_python(
+                await repository.get(menu_id),
+                from_attributes=True
+            )
+        return self.adapter.dump_json(menu)
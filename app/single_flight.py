@@ -0,0 +1,103 @@
+import asyncio
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+from redis.asyncio import Redis  # type: ignore
+
+from app.config import settings
+from app.custom_exceptions import EntityIsNotInCache, LoadAbandoned
+
+T = TypeVar('T')
+
+POLL_INTERVAL = 0.02
+
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Loads running in this worker, by the name of what they load.
+flights: dict[str, asyncio.Future] = {}
+
+
+async def single_flight(
+        cache: Redis,
+        name: str,
+        fill: Callable[[], Awaitable[T]],
+        cached: Callable[[], Awaitable[T]],
+        stale: Callable[[], Awaitable[T]]
+) -> T:
+    """Run `fill` at most once per name at a time.
+
+    Concurrent callers in this worker share the running call. Across
+    workers a short Redis lock picks the one that runs it: the others
+    poll `cached` until the value shows up, and past the wait limit they
+    take whatever `stale` has rather than queue up on the database.
+    Each of `cached` and `stale` raises EntityIsNotInCache on a miss.
+
+    A cancelled caller gives the call up for itself only: the callers
+    sharing it start over, and one of them runs it instead.
+    """
+    while (flight := flights.get(name)) is not None:
+        try:
+            return await asyncio.shield(flight)
+        except LoadAbandoned:
+            continue
+
+    flight = asyncio.get_running_loop().create_future()
+    # Nobody may be waiting for the result, so mark errors as retrieved.
+    flight.add_done_callback(
+        lambda done: done.cancelled() or done.exception()
+    )
+    flights[name] = flight
+
+    try:
+        value = await locked(cache, name, fill, cached, stale)
+    except asyncio.CancelledError:
+        flight.set_exception(LoadAbandoned())
+        raise
+    except Exception as error:
+        flight.set_exception(error)
+        raise
+    else:
+        flight.set_result(value)
+        return value
+    finally:
+        del flights[name]
+
+
+async def locked(
+        cache: Redis,
+        name: str,
+        fill: Callable[[], Awaitable[T]],
+        cached: Callable[[], Awaitable[T]],
+        stale: Callable[[], Awaitable[T]]
+) -> T:
+    lock = f'lock:{name}'
+    token = uuid.uuid4().hex
+
+    if await cache.set(lock, token, nx=True, px=settings.cache_lock_timeout):
+        try:
+            return await fill()
+        finally:
+            await cache.eval(RELEASE_SCRIPT, 1, lock, token)
+
+    deadline = time.monotonic() + settings.cache_lock_wait / 1000
+    while time.monotonic() < deadline:
+        await asyncio.sleep(POLL_INTERVAL)
+        try:
+            return await cached()
+        except EntityIsNotInCache:
+            pass
+        # The holder is gone without caching anything, e.g. it failed.
+        if not await cache.exists(lock):
+            break
+
+    try:
+        return await stale()
+    except EntityIsNotInCache:
+        return await fill()
@@ -0,0 +1,248 @@
+import asyncio
+import logging
+import time
+from collections import Counter
+from collections.abc import Awaitable, Callable
+from uuid import UUID
+
+import orjson
+from fastapi import Depends, Request
+from redis.asyncio import Redis  # type: ignore
+from redis.exceptions import RedisError  # type: ignore
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.cache import DishCache, MenuCache, SubmenuCache
+from app.config import settings
+from app.database import SessionLocal
+from app.dependencies import get_cache_conn
+from app.local_cache import LocalCache, get_local_cache
+from app.pagination import PageParams
+from app.repositories import DishRepository, MenuRepository, SubmenuRepository
+from app.services import DishService, MenuService, SubmenuService
+
+logger = logging.getLogger(__name__)
+
+# Sorted set of warmable reads by how often clients made them.
+ACCESS_KEY = 'stats:access'
+
+Target = tuple[str, dict[str, str]]
+
+# Warm runs of this worker, at most one at a time.
+warmings: set[asyncio.Task] = set()
+
+
+def target_member(name: str, params: dict[str, str]) -> bytes:
+    return orjson.dumps([name, params], option=orjson.OPT_SORT_KEYS)
+
+
+class AccessStats:
+    """Counts reads of the warmable endpoints in this worker.
+
+    The counts are added to a sorted set in Redis from time to time, so
+    every worker, and the next deploy, warms what all of them served.
+    """
+
+    def __init__(self) -> None:
+        self.counts: Counter[bytes] = Counter()
+
+    def record(self, name: str, params: dict[str, str]) -> None:
+        self.counts[target_member(name, params)] += 1
+
+    async def flush(self, cache: Redis) -> None:
+        counts, self.counts = self.counts, Counter()
+        if not counts:
+            return
+
+        async with cache.pipeline(transaction=False) as pipe:
+            for member, count in counts.items():
+                pipe.zincrby(ACCESS_KEY, count, member)
+            # Only as many reads are kept as a warm run may go through.
+            pipe.zremrangebyrank(ACCESS_KEY, 0, -settings.cache_warm_limit - 1)
+            await pipe.execute()
+
+
+access_stats = AccessStats()
+
+
+async def record_access(request: Request) -> None:
+    """Count a read of the endpoint it is a dependency of.
+
+    It is a coroutine so that it runs on the event loop, like `flush`,
+    rather than in the threadpool.
+    """
+    access_stats.record(request.scope['route'].name, request.path_params)
+
+
+async def flush_access_stats(cache: Redis) -> None:
+    while True:
+        await asyncio.sleep(settings.cache_warm_stats_interval)
+        try:
+            await access_stats.flush(cache)
+        except RedisError as error:
+            logger.warning('could not flush access stats: %s', error)
+
+
+async def warm_menus(
+        session: AsyncSession,
+        cache: Redis,
+        local: LocalCache | None
+) -> None:
+    await MenuService(
+        MenuCache(cache, local), MenuRepository(session)
+    ).get_all(PageParams())
+
+
+async def warm_menu(
+        session: AsyncSession,
+        cache: Redis,
+        local: LocalCache | None,
+        menu_id: UUID
+) -> None:
+    await MenuService(
+        MenuCache(cache, local), MenuRepository(session)
+    ).get(menu_id)
+
+
+async def warm_submenus(
+        session: AsyncSession,
+        cache: Redis,
+        local: LocalCache | None,
+        menu_id: UUID
+) -> None:
+    await SubmenuService(
+        SubmenuCache(cache, local), SubmenuRepository(session)
+    ).get_all(menu_id, PageParams())
+
+
+async def warm_dishes(
+        session: AsyncSession,
+        cache: Redis,
+        local: LocalCache | None,
+        menu_id: UUID,
+        submenu_id: UUID
+) -> None:
+    await DishService(
+        DishCache(cache, local), DishRepository(session)
+    ).get_all(menu_id, submenu_id, PageParams())
+
+
+# Warmers by the name of the endpoint whose first page they fill.
+WARMERS: dict[str, Callable[..., Awaitable[None]]] = {
+    'read_menus': warm_menus,
+    'read_menu': warm_menu,
+    'read_submenus': warm_submenus,
+    'read_dishes': warm_dishes,
+}
+
+
+async def list_targets(session: AsyncSession) -> list[Target]:
+    """List everything that can be warmed, lists of a parent first."""
+    menu_ids = await session.scalars(select(models.Menu.id))
+    submenus = await session.execute(
+        select(models.Submenu.menu_id, models.Submenu.id)
+    )
+
+    targets: list[Target] = [('read_menus', {})]
+    for menu_id in menu_ids:
+        targets.append(('read_menu', {'menu_id': str(menu_id)}))
+        targets.append(('read_submenus', {'menu_id': str(menu_id)}))
+    for menu_id, submenu_id in submenus:
+        targets.append((
+            'read_dishes',
+            {'menu_id': str(menu_id), 'submenu_id': str(submenu_id)}
+        ))
+
+    return targets
+
+
+def prioritize(
+        targets: list[Target],
+        scores: dict[bytes, float]
+) -> list[Target]:
+    """Order targets by how often they were read, most read first.
+
+    Targets nobody has read yet keep their order after the others, and
+    only as many are kept as a warm run may go through.
+    """
+    targets = sorted(
+        targets,
+        key=lambda target: -scores.get(target_member(*target), 0)
+    )
+
+    return targets[:settings.cache_warm_limit]
+
+
+def warmed(task: asyncio.Task) -> None:
+    warmings.discard(task)
+    if not task.cancelled() and task.exception():
+        logger.warning('cache warming failed', exc_info=task.exception())
+
+
+class CacheWarmer:
+    """Prefills the first pages of lists and the menus clients read most.
+
+    Every target loads through the services, so a warm run coalesces with
+    live requests missing the same keys and skips whatever is cached. It
+    runs on few connections and stops at a deadline, leaving the rest of
+    the database pool and the cache to live traffic.
+    """
+
+    def __init__(
+            self,
+            cache: Redis = Depends(get_cache_conn),
+            local: LocalCache | None = Depends(get_local_cache)
+    ) -> None:
+        self.cache = cache
+        self.local = local
+
+    def schedule(self) -> None:
+        """Warm in the background unless this worker already does."""
+        if not settings.cache_warm_enabled or warmings:
+            return
+
+        task = asyncio.create_task(self.warm())
+        warmings.add(task)
+        task.add_done_callback(warmed)
+
+    async def warm(self) -> int:
+        """Warm the cache, returning the number of targets loaded."""
+        started = time.monotonic()
+        semaphore = asyncio.Semaphore(settings.cache_warm_concurrency)
+        warmed = 0
+
+        async def run(name: str, params: dict[str, str]) -> None:
+            nonlocal warmed
+            ids = {key: UUID(value) for key, value in params.items()}
+            async with semaphore, SessionLocal() as session:
+                try:
+                    await WARMERS[name](
+                        session, self.cache, self.local, **ids
+                    )
+                except Exception as error:
+                    # Deleted since it was listed, or a passing failure.
+                    logger.debug('could not warm %s: %r', name, error)
+                else:
+                    warmed += 1
+
+        async def run_all() -> None:
+            async with SessionLocal() as session:
+                targets = await list_targets(session)
+            scores = dict(await self.cache.zrange(
+                ACCESS_KEY, 0, -1, withscores=True
+            ))
+            await asyncio.gather(
+                *(run(*target) for target in prioritize(targets, scores))
+            )
+
+        try:
+            await asyncio.wait_for(run_all(), settings.cache_warm_timeout)
+        except asyncio.TimeoutError:
+            logger.info('cache warming stopped at the deadline')
+
+        logger.info(
+            'warmed %d cache entries in %.2f s',
+            warmed, time.monotonic() - started
+        )
+        return warmed
@@ -0,0 +1,109 @@
+"""Compare cache value codecs against pickling ORM instances.
+
+Usage:
+    python -m benchmarks.cache_codecs [--menus 50] [--rounds 2000]
+
+Prints bytes per key and encode/decode time for a `menus_list` value and
+for a single menu value. The encode/decode timings of the codecs include
+converting between ORM instances, schemas and plain data, which is what
+`app.cache` does on every call.
+"""
+import argparse
+import os
+import pickle
+import timeit
+import uuid
+
+os.environ.setdefault('DB_URL', 'postgresql+asyncpg://localhost/benchmark')
+
+from app import models, schemas  # noqa: E402
+from app.codecs import CompressedCodec, MsgpackCodec, OrjsonCodec  # noqa: E402
+
+
+def build_menus(count: int) -> list[models.Menu]:
+    menus = []
+
+    for i in range(count):
+        menu = models.Menu(
+            id=uuid.uuid4(),
+            title=f'Menu {i}',
+            description=f'Description of the menu number {i} ' * 4,
+        )
+        menu.submenus_count = i % 7
+        menu.dishes_count = i % 31
+        menus.append(menu)
+
+    return menus
+
+
+def bench_pickle(value, rounds: int) -> tuple[int, float, float]:
+    data = pickle.dumps(value)
+    encode = timeit.timeit(lambda: pickle.dumps(value), number=rounds)
+    decode = timeit.timeit(lambda: pickle.loads(data), number=rounds)
+
+    return len(data), encode / rounds, decode / rounds
+
+
+def bench_codec(codec, value, rounds: int) -> tuple[int, float, float]:
+    def dump():
+        if isinstance(value, list):
+            payload = [
+                schemas.MenuWithCounts.model_validate(item).model_dump(
+                    mode='json')
+                for item in value
+            ]
+        else:
+            payload = schemas.MenuWithCounts.model_validate(
+                value).model_dump(mode='json')
+
+        return codec.dumps(payload)
+
+    def load():
+        payload = codec.loads(data)
+
+        if isinstance(payload, list):
+            return [
+                schemas.MenuWithCounts.model_validate(item)
+                for item in payload
+            ]
+
+        return schemas.MenuWithCounts.model_validate(payload)
+
+    data = dump()
+    encode = timeit.timeit(dump, number=rounds)
+    decode = timeit.timeit(load, number=rounds)
+
+    return len(data), encode / rounds, decode / rounds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--menus', type=int, default=50)
+    parser.add_argument('--rounds', type=int, default=2000)
+    args = parser.parse_args()
+
+    menus = build_menus(args.menus)
+    codecs = {
+        'orjson': CompressedCodec(OrjsonCodec(), 0),
+        'orjson+zlib': CompressedCodec(OrjsonCodec(), 1),
+        'msgpack': CompressedCodec(MsgpackCodec(), 0),
+        'msgpack+zlib': CompressedCodec(MsgpackCodec(), 1),
+    }
+
+    for label, value in (('menus_list', menus), ('menu', menus[0])):
+        print(f'{label} ({args.menus} menus)' if label == 'menus_list'
+              else label)
+        print(f'{"codec":<14}{"bytes":>10}{"encode, us":>14}{"decode, us":>14}')
+
+        results = {'pickle (ORM)': bench_pickle(value, args.rounds)}
+        for name, codec in codecs.items():
+            results[name] = bench_codec(codec, value, args.rounds)
+
+        for name, (size, encode, decode) in results.items():
+            print(f'{name:<14}{size:>10}{encode * 1e6:>14.1f}'
+                  f'{decode * 1e6:>14.1f}')
+        print()
+
+
+if __name__ == '__main__':
+    main()
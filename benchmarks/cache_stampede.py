@@ -0,0 +1,97 @@
+"""Count database queries caused by concurrent cache misses.
+
+Usage:
+    DB_URL=postgresql+asyncpg://... REDIS_HOST=... \
+        python -m benchmarks.cache_stampede [--clients 100] [--rounds 5]
+
+Creates one menu in a separate `menu_benchmark` schema of the database
+from DB_URL, then repeatedly invalidates its cache key and lets
+`--clients` concurrent readers miss at once. The readers go through
+`MenuService` (single-flight loads) and, for comparison, straight to the
+repository the way every reader did on a miss before. The schema is
+dropped afterwards.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from redis.asyncio import Redis  # type: ignore
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app import cache, models, repositories, services
+from app.database import count_statements, engine
+from app.dependencies import create_cache_pool
+
+SCHEMA = 'menu_benchmark'
+TRANSLATE = {'schema_translate_map': {None: SCHEMA}}
+
+SessionLocal = async_sessionmaker(
+    bind=engine.execution_options(**TRANSLATE),
+    autoflush=False,
+    expire_on_commit=False
+)
+
+
+async def run(read, clients: int) -> tuple[int, float]:
+    async def client() -> None:
+        # One session per request, as get_db hands them out.
+        async with SessionLocal() as session:
+            await read(session)
+
+    with count_statements('SELECT') as statements:
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+
+    return len(statements), elapsed * 1000
+
+
+async def main(args: argparse.Namespace) -> None:
+    menu_id = uuid.uuid4()
+
+    async with engine.begin() as conn:
+        await conn.execute(text(f'DROP SCHEMA IF EXISTS {SCHEMA} CASCADE'))
+        await conn.execute(text(f'CREATE SCHEMA {SCHEMA}'))
+        conn = await conn.execution_options(**TRANSLATE)
+        await conn.run_sync(models.Base.metadata.create_all)
+        await conn.execute(
+            insert(models.Menu),
+            [{'id': menu_id, 'title': 'Menu', 'description': ''}]
+        )
+
+    pool = create_cache_pool()
+    redis = Redis(connection_pool=pool)
+    menu_cache = cache.MenuCache(redis, None)
+
+    async def through_service(session) -> None:
+        await services.MenuService(
+            menu_cache, repositories.MenuRepository(session)
+        ).get(menu_id)
+
+    async def straight_to_database(session) -> None:
+        await repositories.MenuRepository(session).get(menu_id)
+
+    try:
+        print(f'{args.clients} concurrent misses; queries and ms per round')
+        for name, read in (
+            ('single flight', through_service),
+            ('no coalescing', straight_to_database),
+        ):
+            for _ in range(args.rounds):
+                await menu_cache.bump(cache.menu_namespace(menu_id))
+                queries, elapsed = await run(read, args.clients)
+                print(f'{name:<16}{queries:>8}{elapsed:>10.2f}')
+    finally:
+        await pool.disconnect()
+        async with engine.begin() as conn:
+            await conn.execute(text(f'DROP SCHEMA {SCHEMA} CASCADE'))
+        await engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=100)
+    parser.add_argument('--rounds', type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
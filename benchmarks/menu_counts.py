@@ -0,0 +1,123 @@
+"""Compare maintained counters with COUNT(DISTINCT) aggregation.
+
+Usage:
+    DB_URL=postgresql+asyncpg://... python -m benchmarks.menu_counts \
+        [--menus 100] [--submenus 10] [--dishes 100] [--rounds 20]
+
+Seeds menus * submenus * dishes rows (100k dishes by default) into a
+separate `menu_benchmark` schema of the database from DB_URL, times the
+menu list/detail reads both ways and drops the schema afterwards.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from typing import Any
+
+from sqlalchemy import func, insert, select, text
+
+from app import models
+from app.database import SessionLocal, engine
+
+SCHEMA = 'menu_benchmark'
+
+
+def aggregate_query():
+    return (
+        select(
+            models.Menu,
+            func.count(func.distinct(models.Submenu.id)
+                       ).label('submenus_count'),
+            func.count(func.distinct(models.Dish.id)).label('dishes_count')
+        )
+        .outerjoin(models.Submenu, models.Submenu.menu_id == models.Menu.id)
+        .outerjoin(models.Dish, models.Submenu.id == models.Dish.submenu_id)
+        .group_by(models.Menu.id)
+    )
+
+
+async def seed(conn, menus: int, submenus: int, dishes: int) -> uuid.UUID:
+    menu_rows: list[dict[str, Any]] = []
+    submenu_rows: list[dict[str, Any]] = []
+    dish_rows: list[dict[str, Any]] = []
+
+    for m in range(menus):
+        menu_id = uuid.uuid4()
+        menu_rows.append({
+            'id': menu_id, 'title': f'Menu {m}', 'description': '',
+            'submenus_count': submenus, 'dishes_count': submenus * dishes,
+        })
+        for s in range(submenus):
+            submenu_id = uuid.uuid4()
+            submenu_rows.append({
+                'id': submenu_id, 'title': f'Submenu {m}.{s}',
+                'description': '', 'menu_id': menu_id,
+                'dishes_count': dishes,
+            })
+            dish_rows.extend(
+                {
+                    'id': uuid.uuid4(), 'title': f'Dish {m}.{s}.{d}',
+                    'description': '', 'price': '10.00',
+                    'submenu_id': submenu_id,
+                }
+                for d in range(dishes)
+            )
+
+    await conn.execute(insert(models.Menu), menu_rows)
+    await conn.execute(insert(models.Submenu), submenu_rows)
+    for i in range(0, len(dish_rows), 10000):
+        await conn.execute(insert(models.Dish), dish_rows[i:i + 10000])
+    await conn.execute(text('ANALYZE'))
+
+    return menu_rows[0]['id']
+
+
+async def timed(session, query, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        (await session.execute(query)).all()
+        session.expunge_all()
+
+    return (time.perf_counter() - started) / rounds * 1000
+
+
+async def main(args: argparse.Namespace) -> None:
+    translate = {'schema_translate_map': {None: SCHEMA}}
+
+    async with engine.begin() as conn:
+        await conn.execute(text(f'DROP SCHEMA IF EXISTS {SCHEMA} CASCADE'))
+        await conn.execute(text(f'CREATE SCHEMA {SCHEMA}'))
+        conn = await conn.execution_options(**translate)
+        await conn.run_sync(models.Base.metadata.create_all)
+        menu_id = await seed(conn, args.menus, args.submenus, args.dishes)
+
+    try:
+        async with SessionLocal() as session:
+            await session.connection(execution_options=translate)
+            total = args.menus * args.submenus * args.dishes
+            print(f'{args.menus} menus, {args.menus * args.submenus} '
+                  f'submenus, {total} dishes; ms per query')
+
+            queries = {
+                'menus list, aggregate': aggregate_query(),
+                'menus list, counters': select(models.Menu),
+                'one menu, aggregate': aggregate_query().filter(
+                    models.Menu.id == menu_id),
+                'one menu, counters': select(models.Menu).filter(
+                    models.Menu.id == menu_id),
+            }
+            for name, query in queries.items():
+                print(f'{name:<24}{await timed(session, query, args.rounds):>10.2f}')
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text(f'DROP SCHEMA {SCHEMA} CASCADE'))
+        await engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--menus', type=int, default=100)
+    parser.add_argument('--submenus', type=int, default=10)
+    parser.add_argument('--dishes', type=int, default=100)
+    parser.add_argument('--rounds', type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,209 @@
+"""Check that the hot list queries use index scans on a large menu.
+
+Usage:
+    DB_URL=postgresql+asyncpg://... python -m benchmarks.query_plans \
+        [--menus 100] [--submenus 100] [--dishes 100]
+
+Migrates a separate `plan_check` schema of the database from DB_URL,
+seeds menus * submenus * dishes rows (1M dishes by default), and runs
+EXPLAIN ANALYZE on the queries behind the list and tree endpoints. Exits
+with 1 when any of them scans submenus or dishes sequentially. The
+schema is dropped afterwards.
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+from uuid import UUID
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import Connection, Select, select, text
+from sqlalchemy.dialects import postgresql
+
+from app import models
+from app.database import engine
+from app.repositories import SearchRepository
+
+SCHEMA = 'plan_check'
+
+# Tables too large to be read whole by any request.
+LARGE_TABLES = {'submenus', 'dishes'}
+
+PAGE = 101
+
+SEED = [
+    """
+    INSERT INTO menus (id, title, description, submenus_count, dishes_count)
+    SELECT gen_random_uuid(), 'Menu ' || m, '', CAST(:submenus AS integer),
+           CAST(:submenus AS integer) * CAST(:dishes AS integer)
+    FROM generate_series(1, CAST(:menus AS integer)) AS m
+    """,
+    """
+    INSERT INTO submenus (id, title, description, dishes_count, menu_id)
+    SELECT gen_random_uuid(), 'Submenu ' || row_number() OVER (), '',
+           CAST(:dishes AS integer), menus.id
+    FROM menus, generate_series(1, CAST(:submenus AS integer))
+    """,
+    """
+    INSERT INTO dishes (id, title, description, price, submenu_id)
+    SELECT gen_random_uuid(), 'Dish ' || row_number() OVER (), '',
+           round(CAST(random() * 1000 AS numeric), 2), submenus.id
+    FROM submenus, generate_series(1, CAST(:dishes AS integer))
+    """,
+]
+
+
+def migrate(connection: Connection) -> None:
+    config = Config(Path(__file__).parents[1] / 'alembic.ini')
+    config.attributes['connection'] = connection
+    command.upgrade(config, 'head')
+
+
+def hot_queries(
+        menu_id, submenu_id, dish_id, trigram: bool
+) -> dict[str, Select]:
+    """The queries of MenuRepository, SubmenuRepository, DishRepository
+    and MenuTreeRepository, with ids picked from the seeded rows.
+
+    Seeded prices are spread between 0 and 1000.
+    """
+    submenus = select(models.Submenu).filter(
+        models.Submenu.menu_id == menu_id
+    ).order_by(models.Submenu.id).limit(PAGE)
+    dishes = select(models.Dish).filter(
+        models.Dish.submenu_id == submenu_id
+    ).order_by(models.Dish.id).limit(PAGE)
+
+    by_price = select(models.Dish).filter(
+        models.Dish.price.is_not(None)
+    ).order_by(models.Dish.price, models.Dish.id).limit(PAGE)
+    price_range = (models.Dish.price >= 100, models.Dish.price <= 200)
+    search = SearchRepository(None)  # type: ignore
+    search.trigram = trigram
+
+    return {
+        'menus page': select(models.Menu).order_by(models.Menu.id).limit(PAGE),
+        'submenus page': submenus,
+        'dishes page': dishes,
+        'dishes next page': dishes.filter(models.Dish.id > dish_id),
+        'dish': select(models.Dish).filter(models.Dish.id == dish_id),
+        'tree submenus': select(models.Submenu).filter(
+            models.Submenu.menu_id.in_([menu_id])
+        ),
+        'tree dishes': select(models.Dish).filter(
+            models.Dish.submenu_id.in_([submenu_id])
+        ),
+        'dishes by price': by_price.filter(
+            models.Dish.submenu_id == submenu_id, *price_range
+        ),
+        'all dishes by price': by_price.filter(*price_range),
+        'all dishes page': select(models.Dish).filter(
+            *price_range
+        ).order_by(models.Dish.id).limit(PAGE),
+        'search': search.statement('dish 4242', PAGE),
+    }
+
+
+def scans(plan: dict) -> list[tuple[str, str]]:
+    """List the scans of a plan as (node type, table or index) pairs."""
+    found = []
+    target = plan.get('Relation Name') or plan.get('Index Name')
+    if target:
+        found.append((plan['Node Type'], target))
+    for child in plan.get('Plans', []):
+        found.extend(scans(child))
+
+    return found
+
+
+async def seed(
+        conn,
+        menus: int,
+        submenus: int,
+        dishes: int
+) -> tuple[UUID, UUID, UUID]:
+    # Filling the indexes of a million rows takes longer than a request
+    # is allowed to.
+    await conn.execute(text('SET LOCAL statement_timeout = 0'))
+    for table in ('menus', 'submenus', 'dishes'):
+        # Seeding is not a change the cache has to hear about.
+        await conn.execute(text(f'ALTER TABLE {table} DISABLE TRIGGER USER'))
+    sizes = {'menus': menus, 'submenus': submenus, 'dishes': dishes}
+    for statement in SEED:
+        await conn.execute(text(statement), sizes)
+    await conn.execute(text('ANALYZE'))
+    # Rows inserted at once wait in the pending lists of the GIN indexes
+    # until autovacuum merges them, as it would have by now in a live
+    # database.
+    for index in ('ix_dishes_search_vector', 'ix_submenus_search_vector'):
+        await conn.execute(text(f"SELECT gin_clean_pending_list('{index}')"))
+
+    menu_id = await conn.scalar(
+        select(models.Menu.id).order_by(models.Menu.id).offset(menus // 2)
+    )
+    submenu_id = await conn.scalar(
+        select(models.Submenu.id).filter(models.Submenu.menu_id == menu_id)
+    )
+    dish_id = await conn.scalar(
+        select(models.Dish.id).filter(models.Dish.submenu_id == submenu_id)
+        .order_by(models.Dish.id).offset(dishes // 2)
+    )
+
+    return menu_id, submenu_id, dish_id
+
+
+async def main(args: argparse.Namespace) -> int:
+    failed = False
+
+    async with engine.connect() as conn:
+        await conn.execute(text(f'DROP SCHEMA IF EXISTS {SCHEMA} CASCADE'))
+        await conn.execute(text(f'CREATE SCHEMA {SCHEMA}'))
+        await conn.commit()
+        try:
+            # Extensions, e.g. pg_trgm, are installed in public.
+            await conn.execute(text(f'SET search_path TO {SCHEMA}, public'))
+            await conn.run_sync(migrate)
+            ids = await seed(conn, args.menus, args.submenus, args.dishes)
+            await conn.commit()
+
+            total = args.menus * args.submenus * args.dishes
+            print(f'{args.menus} menus, {args.menus * args.submenus} '
+                  f'submenus, {total} dishes')
+
+            trigram = await conn.run_sync(models.trigram_installed)
+            for name, query in hot_queries(*ids, trigram).items():
+                sql = query.compile(
+                    dialect=postgresql.dialect(),
+                    compile_kwargs={'literal_binds': True}
+                )
+                [[result]] = (await conn.execute(text(
+                    f'EXPLAIN (ANALYZE, FORMAT JSON) {sql}'
+                ))).all()
+                plan = result[0]
+                nodes = scans(plan['Plan'])
+                bad = [
+                    target for node, target in nodes
+                    if node == 'Seq Scan' and target in LARGE_TABLES
+                ]
+                failed = failed or bool(bad)
+                described = ', '.join(
+                    f'{node} on {target}' for node, target in nodes
+                )
+                print(f'{"FAIL" if bad else "ok":<6}{name:<20}'
+                      f'{plan["Execution Time"]:>10.2f} ms  {described}')
+        finally:
+            await conn.rollback()
+            await conn.execute(text(f'DROP SCHEMA {SCHEMA} CASCADE'))
+            await conn.commit()
+    await engine.dispose()
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--menus', type=int, default=100)
+    parser.add_argument('--submenus', type=int, default=100)
+    parser.add_argument('--dishes', type=int, default=100)
+    sys.exit(asyncio.run(main(parser.parse_args())))
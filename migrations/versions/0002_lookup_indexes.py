@@ -0,0 +1,34 @@
+"""Lookup indexes of submenus and dishes
+
+Lists filter children by their parent and page through them by id, and
+the tree loads them with `parent_id IN (...)`. A composite index on
+(parent_id, id) serves all of these as one range scan, and also the
+parent lookups of ON DELETE CASCADE, so no separate foreign key index
+is needed.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 12:10:00
+"""
+from alembic import op
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_submenus_menu_id_id', 'submenus', ['menu_id', 'id'],
+        if_not_exists=True
+    )
+    op.create_index(
+        'ix_dishes_submenu_id_id', 'dishes', ['submenu_id', 'id'],
+        if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_dishes_submenu_id_id', table_name='dishes')
+    op.drop_index('ix_submenus_menu_id_id', table_name='submenus')
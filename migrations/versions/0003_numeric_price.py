@@ -0,0 +1,46 @@
+"""Numeric dish prices
+
+Dish prices were strings. They become numeric(10, 2) so lists can be
+filtered and ordered by price. The prices already stored are converted
+in the same statement, and the statement fails if any of them is not a
+number. That way nothing is lost. A decimal comma is accepted. The
+rewrite does not fire the row triggers, so the cache is not flooded
+with notifications.
+
+(submenu_id, price, id) serves the lists of a submenu ordered by price.
+(price, id) serves the list of dishes of all menus.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 14:00:00
+"""
+from alembic import op
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The cast to text first keeps this a no-op rewrite on databases
+    # whose prices are numeric already.
+    op.execute(
+        'ALTER TABLE dishes ALTER COLUMN price TYPE numeric(10, 2) '
+        "USING replace(trim(price::text), ',', '.')::numeric"
+    )
+    op.create_index(
+        'ix_dishes_submenu_id_price_id', 'dishes',
+        ['submenu_id', 'price', 'id'], if_not_exists=True
+    )
+    op.create_index(
+        'ix_dishes_price_id', 'dishes', ['price', 'id'], if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_dishes_price_id', table_name='dishes')
+    op.drop_index('ix_dishes_submenu_id_price_id', table_name='dishes')
+    op.execute(
+        'ALTER TABLE dishes ALTER COLUMN price TYPE varchar USING price::text'
+    )
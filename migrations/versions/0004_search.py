@@ -0,0 +1,67 @@
+"""Search indexes of dishes and submenus
+
+Dishes and submenus get a generated tsvector column of their title and
+description, and a GIN index on it for full-text search. Adding a
+stored generated column rewrites the table, and the rewrite does not
+fire the row triggers.
+
+Where pg_trgm is available, the extension is installed, and trigram
+GIN indexes on the titles match partial and mistyped words. Databases
+without it are searched by full text alone.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 16:00:00
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('russian', coalesce(title, '')), 'A')"
+    " || setweight(to_tsvector('russian', coalesce(description, '')), 'B')"
+)
+
+TABLES = ('dishes', 'submenus')
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.add_column(
+            table,
+            sa.Column('search_vector', postgresql.TSVECTOR(),
+                      sa.Computed(SEARCH_VECTOR, persisted=True)),
+            if_not_exists=True
+        )
+        op.create_index(
+            f'ix_{table}_search_vector', table, ['search_vector'],
+            postgresql_using='gin', if_not_exists=True
+        )
+
+    available = op.get_bind().scalar(sa.text(
+        'SELECT EXISTS (SELECT FROM pg_available_extensions '
+        "WHERE name = 'pg_trgm')"
+    ))
+    if not available:
+        return
+
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for table in TABLES:
+        op.create_index(
+            f'ix_{table}_title_trgm', table, ['title'],
+            postgresql_using='gin',
+            postgresql_ops={'title': 'gin_trgm_ops'},
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.execute(f'DROP INDEX IF EXISTS ix_{table}_title_trgm')
+        op.drop_index(f'ix_{table}_search_vector', table_name=table)
+        op.drop_column(table, 'search_vector')
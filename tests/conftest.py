@@ -1,47 +1,65 @@
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Callable
+from contextlib import AbstractContextManager
 
 import pytest
-from fastapi.testclient import TestClient
-from redis import Redis  # type: ignore
-from sqlalchemy.orm import Session
+from httpx import ASGITransport, AsyncClient
+from redis.asyncio import Redis  # type: ignore
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import cache, models, repositories, schemas, services
-from app.database import SessionLocal, engine
-from app.dependencies import get_cache_conn
+from app.database import SessionLocal, count_statements, engine
 from app.main import app
 
-client = TestClient(app)
 
+@pytest.fixture(scope='session')
+def anyio_backend() -> str:
+    return 'asyncio'
 
-def base_session() -> Generator[Session, None, None]:
-    models.Base.metadata.create_all(bind=engine)
-    db_session = SessionLocal()
 
-    yield db_session
+@pytest.fixture(scope='session')
+async def client() -> AsyncGenerator[AsyncClient, None]:
+    async with app.router.lifespan_context(app):
+        async with AsyncClient(
+            transport=ASGITransport(app=app),
+            base_url='http://test'
+        ) as client:
+            yield client
 
-    db_session.close()
-    models.Base.metadata.drop_all(bind=engine)
+
+async def base_session() -> AsyncGenerator[AsyncSession, None]:
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+
+    async with SessionLocal() as db_session:
+        yield db_session
+
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.drop_all)
 
 
 @pytest.fixture(scope='class')
-def class_session() -> (
-    Generator[Session, None, None]
+async def class_session(client) -> (
+    AsyncGenerator[AsyncSession, None]
 ):
-    yield from base_session()
+    async for db_session in base_session():
+        yield db_session
 
 
 @pytest.fixture()
-def session() -> Generator[Session, None, None]:
-    yield from base_session()
+async def session(client) -> AsyncGenerator[AsyncSession, None]:
+    async for db_session in base_session():
+        yield db_session
 
 
 @pytest.fixture()
-def cache_conn() -> Generator[Redis, None, None]:
-    cache_conn = get_cache_conn()
+def count_queries() -> Callable[..., AbstractContextManager[list[str]]]:
+    """Counts the statements sent to the database within a block."""
+    return count_statements
 
-    yield cache_conn
 
-    cache_conn.close
+@pytest.fixture()
+def cache_conn(client) -> Redis:
+    return Redis(connection_pool=app.state.cache_pool)
 
 
 @pytest.fixture()
@@ -51,7 +69,7 @@ def menu_repository(session) -> repositories.MenuRepository:
 
 @pytest.fixture()
 def menu_cache(cache_conn) -> cache.MenuCache:
-    return cache.MenuCache(cache_conn)
+    return cache.MenuCache(cache_conn, app.state.local_cache)
 
 
 @pytest.fixture()
@@ -66,7 +84,7 @@ def submenu_repository(session) -> repositories.SubmenuRepository:
 
 @pytest.fixture()
 def submenu_cache(cache_conn) -> cache.SubmenuCache:
-    return cache.SubmenuCache(cache_conn)
+    return cache.SubmenuCache(cache_conn, app.state.local_cache)
 
 
 @pytest.fixture()
@@ -84,7 +102,7 @@ def dish_repository(session) -> repositories.DishRepository:
 
 @pytest.fixture()
 def dish_cache(cache_conn) -> cache.DishCache:
-    return cache.DishCache(cache_conn)
+    return cache.DishCache(cache_conn, app.state.local_cache)
 
 
 @pytest.fixture()
@@ -93,48 +111,51 @@ def dish_service(dish_cache, dish_repository) -> services.DishService:
 
 
 @pytest.fixture
-def menu(menu_repository) -> Generator[models.Menu, None, None]:
+async def menu(menu_repository) -> AsyncGenerator[models.Menu, None]:
     menu_data = {
         'title': 'Menu 1',
         'description': 'Menu 1 description'
     }
 
-    db_menu = menu_repository.save(
+    db_menu = await menu_repository.save(
         schemas.MenuCreate(**menu_data)
     )
     yield db_menu
 
-    menu_repository.delete(db_menu.id)
+    await menu_repository.delete(db_menu.id)
 
 
 @pytest.fixture
-def submenu(menu, submenu_repository) -> Generator[models.Submenu, None, None]:
+async def submenu(
+    menu,
+    submenu_repository
+) -> AsyncGenerator[models.Submenu, None]:
     submenu_data = {
         'title': 'Submenu 1',
         'description': 'Submenu 1 description'
     }
 
-    db_submenu = submenu_repository.save(
+    db_submenu = await submenu_repository.save(
         menu.id,
         schemas.SubmenuCreate(**submenu_data)
     )
     yield db_submenu
 
-    submenu_repository.delete(db_submenu.id)
+    await submenu_repository.delete(db_submenu.id)
 
 
 @pytest.fixture
-def dish(submenu, dish_repository) -> Generator[models.Dish, None, None]:
+async def dish(submenu, dish_repository) -> AsyncGenerator[models.Dish, None]:
     dish_data = {
         'title': 'Dish 1',
         'description': 'Dish 1 description',
         'price': '12.50'
     }
 
-    db_dish = dish_repository.save(
+    db_dish = await dish_repository.save(
         submenu.id,
         schemas.DishCreate(**dish_data)
     )
     yield db_dish
 
-    dish_repository.delete(db_dish.id)
+    await dish_repository.delete(db_dish.id)
@@ -0,0 +1,102 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.utils import reverse
+
+pytestmark = pytest.mark.anyio
+
+payload = [
+    {
+        'title': 'Bulk menu 1',
+        'description': 'Bulk menu 1 description',
+        'submenus': [
+            {
+                'title': 'Bulk submenu 1',
+                'description': 'Bulk submenu 1 description',
+                'dishes': [
+                    {
+                        'title': f'Bulk dish {i}',
+                        'description': f'Bulk dish {i} description',
+                        'price': '10.50'
+                    }
+                    for i in range(3)
+                ]
+            },
+            {
+                'title': 'Bulk submenu 2',
+                'description': 'Bulk submenu 2 description'
+            }
+        ]
+    },
+    {
+        'title': 'Bulk menu 2',
+        'description': 'Bulk menu 2 description'
+    }
+]
+
+
+class TestBulkRouts:
+    async def test_create_menus_bulk_success(
+            self,
+            client: AsyncClient,
+            session: AsyncSession,
+            count_queries
+    ) -> None:
+        await client.get(reverse('read_menus'))
+
+        with count_queries('INSERT') as statements:
+            response = await client.post(
+                reverse('create_menus_bulk'),
+                json=payload
+            )
+
+        assert response.status_code == 201
+        # One per table, and the outbox event committed along with them.
+        assert len(statements) == 4
+        assert any('cache_outbox' in statement for statement in statements)
+
+        data = response.json()
+        assert [menu['title'] for menu in data] == [
+            'Bulk menu 1', 'Bulk menu 2'
+        ]
+        assert len(data[0]['submenus'][0]['dishes']) == 3
+
+        response = await client.get(reverse('read_menus'))
+        assert {menu['id'] for menu in response.json()} == {
+            menu['id'] for menu in data
+        }
+
+        response = await client.get(
+            reverse('read_menu', menu_id=data[0]['id'])
+        )
+        assert response.json()['submenus_count'] == 2
+        assert response.json()['dishes_count'] == 3
+
+        response = await client.get(
+            reverse(
+                'read_submenu',
+                menu_id=data[0]['id'],
+                submenu_id=data[0]['submenus'][0]['id']
+            )
+        )
+        assert response.json()['dishes_count'] == 3
+
+        response = await client.get(reverse('read_menus_tree'))
+        assert {menu['id'] for menu in response.json()} == {
+            menu['id'] for menu in data
+        }
+
+    async def test_create_menus_bulk_conflict(
+            self,
+            client: AsyncClient,
+            session: AsyncSession
+    ) -> None:
+        response = await client.post(
+            reverse('create_menus_bulk'),
+            json=[payload[1], payload[1]]
+        )
+        assert response.status_code == 409
+        assert await session.scalar(select(func.count(models.Menu.id))) == 0
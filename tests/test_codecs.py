@@ -0,0 +1,43 @@
+import pytest
+
+from app.codecs import (
+    RAW,
+    ZLIB,
+    CompressedCodec,
+    MsgpackCodec,
+    OrjsonCodec,
+    create_codec,
+)
+
+VALUE = [
+    {
+        'id': 'a3a5a1f4-39e6-4d5a-9a3a-1f1e3c3b9d10',
+        'title': 'Menu 1',
+        'description': 'Menu 1 description',
+        'submenus_count': 1,
+        'dishes_count': 2,
+    }
+] * 20
+
+
+class TestCodecs:
+    @pytest.mark.parametrize('codec', [OrjsonCodec(), MsgpackCodec()])
+    def test_round_trip(self, codec) -> None:
+        compressed = CompressedCodec(codec, threshold=0)
+
+        assert compressed.loads(compressed.dumps(VALUE)) == VALUE
+
+    def test_compress_above_threshold(self) -> None:
+        codec = CompressedCodec(OrjsonCodec(), threshold=64)
+
+        large = codec.dumps(VALUE)
+        small = codec.dumps(VALUE[0]['title'])
+
+        assert large[:1] == ZLIB
+        assert small[:1] == RAW
+        assert codec.loads(large) == VALUE
+        assert codec.loads(small) == VALUE[0]['title']
+
+    def test_unknown_codec(self) -> None:
+        with pytest.raises(ValueError):
+            create_codec('pickle', 0)
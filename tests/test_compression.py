@@ -0,0 +1,107 @@
+import gzip
+
+import brotli  # type: ignore
+import pytest
+from httpx import AsyncClient
+
+from app import cache, compression, models
+from app.config import settings
+from app.custom_exceptions import EntityIsNotInCache
+from app.utils import reverse
+
+pytestmark = pytest.mark.anyio
+
+BODY = b'[' + b'{"title":"Menu 1"},' * 100 + b'{}]'
+
+
+class TestCompression:
+    def test_pack_round_trip(self) -> None:
+        payload, variants = compression.unpack(
+            compression.pack(b'payload', BODY)
+        )
+
+        assert payload == b'payload'
+        assert brotli.decompress(variants['br']) == BODY
+        assert gzip.decompress(variants['gzip']) == BODY
+
+    def test_small_bodies_have_no_variants(self) -> None:
+        payload, variants = compression.unpack(
+            compression.pack(b'{}', b'{}')
+        )
+
+        assert payload == b'{}'
+        assert variants == {}
+
+    def test_unpack_rejects_other_formats(self) -> None:
+        with pytest.raises(EntityIsNotInCache):
+            compression.unpack(b'{"items": []}')
+
+    def test_page_keeps_its_cursor(self) -> None:
+        bundle = compression.pack(b'[]', b'[]')
+
+        assert cache.unpack_page(cache.pack_page(bundle, 'next')) == (
+            bundle, 'next'
+        )
+        assert cache.unpack_page(cache.pack_page(bundle, None)) == (
+            bundle, None
+        )
+
+    def test_page_written_without_cursor_is_a_miss(self) -> None:
+        with pytest.raises(EntityIsNotInCache):
+            cache.unpack_page(compression.pack(b'[]', b'[]'))
+
+    @pytest.mark.parametrize(
+        'accept_encoding, expected',
+        [
+            (None, None),
+            ('gzip', 'gzip'),
+            ('gzip, deflate, br', 'br'),
+            ('br;q=0.5, gzip', 'gzip'),
+            ('br;q=0, *', 'gzip'),
+            ('identity', None),
+        ]
+    )
+    def test_choose(self, accept_encoding, expected) -> None:
+        variants = {'br': b'br', 'gzip': b'gzip'}
+
+        assert compression.choose(accept_encoding, variants) == expected
+
+    async def test_list_is_sent_compressed(
+            self,
+            client: AsyncClient,
+            menu: models.Menu,
+            menu_cache: cache.MenuCache,
+            monkeypatch
+    ) -> None:
+        monkeypatch.setattr(settings, 'response_compress_threshold', 0)
+        # Start from a new version, so the page is built with variants.
+        await menu_cache.bump(cache.MENUS)
+
+        for encoding in ('br', 'gzip'):
+            response = await client.get(
+                reverse('read_menus'),
+                headers={'Accept-Encoding': encoding}
+            )
+
+            assert response.status_code == 200
+            assert response.headers['content-encoding'] == encoding
+            assert response.headers['vary'] == 'Accept-Encoding'
+            assert response.headers['etag'].endswith(f'-{encoding}"')
+            assert response.json()[0]['id'] == str(menu.id)
+
+        response = await client.get(
+            reverse('read_menus'),
+            headers={'Accept-Encoding': 'identity'}
+        )
+        assert 'content-encoding' not in response.headers
+        assert response.json()[0]['id'] == str(menu.id)
+
+        response = await client.get(
+            reverse('read_menus'),
+            headers={'If-None-Match': f'"{etag_version(response)}-br"'}
+        )
+        assert response.status_code == 304
+
+
+def etag_version(response) -> str:
+    return response.headers['etag'].strip('"').partition('-')[0]
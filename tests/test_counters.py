@@ -0,0 +1,54 @@
+import pytest
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models, repositories
+
+pytestmark = pytest.mark.anyio
+
+
+class TestCounters:
+    async def test_counters_are_maintained(
+            self,
+            session: AsyncSession,
+            dish: models.Dish,
+            menu_repository: repositories.MenuRepository,
+            submenu_repository: repositories.SubmenuRepository
+    ) -> None:
+        submenu = await submenu_repository.get(dish.submenu_id)
+        menu = await menu_repository.get(submenu.menu_id)
+        await session.refresh(submenu)
+        await session.refresh(menu)
+
+        assert submenu.dishes_count == 1
+        assert menu.submenus_count == 1
+        assert menu.dishes_count == 1
+
+        counters = repositories.CountersRepository(session)
+        assert await counters.find_mismatches() == []
+
+    async def test_repair_counters(
+            self,
+            session: AsyncSession,
+            dish: models.Dish,
+            submenu: models.Submenu
+    ) -> None:
+        await session.execute(
+            update(models.Submenu).values(dishes_count=5)
+        )
+        await session.execute(
+            update(models.Menu).values(submenus_count=0, dishes_count=7)
+        )
+        await session.commit()
+
+        counters = repositories.CountersRepository(session)
+        mismatches = await counters.find_mismatches()
+        assert {mismatch.table for mismatch in mismatches} == {
+            'menus', 'submenus'
+        }
+
+        await counters.repair()
+        assert await counters.find_mismatches() == []
+
+        await session.refresh(submenu)
+        assert submenu.dishes_count == 1
@@ -1,20 +1,29 @@
-from uuid import UUID
+from uuid import UUID, uuid4
+
+import pytest
+from httpx import AsyncClient
+from redis.asyncio import Redis  # type: ignore
 
 from app import models, schemas, services
+from app.cache import MENUS, menu_namespace, submenu_namespace, version_key
+from app.pagination import PageParams
 from app.utils import reverse
-from tests.conftest import client
+
+pytestmark = pytest.mark.anyio
 
 
 class TestDishRouts:
-    def test_read_dishes_success(
+    async def test_read_dishes_success(
             self,
+            client: AsyncClient,
+            submenu: models.Submenu,
             dish: models.Dish,
             dish_service: services.DishService
     ) -> None:
-        response = client.get(
+        response = await client.get(
             reverse(
                 'read_dishes',
-                menu_id=dish.submenu.menu.id,
+                menu_id=submenu.menu_id,
                 submenu_id=dish.submenu_id
             ),
         )
@@ -22,18 +31,22 @@ class TestDishRouts:
         assert response.status_code == 200
         data = response.json()
 
-        db_dishes = dish_service.get_all(dish.submenu_id)
-        assert len(data) == len(db_dishes) == 1
+        db_dishes = await dish_service.get_all(
+            submenu.menu_id, dish.submenu_id, PageParams()
+        )
+        assert len(data) == len(db_dishes.items) == 1
 
-    def test_read_dish_success(
+    async def test_read_dish_success(
             self,
+            client: AsyncClient,
+            submenu: models.Submenu,
             dish: models.Dish,
             dish_service: services.DishService
     ) -> None:
-        response = client.get(
+        response = await client.get(
             reverse(
                 'read_dish',
-                menu_id=dish.submenu.menu.id,
+                menu_id=submenu.menu_id,
                 submenu_id=dish.submenu_id,
                 dish_id=dish.id
             ),
@@ -42,9 +55,9 @@ class TestDishRouts:
         dish_data = response.json()
         assert 'id' in dish_data
 
-        db_dish = dish_service.get(
-            dish.submenu.menu.id,
-            dish.submenu.id,
+        db_dish = await dish_service.get(
+            submenu.menu_id,
+            dish.submenu_id,
             dish.id,
         )
         assert db_dish is not None
@@ -53,15 +66,16 @@ class TestDishRouts:
         assert dish_data['description'] == db_dish.description
         assert dish_data['price'] == db_dish.price
 
-    def test_create_dish_success(
+    async def test_create_dish_success(
             self,
+            client: AsyncClient,
             submenu: models.Submenu,
             dish_service: services.DishService
     ) -> None:
-        response = client.post(
+        response = await client.post(
             reverse(
                 'create_dish',
-                menu_id=submenu.menu.id,
+                menu_id=submenu.menu_id,
                 submenu_id=submenu.id,
             ),
             json={
@@ -74,8 +88,8 @@ class TestDishRouts:
         dish_data = response.json()
         assert 'id' in dish_data
 
-        db_dish = dish_service.get(
-            submenu.menu.id,
+        db_dish = await dish_service.get(
+            submenu.menu_id,
             submenu.id,
             UUID(dish_data['id']),
         )
@@ -85,14 +99,90 @@ class TestDishRouts:
         assert dish_data['description'] == db_dish.description
         assert dish_data['price'] == db_dish.price
 
-    def test_update_dish_success(
+    async def test_create_dish_bumps_versions(
+            self,
+            client: AsyncClient,
+            submenu: models.Submenu,
+            dish_service: services.DishService
+    ) -> None:
+        namespaces = (
+            MENUS,
+            menu_namespace(submenu.menu_id),
+            submenu_namespace(submenu.id)
+        )
+        versions = [
+            await dish_service.cache.version(namespace)
+            for namespace in namespaces
+        ]
+
+        response = await client.get(
+            reverse(
+                'read_dishes',
+                menu_id=submenu.menu_id,
+                submenu_id=submenu.id
+            )
+        )
+        assert response.json() == []
+
+        response = await client.post(
+            reverse(
+                'create_dish',
+                menu_id=submenu.menu_id,
+                submenu_id=submenu.id,
+            ),
+            json={
+                'title': 'Dish 1',
+                'description': 'Dish 1 description',
+                'price': '15.47'
+            }
+        )
+        assert response.status_code == 201
+
+        for namespace, version in zip(namespaces, versions):
+            assert await dish_service.cache.version(namespace) == version + 1
+
+        response = await client.get(
+            reverse(
+                'read_dishes',
+                menu_id=submenu.menu_id,
+                submenu_id=submenu.id
+            )
+        )
+        assert len(response.json()) == 1
+
+    async def test_missing_dish_leaves_no_versions(
             self,
+            client: AsyncClient,
+            cache_conn: Redis,
+            session
+    ) -> None:
+        menu_id, submenu_id = uuid4(), uuid4()
+
+        response = await client.get(
+            reverse(
+                'read_dish',
+                menu_id=menu_id,
+                submenu_id=submenu_id,
+                dish_id=uuid4()
+            )
+        )
+
+        assert response.status_code == 404
+        assert not await cache_conn.exists(
+            version_key(menu_namespace(menu_id)),
+            version_key(submenu_namespace(submenu_id))
+        )
+
+    async def test_update_dish_success(
+            self,
+            client: AsyncClient,
+            submenu: models.Submenu,
             dish: models.Dish
     ) -> None:
-        response = client.patch(
+        response = await client.patch(
             reverse(
                 'update_dish',
-                menu_id=dish.submenu.menu.id,
+                menu_id=submenu.menu_id,
                 submenu_id=dish.submenu_id,
                 dish_id=dish.id
             ),
@@ -107,10 +197,10 @@ class TestDishRouts:
         assert dish_data['title'] == 'Updated Dish 1'
         assert dish_data['description'] == 'Updated Dish 1 description'
 
-        response = client.get(
+        response = await client.get(
             reverse(
                 'read_dish',
-                menu_id=dish.submenu.menu.id,
+                menu_id=submenu.menu_id,
                 submenu_id=dish.submenu_id,
                 dish_id=dish.id
             ),
@@ -121,8 +211,9 @@ class TestDishRouts:
         assert dish_data['title'] == 'Updated Dish 1'
         assert dish_data['description'] == 'Updated Dish 1 description'
 
-    def test_delete_dish_success(
+    async def test_delete_dish_success(
             self,
+            client: AsyncClient,
             menu: models.Menu,
             submenu: models.Submenu,
             dish_service: services.DishService
@@ -133,16 +224,16 @@ class TestDishRouts:
             'price': '12.50'
         }
 
-        dish = dish_service.create(
+        dish = await dish_service.create(
             menu.id,
             submenu.id,
             schemas.DishCreate(**dish_data)
         )
 
-        response = client.delete(
+        response = await client.delete(
             reverse(
                 'delete_dish',
-                menu_id=dish.submenu.menu.id,
+                menu_id=submenu.menu_id,
                 submenu_id=dish.submenu_id,
                 dish_id=dish.id
             ),
@@ -155,10 +246,10 @@ class TestDishRouts:
         assert dish_data['description'] == dish.description
         assert dish_data['price'] == dish.price
 
-        response = client.get(
+        response = await client.get(
             reverse(
                 'read_dish',
-                menu_id=dish.submenu.menu.id,
+                menu_id=submenu.menu_id,
                 submenu_id=dish.submenu_id,
                 dish_id=dish.id
             )
@@ -0,0 +1,63 @@
+import pytest
+from httpx import AsyncClient
+
+from app import models
+from app.utils import reverse
+
+pytestmark = pytest.mark.anyio
+
+
+class TestETag:
+    async def test_matching_etag_gets_not_modified(
+            self,
+            client: AsyncClient,
+            menu: models.Menu,
+            count_queries
+    ) -> None:
+        url = reverse('read_menu', menu_id=menu.id)
+        response = await client.get(url)
+        assert response.status_code == 200
+        etag = response.headers['etag']
+
+        with count_queries() as statements:
+            response = await client.get(url, headers={'If-None-Match': etag})
+
+        assert response.status_code == 304
+        assert response.content == b''
+        assert response.headers['etag'] == etag
+        assert statements == []
+
+    async def test_write_changes_etag(
+            self,
+            client: AsyncClient,
+            menu: models.Menu,
+            submenu: models.Submenu
+    ) -> None:
+        url = reverse('read_dishes', menu_id=menu.id, submenu_id=submenu.id)
+        response = await client.get(url)
+        etag = response.headers['etag']
+
+        response = await client.post(
+            url,
+            json={'title': 'Dish', 'description': 'Dish', 'price': '1.00'}
+        )
+        assert response.status_code == 201
+
+        response = await client.get(url, headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.headers['etag'] != etag
+        assert len(response.json()) == 1
+
+    async def test_tree_etag(
+            self,
+            client: AsyncClient,
+            menu: models.Menu
+    ) -> None:
+        url = reverse('read_menus_tree')
+        response = await client.get(url)
+        etag = response.headers['etag']
+
+        response = await client.get(
+            url, headers={'If-None-Match': f'"0", W/{etag}'}
+        )
+        assert response.status_code == 304
@@ -0,0 +1,75 @@
+import asyncio
+import time
+
+import pytest
+from redis.asyncio import Redis  # type: ignore
+
+from app import cache, models, repositories, schemas, services
+from app.local_cache import LocalCache, listen_invalidations
+
+pytestmark = pytest.mark.anyio
+
+
+class TestLocalCache:
+    def test_evicts_least_recently_used(self) -> None:
+        local = LocalCache(max_size=2, ttl=60)
+        local.set('a', b'1', local.generation)
+        local.set('b', b'2', local.generation)
+        assert local.get('a') == b'1'
+
+        local.set('c', b'3', local.generation)
+        assert local.get('b') is None
+        assert local.get('a') == b'1'
+        assert local.get('c') == b'3'
+
+    def test_expires_entries(self, monkeypatch) -> None:
+        local = LocalCache(max_size=2, ttl=5)
+        local.set('a', b'1', local.generation)
+
+        now = time.monotonic()
+        monkeypatch.setattr(time, 'monotonic', lambda: now + 6)
+        assert local.get('a') is None
+
+    def test_ignores_values_read_before_drop(self) -> None:
+        local = LocalCache(max_size=2, ttl=60)
+        generation = local.generation
+
+        local.drop(['a'])
+        local.set('a', b'1', generation)
+        assert local.get('a') is None
+
+    async def test_drops_versions_bumped_by_other_workers(
+            self,
+            cache_conn: Redis,
+            menu: models.Menu,
+            menu_repository: repositories.MenuRepository
+    ) -> None:
+        local = LocalCache(max_size=100, ttl=60)
+        menu_namespace = cache.menu_namespace(menu.id)
+        listener = asyncio.create_task(listen_invalidations(cache_conn, local))
+        # A worker without a local cache stands for any other worker.
+        other = services.MenuService(
+            cache.MenuCache(cache_conn, None),
+            menu_repository
+        )
+        service = services.MenuService(
+            cache.MenuCache(cache_conn, local),
+            menu_repository
+        )
+
+        try:
+            await asyncio.sleep(0.1)
+            # Loaded from the database, read from Redis, then served locally.
+            for _ in range(3):
+                await service.get(menu.id)
+            assert local.stats.hits == 1
+
+            await other.update(menu.id, schemas.MenuUpdate(title='Menu 2'))
+            for _ in range(50):
+                if cache.version_key(menu_namespace) not in local.entries:
+                    break
+                await asyncio.sleep(0.01)
+
+            assert (await service.get(menu.id)).title == 'Menu 2'
+        finally:
+            listener.cancel()
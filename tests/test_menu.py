@@ -1,48 +1,147 @@
 from uuid import UUID
 
+import pytest
+from httpx import AsyncClient
+from redis.asyncio import Redis  # type: ignore
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from app import models, schemas, services
+from app.cache import MENUS, VERSION_TTL, menu_namespace, menu_tag, version_key
+from app.config import settings
+from app.pagination import PageParams
 from app.utils import reverse
-from tests.conftest import client
+
+pytestmark = pytest.mark.anyio
 
 
 class TestMenuRouts:
-    def test_read_menus_success(
+    async def test_read_menus_success(
             self,
+            client: AsyncClient,
             menu: models.Menu,
             menu_service: services.MenuService) -> None:
-        response = client.get(
+        response = await client.get(
             reverse('read_menus')
         )
 
         assert response.status_code == 200
         data = response.json()
 
-        menus = menu_service.get_all()
-        assert len(data) == len(menus) == 1
+        menus = await menu_service.get_all(PageParams())
+        assert len(data) == len(menus.items) == 1
+
+    async def test_read_menus_paginated(
+            self,
+            client: AsyncClient,
+            session: AsyncSession
+    ) -> None:
+        for i in range(3):
+            response = await client.post(
+                reverse('create_menu'),
+                json={
+                    'title': f'Menu {i}',
+                    'description': f'Menu {i} description'
+                }
+            )
+            assert response.status_code == 201
+
+        response = await client.get(reverse('read_menus'))
+        assert response.status_code == 200
+        assert len(response.json()) == 3
+        assert 'x-next-cursor' not in response.headers
+
+        response = await client.get(reverse('read_menus'), params={'limit': 2})
+        assert response.status_code == 200
+        first_page = response.json()
+        cursor = response.headers['x-next-cursor']
+        assert len(first_page) == 2
+
+        response = await client.get(
+            reverse('read_menus'),
+            params={'limit': 2, 'cursor': cursor}
+        )
+        assert response.status_code == 200
+        second_page = response.json()
+        assert len(second_page) == 1
+        assert 'x-next-cursor' not in response.headers
+
+        ids = {menu['id'] for menu in first_page}
+        assert second_page[0]['id'] not in ids
+
+        response = await client.get(
+            reverse('read_menus'),
+            params={'cursor': 'not a cursor'}
+        )
+        assert response.status_code == 400
+
+        response = await client.get(reverse('read_menus'), params={'limit': 0})
+        assert response.status_code == 422
+
+    async def test_read_menus_from_cache(
+            self,
+            client: AsyncClient,
+            menu: models.Menu,
+            count_queries
+    ) -> None:
+        response = await client.get(reverse('read_menus'))
+        assert response.status_code == 200
+
+        with count_queries() as statements:
+            cached_response = await client.get(reverse('read_menus'))
+
+        assert cached_response.status_code == 200
+        assert cached_response.headers['content-type'] == 'application/json'
+        assert cached_response.json() == response.json()
+        assert statements == []
 
-    def test_read_menu_success(
+    async def test_cached_keys_expire(
             self,
+            client: AsyncClient,
+            menu: models.Menu,
+            menu_service: services.MenuService,
+            cache_conn: Redis
+    ) -> None:
+        await client.get(reverse('read_menus'))
+        await client.get(reverse('read_menu', menu_id=menu.id))
+
+        for key, namespace, ttl in (
+            ('menus_list', MENUS, settings.cache_ttl_list),
+            (str(menu.id), menu_namespace(menu.id), settings.cache_ttl_entity),
+        ):
+            version = await menu_service.cache.version(namespace)
+            expires_in = await cache_conn.ttl(f'{key}:v{version}')
+            jitter = ttl * settings.cache_ttl_jitter
+            assert ttl - jitter - 1 <= expires_in <= ttl + jitter + 1
+
+            # The version outlives the keys stored under it.
+            expires_in = await cache_conn.ttl(version_key(namespace))
+            assert ttl + jitter < expires_in <= VERSION_TTL
+
+    async def test_read_menu_success(
+            self,
+            client: AsyncClient,
             menu: models.Menu,
             menu_service: services.MenuService
     ) -> None:
-        response = client.get(
+        response = await client.get(
             reverse('read_menu', menu_id=menu.id)
         )
         assert response.status_code == 200
         menu_data = response.json()
         assert 'id' in menu_data
 
-        menu = menu_service.get(UUID(menu_data['id']))
+        menu = await menu_service.get(UUID(menu_data['id']))
         assert menu is not None
 
         assert menu_data['title'] == menu.title
         assert menu_data['description'] == menu.description
 
-    def test_create_menu_success(
+    async def test_create_menu_success(
             self,
+            client: AsyncClient,
             menu_service: services.MenuService
     ) -> None:
-        response = client.post(
+        response = await client.post(
             reverse('create_menu'),
             json={
                 'title': 'Menu 1',
@@ -53,14 +152,18 @@ class TestMenuRouts:
         menu_data = response.json()
         assert 'id' in menu_data
 
-        menu = menu_service.get(UUID(menu_data['id']))
+        menu = await menu_service.get(UUID(menu_data['id']))
         assert menu is not None
 
         assert menu_data['title'] == menu.title == 'Menu 1'
         assert menu_data['description'] == menu.description == 'Menu 1 description'
 
-    def test_update_menu_success(self, menu: models.Menu) -> None:
-        response = client.patch(
+    async def test_update_menu_success(
+            self,
+            client: AsyncClient,
+            menu: models.Menu
+    ) -> None:
+        response = await client.patch(
             reverse('update_menu', menu_id=menu.id),
             json={
                 'title': 'Updated Menu 1',
@@ -73,7 +176,7 @@ class TestMenuRouts:
         assert menu_data['title'] == 'Updated Menu 1'
         assert menu_data['description'] == 'Updated Menu 1 description'
 
-        response = client.get(
+        response = await client.get(
             reverse('read_menu', menu_id=menu.id)
         )
         assert response.status_code == 200
@@ -83,8 +186,9 @@ class TestMenuRouts:
         assert menu_data['title'] == 'Updated Menu 1'
         assert menu_data['description'] == 'Updated Menu 1 description'
 
-    def test_delete_menu_success(
+    async def test_delete_menu_success(
             self,
+            client: AsyncClient,
             menu_service: services.MenuService
     ) -> None:
         menu_data = {
@@ -92,11 +196,11 @@ class TestMenuRouts:
             'description': 'Menu 1 description'
         }
 
-        menu = menu_service.create(
+        menu = await menu_service.create(
             schemas.MenuCreate(**menu_data)
         )
 
-        response = client.delete(
+        response = await client.delete(
             reverse('delete_menu', menu_id=menu.id)
         )
         assert response.status_code == 200
@@ -106,7 +210,83 @@ class TestMenuRouts:
         assert menu_data['title'] == menu.title
         assert menu_data['description'] == menu.description
 
-        response = client.get(
+        response = await client.get(
             reverse('read_menu', menu_id=menu.id)
         )
         assert response.status_code == 404
+
+    async def test_delete_menu_drops_cached_children(
+            self,
+            client: AsyncClient,
+            session: AsyncSession,
+            cache_conn: Redis
+    ) -> None:
+        response = await client.post(
+            reverse('create_menus_bulk'),
+            json=[{
+                'title': 'Menu 1',
+                'description': 'Menu 1 description',
+                'submenus': [{
+                    'title': 'Submenu 1',
+                    'description': 'Submenu 1 description',
+                    'dishes': [{
+                        'title': 'Dish 1',
+                        'description': 'Dish 1 description',
+                        'price': '12.50'
+                    }]
+                }]
+            }]
+        )
+        menu = response.json()[0]
+        submenu = menu['submenus'][0]
+        ids = {
+            'menu_id': menu['id'],
+            'submenu_id': submenu['id'],
+            'dish_id': submenu['dishes'][0]['id']
+        }
+
+        await client.get(reverse('read_menu', menu_id=ids['menu_id']))
+        await client.get(reverse('read_submenus', menu_id=ids['menu_id']))
+        await client.get(reverse(
+            'read_submenu',
+            menu_id=ids['menu_id'],
+            submenu_id=ids['submenu_id']
+        ))
+        await client.get(reverse(
+            'read_dishes',
+            menu_id=ids['menu_id'],
+            submenu_id=ids['submenu_id']
+        ))
+        await client.get(reverse('read_dish', **ids))
+        await client.get(reverse('read_menu_tree', menu_id=ids['menu_id']))
+
+        tag = menu_tag(UUID(ids['menu_id']))
+        keys = [
+            f'{key.decode()}:v{version.decode()}'
+            for key, version in (await cache_conn.hgetall(tag)).items()
+        ]
+        assert len(keys) == 6
+
+        response = await client.delete(
+            reverse('delete_menu', menu_id=ids['menu_id'])
+        )
+        assert response.status_code == 200
+        assert await cache_conn.exists(*keys) == 0
+        assert not await cache_conn.exists(tag)
+
+    async def test_rewrites_do_not_grow_tags(
+            self,
+            client: AsyncClient,
+            menu: models.Menu,
+            cache_conn: Redis
+    ) -> None:
+        for i in range(5):
+            await client.patch(
+                reverse('update_menu', menu_id=menu.id),
+                json={'title': f'Renamed {i}'}
+            )
+            await client.get(reverse('read_menu', menu_id=menu.id))
+
+        assert await cache_conn.hkeys(menu_tag(menu.id)) == [
+            str(menu.id).encode()
+        ]
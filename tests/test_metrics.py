@@ -0,0 +1,76 @@
+import pytest
+from httpx import AsyncClient
+
+from app import models
+from app.utils import reverse
+
+pytestmark = pytest.mark.anyio
+
+
+class TestMetricsRouts:
+    async def test_read_db_pool_stats_success(
+            self,
+            client: AsyncClient,
+            menu: models.Menu
+    ) -> None:
+        response = await client.get(reverse('read_menus'))
+        assert response.status_code == 200
+
+        response = await client.get(reverse('read_db_pool_stats'))
+        assert response.status_code == 200
+        stats = response.json()
+
+        assert stats['checkouts'] >= 1
+        assert stats['checked_out'] >= 0
+        assert stats['wait_time_max'] >= 0
+
+    async def test_read_cache_memory_stats_success(
+            self,
+            client: AsyncClient,
+            menu: models.Menu
+    ) -> None:
+        response = await client.get(reverse('read_menu', menu_id=menu.id))
+        assert response.status_code == 200
+
+        response = await client.get(reverse('read_cache_memory_stats'))
+        assert response.status_code == 200
+        stats = response.json()
+
+        assert stats['used_memory'] > 0
+        assert stats['keys'] >= 1
+        assert stats['eviction_policy']
+
+    async def test_read_cache_stats_success(
+            self,
+            client: AsyncClient,
+            menu: models.Menu
+    ) -> None:
+        await client.get(reverse('read_menu', menu_id=menu.id))
+        await client.get(reverse('read_menu', menu_id=menu.id))
+
+        response = await client.get(reverse('read_cache_stats'))
+        assert response.status_code == 200
+        stats = response.json()
+
+        assert stats['redis']['hits'] >= 1
+        assert stats['redis']['misses'] >= 1
+        assert 0 < stats['redis']['hit_rate'] < 1
+
+    async def test_read_cache_invalidation_stats_success(
+            self,
+            client: AsyncClient,
+            menu: models.Menu
+    ) -> None:
+        response = await client.patch(
+            reverse('update_menu', menu_id=menu.id),
+            json={'title': 'Menu 2'}
+        )
+        assert response.status_code == 200
+
+        response = await client.get(reverse('read_cache_invalidation_stats'))
+        assert response.status_code == 200
+        stats = response.json()
+
+        assert stats['invalidations'] >= 1
+        assert 0 < stats['time_last'] <= stats['time_max']
+        assert stats['time_max'] <= stats['time_total']
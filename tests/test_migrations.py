@@ -0,0 +1,151 @@
+import uuid
+from collections.abc import AsyncGenerator
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import (
+    Column,
+    Connection,
+    ForeignKey,
+    MetaData,
+    String,
+    Table,
+    Text,
+    Uuid,
+    delete,
+    func,
+    select,
+    text,
+)
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app import models
+from app.database import engine
+
+pytestmark = pytest.mark.anyio
+
+SCHEMA = 'migrations_check'
+
+# The tables as the first `create_all` made them.
+BASELINE = MetaData()
+BASELINE_MENUS = Table(
+    'menus', BASELINE,
+    Column('id', Uuid, primary_key=True, unique=True),
+    Column('title', String, unique=True),
+    Column('description', Text)
+)
+BASELINE_SUBMENUS = Table(
+    'submenus', BASELINE,
+    Column('id', Uuid, primary_key=True, unique=True),
+    Column('title', String, unique=True),
+    Column('description', Text),
+    Column('menu_id', Uuid, ForeignKey('menus.id'))
+)
+BASELINE_DISHES = Table(
+    'dishes', BASELINE,
+    Column('id', Uuid, primary_key=True, unique=True),
+    Column('title', String, unique=True),
+    Column('description', Text),
+    Column('price', String),
+    Column('submenu_id', Uuid, ForeignKey('submenus.id'))
+)
+
+
+def migrate(connection: Connection, revision: str) -> None:
+    config = Config(Path(__file__).parents[1] / 'alembic.ini')
+    config.attributes['connection'] = connection
+    if revision == 'base':
+        command.downgrade(config, revision)
+    else:
+        command.upgrade(config, revision)
+
+
+def schema_diff(connection: Connection) -> list:
+    context = MigrationContext.configure(
+        connection,
+        opts={'include_object': models.include_object(connection)}
+    )
+    return compare_metadata(context, models.Base.metadata)
+
+
+async def count_tables(conn: AsyncConnection) -> int:
+    return await conn.scalar(text(
+        f"SELECT count(*) FROM pg_tables WHERE schemaname = '{SCHEMA}'"
+    ))
+
+
+@pytest.fixture()
+async def conn(client) -> AsyncGenerator[AsyncConnection, None]:
+    """Connection working in a schema of its own."""
+    async with engine.connect() as conn:
+        await conn.execute(text(f'DROP SCHEMA IF EXISTS {SCHEMA} CASCADE'))
+        await conn.execute(text(f'CREATE SCHEMA {SCHEMA}'))
+        # Extensions, e.g. pg_trgm, are installed in public.
+        await conn.execute(text(f'SET search_path TO {SCHEMA}, public'))
+        yield conn
+        await conn.rollback()
+        await conn.execute(text('RESET search_path'))
+        await conn.execute(text(f'DROP SCHEMA IF EXISTS {SCHEMA} CASCADE'))
+        await conn.commit()
+
+
+class TestMigrations:
+    async def test_migrations_match_models(
+            self,
+            conn: AsyncConnection
+    ) -> None:
+        await conn.run_sync(migrate, 'head')
+
+        assert await conn.run_sync(schema_diff) == []
+        triggers = await conn.scalar(text(
+            'SELECT count(*) FROM pg_trigger WHERE NOT tgisinternal '
+            'AND tgrelid IN (SELECT oid FROM pg_class '
+            f"WHERE relnamespace = '{SCHEMA}'::regnamespace)"
+        ))
+        assert triggers == 4
+
+        await conn.run_sync(migrate, 'base')
+        # Only the table keeping the revision is left.
+        assert await count_tables(conn) == 1
+
+    async def test_upgrade_database_made_by_create_all(
+            self,
+            conn: AsyncConnection
+    ) -> None:
+        await conn.run_sync(BASELINE.create_all)
+        menu_id, submenu_id = uuid.uuid4(), uuid.uuid4()
+        await conn.execute(BASELINE_MENUS.insert().values(
+            id=menu_id, title='Menu', description=''
+        ))
+        await conn.execute(BASELINE_SUBMENUS.insert().values(
+            id=submenu_id, title='Submenu', description='', menu_id=menu_id
+        ))
+        await conn.execute(BASELINE_DISHES.insert(), [
+            {'id': uuid.uuid4(), 'title': 'Dish 1', 'description': '',
+             'price': '12,5', 'submenu_id': submenu_id},
+            {'id': uuid.uuid4(), 'title': 'Dish 2', 'description': '',
+             'price': '7', 'submenu_id': submenu_id},
+        ])
+
+        await conn.run_sync(migrate, 'head')
+
+        assert await conn.run_sync(schema_diff) == []
+        assert await count_tables(conn) == 5
+
+        menu = (await conn.execute(select(models.Menu))).one()
+        assert (menu.submenus_count, menu.dishes_count) == (1, 2)
+        submenu = (await conn.execute(select(models.Submenu))).one()
+        assert submenu.dishes_count == 2
+        prices = await conn.scalars(
+            select(models.Dish.price).order_by(models.Dish.title)
+        )
+        assert prices.all() == ['12.50', '7.00']
+
+        await conn.execute(delete(models.Menu))
+        for model in (models.Submenu, models.Dish):
+            count = select(func.count()).select_from(model)
+            assert await conn.scalar(count) == 0
@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import cache, models, schemas, services
+from app.notifications import invalidation, listener_stats
+from app.utils import reverse
+
+pytestmark = pytest.mark.anyio
+
+
+async def wait_for_notifications(count: int) -> None:
+    for _ in range(100):
+        if listener_stats.notifications >= count:
+            return
+        await asyncio.sleep(0.02)
+    raise AssertionError('notification was not applied')
+
+
+class TestNotifications:
+    def test_dish_invalidates_its_submenu_and_menu(self) -> None:
+        menu_id = 'a1dd0e2d-34d6-4c31-a7b2-2a8b8f1f1a01'
+        submenu_id = 'b1dd0e2d-34d6-4c31-a7b2-2a8b8f1f1a02'
+
+        namespaces, tags = invalidation({
+            'table': 'dishes',
+            'op': 'DELETE',
+            'id': 'c1dd0e2d-34d6-4c31-a7b2-2a8b8f1f1a03',
+            'menu_id': menu_id,
+            'submenu_id': submenu_id,
+        })
+
+        assert namespaces == {
+            cache.MENUS,
+            f'menu:{menu_id}',
+            f'submenu:{submenu_id}',
+        }
+        assert tags == set()
+
+    async def test_sql_write_invalidates_cache(
+            self,
+            client: AsyncClient,
+            session: AsyncSession,
+            menu: models.Menu
+    ) -> None:
+        url = reverse('read_menu', menu_id=menu.id)
+        await client.get(url)
+        notifications = listener_stats.notifications
+
+        await session.execute(
+            text("UPDATE menus SET title = 'Fixed' WHERE id = :id"),
+            {'id': menu.id}
+        )
+        await session.commit()
+        await wait_for_notifications(notifications + 1)
+
+        response = await client.get(url)
+        assert response.json()['title'] == 'Fixed'
+
+        response = await client.get(reverse('read_cache_notification_stats'))
+        stats = response.json()
+        assert stats['listening']
+        assert 0 <= stats['lag_last'] <= stats['lag_max']
+
+    async def test_service_write_is_not_announced(
+            self,
+            session: AsyncSession,
+            menu: models.Menu,
+            menu_service: services.MenuService
+    ) -> None:
+        notifications = listener_stats.notifications
+        await menu_service.update(menu.id, schemas.MenuUpdate(title='Menu 2'))
+
+        # Notifications arrive in commit order, so once this one is
+        # applied the one of the service write would have been too.
+        await session.execute(
+            text("UPDATE menus SET description = 'Fixed' WHERE id = :id"),
+            {'id': menu.id}
+        )
+        await session.commit()
+        await wait_for_notifications(notifications + 1)
+        await asyncio.sleep(0.1)
+
+        assert listener_stats.notifications == notifications + 1
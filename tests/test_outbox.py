@@ -0,0 +1,59 @@
+import pytest
+from redis.exceptions import RedisError  # type: ignore
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import cache, models, outbox, schemas, services
+from app.config import settings
+
+pytestmark = pytest.mark.anyio
+
+
+async def count_events(session: AsyncSession) -> int:
+    return await session.scalar(
+        select(func.count()).select_from(models.CacheOutbox)
+    )
+
+
+class TestOutbox:
+    async def test_dispatch_applies_deferred_invalidation(
+            self,
+            session: AsyncSession,
+            menu: models.Menu,
+            menu_service: services.MenuService,
+            monkeypatch
+    ) -> None:
+        monkeypatch.setattr(settings, 'cache_outbox_inline', False)
+        namespace = cache.menu_namespace(menu.id)
+        version = await menu_service.cache.version(namespace)
+
+        await menu_service.update(menu.id, schemas.MenuUpdate(title='Menu 2'))
+        await outbox.dispatch(menu_service.cache)
+
+        assert await menu_service.cache.version(namespace) > version
+        assert await count_events(session) == 0
+
+    async def test_failed_bump_is_left_to_dispatcher(
+            self,
+            session: AsyncSession,
+            menu: models.Menu,
+            menu_service: services.MenuService,
+            monkeypatch
+    ) -> None:
+        namespace = cache.menu_namespace(menu.id)
+        version = await menu_service.cache.version(namespace)
+
+        async def bump(*args, **kwargs) -> None:
+            raise RedisError('connection refused')
+
+        monkeypatch.setattr(menu_service.cache, 'bump', bump)
+        updated = await menu_service.update(
+            menu.id, schemas.MenuUpdate(title='Menu 2')
+        )
+        assert updated.title == 'Menu 2'
+
+        monkeypatch.undo()
+        await outbox.dispatch(menu_service.cache)
+
+        assert await menu_service.cache.version(namespace) > version
+        assert await count_events(session) == 0
@@ -0,0 +1,123 @@
+import pytest
+from httpx import AsyncClient
+
+from app import cache, models, schemas, services
+from app.utils import reverse
+
+pytestmark = pytest.mark.anyio
+
+PRICES = ['7.00', '12.50', '3.25', '10.00', '99.90']
+
+
+@pytest.fixture()
+async def dishes(
+        submenu: models.Submenu,
+        dish_service: services.DishService
+) -> list[models.Dish]:
+    # Lists cached by earlier tests may hold dishes deleted since.
+    await dish_service.cache.bump(cache.MENUS)
+    return [
+        await dish_service.create(
+            submenu.menu_id, submenu.id,
+            schemas.DishCreate(
+                title=f'Dish {price}', description='', price=price
+            )
+        )
+        for price in PRICES
+    ]
+
+
+class TestPriceFilters:
+    async def test_filter_and_sort_by_price(
+            self,
+            client: AsyncClient,
+            submenu: models.Submenu,
+            dishes: list[models.Dish]
+    ) -> None:
+        response = await client.get(
+            reverse(
+                'read_dishes', menu_id=submenu.menu_id, submenu_id=submenu.id
+            ),
+            params={'min_price': '5', 'max_price': '50', 'sort': 'price'}
+        )
+
+        assert response.status_code == 200
+        assert [item['price'] for item in response.json()] == [
+            '7.00', '10.00', '12.50'
+        ]
+
+    async def test_pages_ordered_by_price(
+            self,
+            client: AsyncClient,
+            submenu: models.Submenu,
+            dishes: list[models.Dish]
+    ) -> None:
+        url = reverse(
+            'read_dishes', menu_id=submenu.menu_id, submenu_id=submenu.id
+        )
+        prices: list[str] = []
+        params = {'sort': 'price', 'limit': 2}
+
+        while True:
+            response = await client.get(url, params=params)
+            prices.extend(item['price'] for item in response.json())
+            if 'x-next-cursor' not in response.headers:
+                break
+            params['cursor'] = response.headers['x-next-cursor']
+
+        assert prices == sorted(PRICES, key=float)
+
+    async def test_dishes_of_all_menus(
+            self,
+            client: AsyncClient,
+            dishes: list[models.Dish]
+    ) -> None:
+        response = await client.get(
+            reverse('read_all_dishes'),
+            params={'max_price': '10', 'sort': 'price'}
+        )
+
+        assert response.status_code == 200
+        assert [item['price'] for item in response.json()] == [
+            '3.25', '7.00', '10.00'
+        ]
+
+    async def test_equal_filters_share_cached_page(
+            self,
+            client: AsyncClient,
+            dishes: list[models.Dish],
+            count_queries
+    ) -> None:
+        url = reverse('read_all_dishes')
+        first = await client.get(url, params={'min_price': '10'})
+
+        with count_queries() as statements:
+            second = await client.get(url, params={'min_price': '10.00'})
+
+        assert statements == []
+        assert second.json() == first.json()
+
+    @pytest.mark.parametrize('params', [
+        {'min_price': 'abc'},
+        {'max_price': '-1'},
+        {'sort': 'title'},
+    ])
+    async def test_invalid_filter(
+            self,
+            client: AsyncClient,
+            params: dict
+    ) -> None:
+        response = await client.get(reverse('read_all_dishes'), params=params)
+
+        assert response.status_code == 422
+
+    async def test_min_price_above_max_price(
+            self,
+            client: AsyncClient
+    ) -> None:
+        response = await client.get(
+            reverse('read_all_dishes'),
+            params={'min_price': '20', 'max_price': '10'}
+        )
+
+        assert response.status_code == 400
@@ -0,0 +1,147 @@
+import pytest
+from httpx import AsyncClient
+from redis.asyncio import Redis  # type: ignore
+
+from app import models, schemas
+from app.utils import reverse
+
+pytestmark = pytest.mark.anyio
+
+CATALOG = [{
+    'title': 'Основное меню',
+    'description': '',
+    'submenus': [
+        {
+            'title': 'Супы',
+            'description': 'Горячие первые блюда',
+            'dishes': [
+                {
+                    'title': 'Борщ',
+                    'description': 'Суп из свёклы',
+                    'price': '250'
+                },
+                {
+                    'title': 'Солянка',
+                    'description': 'Густой суп с копчёностями',
+                    'price': '300'
+                },
+            ]
+        },
+        {
+            'title': 'Напитки',
+            'description': 'Морсы и чай',
+            'dishes': [
+                {'title': 'Морс', 'description': 'Клюквенный', 'price': '90'},
+            ]
+        },
+    ]
+}]
+
+
+@pytest.fixture()
+async def catalog(
+        client: AsyncClient,
+        session
+) -> list[schemas.MenuTree]:
+    response = await client.post(reverse('create_menus_bulk'), json=CATALOG)
+    return [schemas.MenuTree(**menu) for menu in response.json()]
+
+
+async def search(client: AsyncClient, **params) -> list[dict]:
+    response = await client.get(reverse('search'), params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+class TestSearch:
+    async def test_hits_are_ranked_with_their_path(
+            self,
+            client: AsyncClient,
+            catalog: list[schemas.MenuTree]
+    ) -> None:
+        data = await search(client, q='супы')
+        menu = catalog[0]
+        soups = menu.submenus[0]
+
+        # Titles weigh more than descriptions.
+        assert [hit['title'] for hit in data][0] == 'Супы'
+        assert {hit['title'] for hit in data} >= {
+            'Супы', 'Борщ', 'Солянка'
+        }
+        dish = next(
+            hit for hit in data if hit['title'] == 'Солянка'
+        )
+        assert dish['type'] == 'dish'
+        assert dish['price'] == '300.00'
+        assert dish['menu'] == {'id': str(menu.id), 'title': menu.title}
+        assert dish['submenu'] == {'id': str(soups.id), 'title': soups.title}
+
+    async def test_pages(
+            self,
+            client: AsyncClient,
+            catalog: list[schemas.MenuTree]
+    ) -> None:
+        everything = await search(client, q='суп')
+        titles: list[str] = []
+        params = {'q': 'суп', 'limit': 1}
+
+        while True:
+            response = await client.get(reverse('search'), params=params)
+            titles.extend(hit['title'] for hit in response.json())
+            if 'x-next-cursor' not in response.headers:
+                break
+            params['cursor'] = response.headers['x-next-cursor']
+
+        assert titles == [hit['title'] for hit in everything]
+        assert len(titles) == 3
+
+    async def test_popular_query_is_cached(
+            self,
+            client: AsyncClient,
+            catalog: list[schemas.MenuTree],
+            cache_conn: Redis,
+            count_queries
+    ) -> None:
+        await cache_conn.delete('search_hits:морс')
+        await search(client, q='Морс')
+        await search(client, q='морс')
+
+        with count_queries() as statements:
+            data = await search(client, q='  МОРС ')
+
+        # The cache warmer may run other queries meanwhile.
+        assert not any('websearch_to_tsquery' in sql for sql in statements)
+        assert [hit['title'] for hit in data] == ['Морс', 'Напитки']
+
+    async def test_cached_query_sees_changes(
+            self,
+            client: AsyncClient,
+            catalog: list[schemas.MenuTree]
+    ) -> None:
+        for _ in range(2):
+            await search(client, q='чай')
+        drinks = catalog[0].submenus[1]
+
+        await client.post(
+            reverse(
+                'create_dish', menu_id=catalog[0].id, submenu_id=drinks.id
+            ),
+            json={'title': 'Чай', 'description': 'Чёрный', 'price': '50'}
+        )
+        data = await search(client, q='чай')
+
+        assert 'Чай' in [hit['title'] for hit in data]
+
+    async def test_part_of_title(
+            self,
+            client: AsyncClient,
+            catalog: list[schemas.MenuTree],
+            session
+    ) -> None:
+        if not await session.scalar(models.TRIGRAM_INSTALLED):
+            pytest.skip('pg_trgm is not installed')
+
+        # No full-text match, the word stems differently.
+        data = await search(client, q='соля')
+
+        assert [hit['title'] for hit in data] == ['Солянка']
@@ -0,0 +1,95 @@
+import asyncio
+import uuid
+
+import pytest
+from redis.asyncio import Redis  # type: ignore
+
+from app import cache, models, repositories, services
+from app.config import settings
+from app.custom_exceptions import EntityIsNotInCache
+from app.database import SessionLocal
+from app.single_flight import single_flight
+
+pytestmark = pytest.mark.anyio
+
+
+class TestSingleFlight:
+    async def test_concurrent_misses_run_one_query(
+            self,
+            cache_conn: Redis,
+            menu: models.Menu,
+            count_queries
+    ) -> None:
+        sessions = [SessionLocal() for _ in range(10)]
+        menu_services = [
+            services.MenuService(
+                cache.MenuCache(cache_conn, None),
+                repositories.MenuRepository(session)
+            )
+            for session in sessions
+        ]
+        try:
+            with count_queries('SELECT') as statements:
+                menus = await asyncio.gather(
+                    *(service.get(menu.id) for service in menu_services)
+                )
+        finally:
+            for session in sessions:
+                await session.close()
+
+        assert len(statements) == 1
+        assert {loaded.id for loaded in menus} == {menu.id}
+
+    async def test_waits_for_lock_holder_then_serves_stale(
+            self,
+            cache_conn: Redis,
+            menu: models.Menu,
+            menu_service: services.MenuService,
+            monkeypatch,
+            count_queries
+    ) -> None:
+        monkeypatch.setattr(settings, 'cache_lock_wait', 50)
+        namespace = cache.menu_namespace(menu.id)
+
+        await menu_service.get(menu.id)
+        await menu_service.cache.bump(namespace)
+        version = await menu_service.cache.version(namespace)
+        # Another worker is loading the new version and takes its time.
+        await cache_conn.set(f'lock:{menu.id}:v{version}', 'other', px=1000)
+
+        with count_queries() as statements:
+            stale = await menu_service.get(menu.id)
+
+        assert stale.id == menu.id
+        assert statements == []
+
+    async def test_cancelled_runner_leaves_load_to_others(
+            self,
+            cache_conn: Redis
+    ) -> None:
+        name = f'test:{uuid.uuid4()}'
+        started = asyncio.Event()
+
+        async def hang() -> str:
+            started.set()
+            await asyncio.sleep(10)
+            return 'never'
+
+        async def load() -> str:
+            return 'loaded'
+
+        async def miss() -> str:
+            raise EntityIsNotInCache
+
+        runner = asyncio.create_task(
+            single_flight(cache_conn, name, hang, miss, miss)
+        )
+        await started.wait()
+        other = asyncio.create_task(
+            single_flight(cache_conn, name, load, miss, miss)
+        )
+        await asyncio.sleep(0.01)
+        runner.cancel()
+
+        assert await other == 'loaded'
+        assert runner.cancelled()
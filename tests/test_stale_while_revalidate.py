@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+from redis.asyncio import Redis  # type: ignore
+
+from app import cache, models, schemas, services
+from app.config import settings
+from app.main import app
+from app.pagination import PageParams
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture()
+async def stale_while_revalidate(cache_conn: Redis, monkeypatch) -> None:
+    monkeypatch.setattr(settings, 'cache_stale_while_revalidate', True)
+    # Start a fresh line of versions, lists cached by earlier tests
+    # would otherwise be served as the previous version.
+    await cache_conn.delete(cache.version_key(cache.MENUS))
+    if app.state.local_cache is not None:
+        app.state.local_cache.clear()
+
+
+async def refreshed() -> None:
+    await asyncio.gather(*cache.refreshes)
+
+
+@pytest.mark.usefixtures('stale_while_revalidate')
+class TestStaleWhileRevalidate:
+    async def test_serves_previous_version_after_write(
+            self,
+            menu: models.Menu,
+            menu_service: services.MenuService,
+            count_queries
+    ) -> None:
+        page = await menu_service.get_all(PageParams())
+        assert len(page.items) == 1
+
+        await menu_service.create(
+            schemas.MenuCreate(title='Menu 2', description='Menu 2')
+        )
+
+        with count_queries() as statements:
+            page = await menu_service.get_all(PageParams())
+
+        assert len(page.items) == 1
+        assert statements == []
+
+        await refreshed()
+        page = await menu_service.get_all(PageParams())
+        assert len(page.items) == 2
+
+    async def test_refreshes_entries_past_soft_expiry(
+            self,
+            menu: models.Menu,
+            menu_service: services.MenuService,
+            monkeypatch
+    ) -> None:
+        monkeypatch.setattr(settings, 'cache_soft_ttl_list', 0)
+
+        await menu_service.get_all(PageParams())
+        await menu_repository_update(menu_service, menu)
+
+        page = await menu_service.get_all(PageParams())
+        assert page.items[0].title == 'Menu 1'
+        assert cache.refreshes
+
+        await refreshed()
+        page = await menu_service.get_all(PageParams())
+        assert page.items[0].title == 'Updated'
+
+
+async def menu_repository_update(
+        menu_service: services.MenuService,
+        menu: models.Menu
+) -> None:
+    # Change the row behind the cache's back, so only a refresh sees it.
+    await menu_service.repository.update(
+        menu.id,
+        schemas.MenuUpdate(title='Updated')
+    )
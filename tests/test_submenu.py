@@ -1,35 +1,45 @@
 from uuid import UUID
 
+import pytest
+from httpx import AsyncClient
+
 from app import models, schemas, services
+from app.pagination import PageParams
 from app.utils import reverse
-from tests.conftest import client
+
+pytestmark = pytest.mark.anyio
 
 
 class TestSubmenuRouts:
-    def test_read_submenus_success(
+    async def test_read_submenus_success(
             self,
+            client: AsyncClient,
             submenu: models.Submenu,
             submenu_service: services.SubmenuService
     ) -> None:
-        response = client.get(
-            reverse('read_submenus', menu_id=submenu.menu.id)
+        response = await client.get(
+            reverse('read_submenus', menu_id=submenu.menu_id)
         )
 
         assert response.status_code == 200
         data = response.json()
 
-        submenus = submenu_service.get_all(submenu.menu.id)
-        assert len(data) == len(submenus) == 1
+        submenus = await submenu_service.get_all(
+            submenu.menu_id,
+            PageParams()
+        )
+        assert len(data) == len(submenus.items) == 1
 
-    def test_read_submenu_success(
+    async def test_read_submenu_success(
             self,
+            client: AsyncClient,
             submenu: models.Submenu,
             submenu_service: services.SubmenuService
     ) -> None:
-        response = client.get(
+        response = await client.get(
             reverse(
                 'read_submenu',
-                menu_id=submenu.menu.id,
+                menu_id=submenu.menu_id,
                 submenu_id=submenu.id
             )
         )
@@ -37,7 +47,7 @@ class TestSubmenuRouts:
         submenu_data = response.json()
         assert 'id' in submenu_data
 
-        submenu = submenu_service.get(
+        submenu = await submenu_service.get(
             UUID(submenu_data['menu_id']),
             UUID(submenu_data['id'])
         )
@@ -46,12 +56,13 @@ class TestSubmenuRouts:
         assert submenu_data['title'] == submenu.title
         assert submenu_data['description'] == submenu.description
 
-    def test_create_submenu_success(
+    async def test_create_submenu_success(
             self,
+            client: AsyncClient,
             menu: models.Menu,
             submenu_service: services.SubmenuService
     ) -> None:
-        response = client.post(
+        response = await client.post(
             reverse('create_submenu', menu_id=menu.id),
             json={
                 'title': 'Submenu 1',
@@ -62,7 +73,7 @@ class TestSubmenuRouts:
         submenu_data = response.json()
         assert 'id' in submenu_data
 
-        submenu = submenu_service.get(
+        submenu = await submenu_service.get(
             UUID(submenu_data['menu_id']),
             UUID(submenu_data['id'])
         )
@@ -71,14 +82,15 @@ class TestSubmenuRouts:
         assert submenu_data['title'] == submenu.title
         assert submenu_data['description'] == submenu.description
 
-    def test_update_submenu_success(
+    async def test_update_submenu_success(
             self,
+            client: AsyncClient,
             submenu: models.Submenu
     ) -> None:
-        response = client.patch(
+        response = await client.patch(
             reverse(
                 'update_submenu',
-                menu_id=submenu.menu.id,
+                menu_id=submenu.menu_id,
                 submenu_id=submenu.id
             ),
             json={
@@ -92,10 +104,10 @@ class TestSubmenuRouts:
         assert submenu_data['title'] == 'Updated Submenu 1'
         assert submenu_data['description'] == 'Updated Submenu 1 description'
 
-        response = client.get(
+        response = await client.get(
             reverse(
                 'read_submenu',
-                menu_id=submenu.menu.id,
+                menu_id=submenu.menu_id,
                 submenu_id=submenu.id
             ),
         )
@@ -105,8 +117,9 @@ class TestSubmenuRouts:
         assert submenu_data['title'] == 'Updated Submenu 1'
         assert submenu_data['description'] == 'Updated Submenu 1 description'
 
-    def test_delete_submenu_success(
+    async def test_delete_submenu_success(
             self,
+            client: AsyncClient,
             menu: models.Menu,
             submenu_service: services.SubmenuService
     ) -> None:
@@ -115,15 +128,15 @@ class TestSubmenuRouts:
             'description': 'Submenu 1 description'
         }
 
-        submenu = submenu_service.create(
+        submenu = await submenu_service.create(
             menu.id,
             schemas.SubmenuCreate(**submenu_data)
         )
 
-        response = client.delete(
+        response = await client.delete(
             reverse(
                 'delete_submenu',
-                menu_id=submenu.menu.id,
+                menu_id=submenu.menu_id,
                 submenu_id=submenu.id
             ),
         )
@@ -134,10 +147,10 @@ class TestSubmenuRouts:
         assert submenu_data['title'] == submenu.title
         assert submenu_data['description'] == submenu.description
 
-        response = client.get(
+        response = await client.get(
             reverse(
                 'read_submenu',
-                menu_id=submenu.menu.id,
+                menu_id=submenu.menu_id,
                 submenu_id=submenu.id
             ),
         )
@@ -1,18 +1,25 @@
 from uuid import UUID
 
-from sqlalchemy.orm import Session
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import repositories
 from app.utils import reverse
-from tests.conftest import client
+
+pytestmark = pytest.mark.anyio
 
 
 class TestSubmenusAndDishesCounts:
     menu_id = ''
     submenu_id = ''
 
-    def test_create_menu_success(self, class_session: Session) -> None:
-        response = client.post(
+    async def test_create_menu_success(
+            self,
+            client: AsyncClient,
+            class_session: AsyncSession
+    ) -> None:
+        response = await client.post(
             reverse('create_menu'),
             json={
                 'title': 'Menu 1',
@@ -25,8 +32,12 @@ class TestSubmenusAndDishesCounts:
 
         TestSubmenusAndDishesCounts.menu_id = menu_data['id']
 
-    def test_create_submenu_success(self, class_session: Session) -> None:
-        response = client.post(
+    async def test_create_submenu_success(
+            self,
+            client: AsyncClient,
+            class_session: AsyncSession
+    ) -> None:
+        response = await client.post(
             reverse(
                 'create_submenu',
                 menu_id=TestSubmenusAndDishesCounts.menu_id
@@ -42,8 +53,12 @@ class TestSubmenusAndDishesCounts:
 
         TestSubmenusAndDishesCounts.submenu_id = submenu_data['id']
 
-    def test_create_dish_1_success(self, class_session: Session) -> None:
-        response = client.post(
+    async def test_create_dish_1_success(
+            self,
+            client: AsyncClient,
+            class_session: AsyncSession
+    ) -> None:
+        response = await client.post(
             reverse(
                 'create_dish',
                 menu_id=TestSubmenusAndDishesCounts.menu_id,
@@ -59,8 +74,12 @@ class TestSubmenusAndDishesCounts:
         dish_data = response.json()
         assert 'id' in dish_data
 
-    def test_create_dish_2_success(self, class_session: Session) -> None:
-        response = client.post(
+    async def test_create_dish_2_success(
+            self,
+            client: AsyncClient,
+            class_session: AsyncSession
+    ) -> None:
+        response = await client.post(
             reverse(
                 'create_dish',
                 menu_id=TestSubmenusAndDishesCounts.menu_id,
@@ -76,21 +95,29 @@ class TestSubmenusAndDishesCounts:
         dish_data = response.json()
         assert 'id' in dish_data
 
-    def test_read_menu_success(self, class_session: Session) -> None:
-        response = client.get(
+    async def test_read_menu_success(
+            self,
+            client: AsyncClient,
+            class_session: AsyncSession
+    ) -> None:
+        response = await client.get(
             reverse('read_menu', menu_id=TestSubmenusAndDishesCounts.menu_id)
         )
         assert response.status_code == 200
         menu_data = response.json()
         assert menu_data['id'] == TestSubmenusAndDishesCounts.menu_id
         menu_repository = repositories.MenuRepository(class_session)
-        menu_with_counts = menu_repository.get(UUID(menu_data['id']))
+        menu_with_counts = await menu_repository.get(UUID(menu_data['id']))
         assert menu_with_counts is not None
         assert menu_data['submenus_count'] == menu_with_counts.submenus_count
         assert menu_data['dishes_count'] == menu_with_counts.dishes_count
 
-    def test_read_submenu(self, class_session: Session) -> None:
-        response = client.get(
+    async def test_read_submenu(
+            self,
+            client: AsyncClient,
+            class_session: AsyncSession
+    ) -> None:
+        response = await client.get(
             reverse(
                 'read_submenu',
                 menu_id=TestSubmenusAndDishesCounts.menu_id,
@@ -102,8 +129,12 @@ class TestSubmenusAndDishesCounts:
         assert submenu_data['id'] == TestSubmenusAndDishesCounts.submenu_id
         assert submenu_data['dishes_count'] == 2
 
-    def test_delete_submenu_success(self, class_session: Session) -> None:
-        response = client.delete(
+    async def test_delete_submenu_success(
+            self,
+            client: AsyncClient,
+            class_session: AsyncSession
+    ) -> None:
+        response = await client.delete(
             reverse(
                 'delete_submenu',
                 menu_id=TestSubmenusAndDishesCounts.menu_id,
@@ -113,15 +144,23 @@ class TestSubmenusAndDishesCounts:
         )
         assert response.status_code == 200
 
-    def test_read_submenus_success(self, class_session: Session) -> None:
-        response = client.get(
+    async def test_read_submenus_success(
+            self,
+            client: AsyncClient,
+            class_session: AsyncSession
+    ) -> None:
+        response = await client.get(
             reverse('read_submenus', menu_id=TestSubmenusAndDishesCounts.menu_id)
         )
         assert response.status_code == 200
         assert response.json() == []
 
-    def test_read_dishes(self, class_session: Session) -> None:
-        response = client.get(
+    async def test_read_dishes(
+            self,
+            client: AsyncClient,
+            class_session: AsyncSession
+    ) -> None:
+        response = await client.get(
             reverse(
                 'read_dishes',
                 menu_id=TestSubmenusAndDishesCounts.menu_id,
@@ -131,11 +170,12 @@ class TestSubmenusAndDishesCounts:
         assert response.status_code == 200
         assert response.json() == []
 
-    def test_read_menu_with_no_submenus_and_dishes_success(
+    async def test_read_menu_with_no_submenus_and_dishes_success(
             self,
-            class_session: Session
+            client: AsyncClient,
+            class_session: AsyncSession
     ) -> None:
-        response = client.get(
+        response = await client.get(
             reverse(
                 'read_menu',
                 menu_id=TestSubmenusAndDishesCounts.menu_id,
@@ -147,13 +187,21 @@ class TestSubmenusAndDishesCounts:
         assert menu_read_data['submenus_count'] == 0
         assert menu_read_data['dishes_count'] == 0
 
-    def test_delete_menu_success(self, class_session: Session) -> None:
-        response = client.delete(
+    async def test_delete_menu_success(
+            self,
+            client: AsyncClient,
+            class_session: AsyncSession
+    ) -> None:
+        response = await client.delete(
             reverse('delete_menu', menu_id=TestSubmenusAndDishesCounts.menu_id)
         )
         assert response.status_code == 200
 
-    def test_read_menus(self, class_session: Session) -> None:
-        response = client.get(reverse('read_menus'))
+    async def test_read_menus(
+            self,
+            client: AsyncClient,
+            class_session: AsyncSession
+    ) -> None:
+        response = await client.get(reverse('read_menus'))
         assert response.status_code == 200
         assert response.json() == []
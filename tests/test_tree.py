@@ -0,0 +1,76 @@
+from uuid import uuid4
+
+import pytest
+from httpx import AsyncClient
+
+from app import models
+from app.utils import reverse
+
+pytestmark = pytest.mark.anyio
+
+
+class TestMenuTreeRouts:
+    async def test_read_menus_tree_success(
+            self,
+            client: AsyncClient,
+            submenu: models.Submenu,
+            dish: models.Dish,
+            count_queries
+    ) -> None:
+        with count_queries() as statements:
+            response = await client.get(reverse('read_menus_tree'))
+
+        assert response.status_code == 200
+        assert len(statements) <= 3
+
+        data = response.json()
+        assert len(data) == 1
+        assert data[0]['id'] == str(submenu.menu_id)
+        assert data[0]['submenus'][0]['id'] == str(submenu.id)
+        assert data[0]['submenus'][0]['dishes'][0]['id'] == str(dish.id)
+
+    async def test_read_menu_tree_success(
+            self,
+            client: AsyncClient,
+            submenu: models.Submenu,
+            dish: models.Dish
+    ) -> None:
+        response = await client.get(
+            reverse('read_menu_tree', menu_id=submenu.menu_id)
+        )
+        assert response.status_code == 200
+        assert len(response.json()['submenus'][0]['dishes']) == 1
+
+        response = await client.post(
+            reverse(
+                'create_dish',
+                menu_id=submenu.menu_id,
+                submenu_id=submenu.id
+            ),
+            json={
+                'title': 'Dish 2',
+                'description': 'Dish 2 description',
+                'price': '10.00'
+            }
+        )
+        assert response.status_code == 201
+
+        response = await client.get(
+            reverse('read_menu_tree', menu_id=submenu.menu_id)
+        )
+        assert response.status_code == 200
+        assert len(response.json()['submenus'][0]['dishes']) == 2
+
+        response = await client.get(reverse('read_menus_tree'))
+        assert response.status_code == 200
+        assert len(response.json()[0]['submenus'][0]['dishes']) == 2
+
+    async def test_read_menu_tree_not_found(
+            self,
+            client: AsyncClient,
+            menu: models.Menu
+    ) -> None:
+        response = await client.get(
+            reverse('read_menu_tree', menu_id=uuid4())
+        )
+        assert response.status_code == 404
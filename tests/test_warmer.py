@@ -0,0 +1,77 @@
+import pytest
+from httpx import AsyncClient
+from redis.asyncio import Redis  # type: ignore
+
+from app import cache, models, services
+from app.config import settings
+from app.pagination import PageParams
+from app.utils import reverse
+from app.warmer import (
+    ACCESS_KEY,
+    CacheWarmer,
+    Target,
+    access_stats,
+    prioritize,
+    target_member,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+class TestCacheWarmer:
+    async def test_counts_reads_of_warmable_endpoints(
+            self,
+            client: AsyncClient,
+            cache_conn: Redis,
+            menu: models.Menu
+    ) -> None:
+        await cache_conn.delete(ACCESS_KEY)
+        for _ in range(2):
+            await client.get(reverse('read_submenus', menu_id=menu.id))
+        await access_stats.flush(cache_conn)
+
+        member = target_member('read_submenus', {'menu_id': str(menu.id)})
+        assert await cache_conn.zscore(ACCESS_KEY, member) == 2
+
+    def test_prioritize_by_reads(self, monkeypatch) -> None:
+        monkeypatch.setattr(settings, 'cache_warm_limit', 2)
+        targets: list[Target] = [
+            ('read_menus', {}),
+            ('read_menu', {'menu_id': 'a'}),
+            ('read_menu', {'menu_id': 'b'}),
+        ]
+        scores = {target_member('read_menu', {'menu_id': 'b'}): 5.0}
+
+        assert prioritize(targets, scores) == [
+            ('read_menu', {'menu_id': 'b'}),
+            ('read_menus', {}),
+        ]
+
+    async def test_warm_fills_lists_and_menus(
+            self,
+            cache_conn: Redis,
+            menu: models.Menu,
+            submenu: models.Submenu,
+            dish: models.Dish,
+            menu_service: services.MenuService,
+            dish_service: services.DishService,
+            count_queries
+    ) -> None:
+        await menu_service.cache.bump(
+            cache.MENUS,
+            cache.menu_namespace(menu.id),
+            cache.submenu_namespace(submenu.id)
+        )
+        warmer = CacheWarmer(cache_conn, menu_service.cache.local)
+        assert await warmer.warm() == 4
+
+        with count_queries() as statements:
+            menus = await menu_service.get_all(PageParams())
+            await menu_service.get(menu.id)
+            dishes = await dish_service.get_all(
+                menu.id, submenu.id, PageParams()
+            )
+
+        assert statements == []
+        assert [item.id for item in menus.items] == [menu.id]
+        assert [item.id for item in dishes.items] == [dish.id]
@@ -0,0 +1,138 @@
+import pytest
+from redis.asyncio import Redis  # type: ignore
+
+from app import cache, models, repositories, schemas, services
+from app.config import settings
+from app.database import SessionLocal
+from app.pagination import PageParams
+
+pytestmark = pytest.mark.anyio
+
+
+class TestWriteThrough:
+    async def test_updated_menu_is_read_from_cache(
+            self,
+            menu: models.Menu,
+            menu_service: services.MenuService,
+            count_queries
+    ) -> None:
+        # Lists cached by earlier tests may hold menus deleted since.
+        await menu_service.cache.bump(cache.MENUS)
+        await menu_service.get_all(PageParams())
+        await menu_service.update(menu.id, schemas.MenuUpdate(title='Menu 2'))
+
+        with count_queries() as statements:
+            updated = await menu_service.get(menu.id)
+            page = await menu_service.get_all(PageParams())
+
+        assert statements == []
+        assert updated.title == 'Menu 2'
+        assert [item.title for item in page.items] == ['Menu 2']
+
+    async def test_updated_dish_is_patched_into_its_list(
+            self,
+            menu: models.Menu,
+            submenu: models.Submenu,
+            dish: models.Dish,
+            dish_service: services.DishService,
+            count_queries
+    ) -> None:
+        await dish_service.get_all(menu.id, submenu.id, PageParams())
+        await dish_service.update(
+            menu.id, submenu.id, dish.id,
+            schemas.DishUpdate(price=15.5)
+        )
+
+        with count_queries() as statements:
+            page = await dish_service.get_all(menu.id, submenu.id, PageParams())
+
+        assert statements == []
+        assert page.items[0].price == '15.50'
+
+    async def test_created_dish_is_read_from_cache(
+            self,
+            menu: models.Menu,
+            submenu: models.Submenu,
+            dish_service: services.DishService,
+            count_queries
+    ) -> None:
+        db_dish = await dish_service.create(
+            menu.id, submenu.id,
+            schemas.DishCreate(
+                title='Dish 2', description='Dish 2', price='3.00'
+            )
+        )
+
+        with count_queries() as statements:
+            cached = await dish_service.get(menu.id, submenu.id, db_dish.id)
+
+        assert statements == []
+        assert cached.title == 'Dish 2'
+
+    async def test_disabled_writes_only_invalidate(
+            self,
+            menu: models.Menu,
+            menu_service: services.MenuService,
+            monkeypatch,
+            count_queries
+    ) -> None:
+        monkeypatch.setattr(settings, 'cache_write_through', False)
+        await menu_service.update(menu.id, schemas.MenuUpdate(title='Menu 2'))
+
+        with count_queries() as statements:
+            updated = await menu_service.get(menu.id)
+
+        assert statements != []
+        assert updated.title == 'Menu 2'
+
+    async def test_slower_writer_does_not_cache_an_older_row(
+            self,
+            menu: models.Menu,
+            menu_service: services.MenuService,
+            menu_cache: cache.MenuCache,
+            monkeypatch
+    ) -> None:
+        await menu_service.cache.bump(cache.MENUS)
+        await menu_service.get_all(PageParams())
+        update = menu_service.repository.update
+
+        async with SessionLocal() as other_session:
+            other = services.MenuService(
+                menu_cache, repositories.MenuRepository(other_session)
+            )
+
+            async def update_and_get_overtaken(*args) -> models.Menu:
+                # The other write commits after this one, but bumps and
+                # writes through first.
+                db_menu = await update(*args)
+                await other.update(menu.id, schemas.MenuUpdate(title='B'))
+                return db_menu
+
+            monkeypatch.setattr(
+                menu_service.repository, 'update', update_and_get_overtaken
+            )
+            await menu_service.update(menu.id, schemas.MenuUpdate(title='A'))
+
+        cached = await menu_service.get(menu.id)
+        page = await menu_service.get_all(PageParams())
+
+        assert cached.title == 'B'
+        assert [item.title for item in page.items] == ['B']
+
+    async def test_put_is_skipped_once_the_version_moved_on(
+            self,
+            menu: models.Menu,
+            menu_cache: cache.MenuCache,
+            menu_repository: repositories.MenuRepository,
+            cache_conn: Redis
+    ) -> None:
+        namespace = cache.menu_namespace(menu.id)
+        version = await menu_cache.version(namespace)
+        await menu_cache.bump(namespace)
+
+        await menu_cache.put(
+            str(menu.id), namespace,
+            lambda: menu_repository.reload(menu.id), version
+        )
+
+        assert await cache_conn.exists(f'{menu.id}:v{version}') == 0